@@ -0,0 +1,279 @@
+"""
+Admission control for the auth views.
+
+Three gates, cheapest first:
+    per-IP token bucket     turns away a single source hammering the endpoint
+    per-email token bucket  (login only) slows guessing against one account
+    concurrency limit       caps in-flight auth work at the hashing capacity; a request that cannot
+                            get a slot within `queue_target` seconds is shed instead of queueing
+Rejections are a fast 429 with Retry-After, so a burst degrades into refusals rather than
+timeouts for everyone.
+
+Bucket tables are split into lock stripes, hold one [tokens, updated] pair per key and are
+bounded: least recently seen keys go first, and keys idle long enough to have refilled completely
+are dropped (an absent key is a full bucket).
+"""
+
+import asyncio
+import math
+import os
+import threading
+import time
+from collections import OrderedDict, deque
+from functools import wraps
+from typing import Optional
+from asgiref.sync import iscoroutinefunction
+from django.http import JsonResponse
+from config.metrics import counter, histogram
+from apps.authentication_module.hashers import HASHER_CONFIG
+
+
+ADMISSION_CONFIG={
+    'enabled':os.environ.get('AUTH_ADMISSION_ENABLED', 'true').lower()=='true',
+    'ip_rate':float(os.environ.get('AUTH_ADMISSION_IP_RATE', 5)), # requests per second, sustained
+    'ip_burst':float(os.environ.get('AUTH_ADMISSION_IP_BURST', 20)),
+    'email_rate':float(os.environ.get('AUTH_ADMISSION_EMAIL_RATE', 0.1)),
+    'email_burst':float(os.environ.get('AUTH_ADMISSION_EMAIL_BURST', 5)),
+    'max_tracked_keys':int(os.environ.get('AUTH_ADMISSION_MAX_KEYS', 100_000)), # per bucket table
+    'max_concurrent':int(os.environ.get('AUTH_ADMISSION_CONCURRENCY', HASHER_CONFIG['max_workers'])),
+    'max_queued':int(os.environ.get('AUTH_ADMISSION_MAX_QUEUED', HASHER_CONFIG['max_workers']*8)),
+    'queue_target':float(os.environ.get('AUTH_ADMISSION_QUEUE_TARGET', 0.25)), # seconds
+    'trust_forwarded_for':os.environ.get('AUTH_ADMISSION_TRUST_XFF', 'false').lower()=='true',
+    'stripes':16,
+}
+
+DECISIONS=counter('auth_admission_decisions_total', 'Admission decisions for auth requests.', ('decision',))
+QUEUE_WAIT=histogram('auth_admission_queue_seconds', 'Time admitted auth requests waited for a slot.')
+
+
+class TokenBuckets:
+    """Bounded, lock-striped token buckets keyed by string."""
+    __slots__=('rate', 'burst', 'capacity', '_refill_seconds', '_stripes')
+
+    def __init__(self, rate:float, burst:float, max_keys:int, stripes:int=16):
+        self.rate=rate
+        self.burst=burst
+        self.capacity=max(1, max_keys//stripes)
+        self._refill_seconds=burst/rate # idle this long, a bucket is full again
+        self._stripes=[(threading.Lock(), OrderedDict()) for _ in range(stripes)]
+
+    def take(self, key:str)->float:
+        """Takes a token. Returns 0.0 when allowed, else seconds until one is available."""
+        lock, table=self._stripes[hash(key)%len(self._stripes)]
+        now=time.monotonic()
+        with lock:
+            bucket=table.get(key)
+            if bucket is None:
+                self._evict(table, now)
+                bucket=table[key]=[self.burst, now]
+            else:
+                table.move_to_end(key)
+                bucket[0]=min(self.burst, bucket[0]+(now-bucket[1])*self.rate)
+                bucket[1]=now
+            if bucket[0]>=1:
+                bucket[0]-=1
+                return 0.0
+            return (1-bucket[0])/self.rate
+
+    def _evict(self, table:OrderedDict, now:float)->None:
+        """Makes room for one key: drops the oldest if full, plus a few refilled idle ones. Caller holds the lock."""
+        for _ in range(8):
+            if not table:
+                return
+            oldest_updated=table[next(iter(table))][1]
+            if len(table)<self.capacity and now-oldest_updated<self._refill_seconds:
+                return
+            table.popitem(last=False)
+
+    def __len__(self)->int:
+        return sum(len(table) for _, table in self._stripes)
+
+
+class _SlotWaiter:
+    """A queued acquire. `granted` is set under the limiter lock before `wake` is called."""
+    __slots__=('granted', 'wake')
+
+    def __init__(self, wake):
+        self.granted=False
+        self.wake=wake
+
+
+class ConcurrencyLimiter:
+    """Counting limiter with a FIFO queue, usable from threads and from the event loop."""
+    __slots__=('limit', 'max_queued', 'active', '_waiters', '_lock')
+
+    def __init__(self, limit:int, max_queued:int):
+        self.limit=limit
+        self.max_queued=max_queued
+        self.active=0
+        self._waiters=deque()
+        self._lock=threading.Lock()
+
+    def _try_enter(self, waiter_factory):
+        """Takes a free slot (True), refuses when the queue is full (False), or queues a waiter."""
+        with self._lock:
+            if self.active<self.limit and not self._waiters:
+                self.active+=1
+                return True
+            if len(self._waiters)>=self.max_queued:
+                return False
+            waiter=waiter_factory()
+            self._waiters.append(waiter)
+            return waiter
+
+    def _settle(self, waiter:_SlotWaiter)->bool:
+        with self._lock:
+            if waiter.granted:
+                return True
+            self._waiters.remove(waiter)
+            return False
+
+    def _withdraw(self, waiter:_SlotWaiter)->None:
+        """Drops a cancelled waiter; a slot already handed to it is passed on, not leaked."""
+        with self._lock:
+            if not waiter.granted:
+                self._waiters.remove(waiter)
+                return
+        self.release()
+
+    def acquire(self, timeout:float)->bool:
+        """Waits up to `timeout` seconds for a slot."""
+        event=threading.Event()
+        entered=self._try_enter(lambda: _SlotWaiter(event.set))
+        if isinstance(entered, bool):
+            return entered
+        event.wait(timeout)
+        return self._settle(entered)
+
+    async def acquire_async(self, timeout:float)->bool:
+        """Waits up to `timeout` seconds for a slot without blocking the event loop."""
+        loop=asyncio.get_running_loop()
+        future=loop.create_future()
+
+        def wake()->None:
+            loop.call_soon_threadsafe(lambda: future.done() or future.set_result(None))
+
+        entered=self._try_enter(lambda: _SlotWaiter(wake))
+        if isinstance(entered, bool):
+            return entered
+        try:
+            await asyncio.wait_for(future, timeout)
+        except asyncio.TimeoutError:
+            pass
+        except asyncio.CancelledError: # e.g. the client disconnected while queued
+            self._withdraw(entered)
+            raise
+        return self._settle(entered)
+
+    def release(self)->None:
+        """Frees a slot, handing it straight to the oldest waiter if there is one."""
+        with self._lock:
+            if self._waiters:
+                waiter=self._waiters.popleft()
+                waiter.granted=True
+                waiter.wake()
+            else:
+                self.active-=1
+
+    def queued(self)->int:
+        return len(self._waiters)
+
+
+class AdmissionController:
+    """The three admission gates with shared configuration."""
+
+    def __init__(self, config:dict):
+        self.config=config
+        self.ip_buckets=TokenBuckets(config['ip_rate'], config['ip_burst'], config['max_tracked_keys'], config['stripes'])
+        self.email_buckets=TokenBuckets(config['email_rate'], config['email_burst'], config['max_tracked_keys'], config['stripes'])
+        self.limiter=ConcurrencyLimiter(config['max_concurrent'], config['max_queued'])
+
+    def client_ip(self, request)->str:
+        if self.config['trust_forwarded_for']:
+            forwarded=request.META.get('HTTP_X_FORWARDED_FOR', '')
+            if forwarded:
+                return forwarded.split(',', 1)[0].strip()
+        return request.META.get('REMOTE_ADDR', '')
+
+    def check_ip(self, request)->float:
+        """Returns 0.0 when the client may proceed, else seconds to wait."""
+        retry_after=self.ip_buckets.take(self.client_ip(request))
+        if retry_after:
+            DECISIONS.inc('shed_ip')
+        return retry_after
+
+    def check_email(self, email:str)->float:
+        """Returns 0.0 when the account may be tried, else seconds to wait."""
+        if not self.config['enabled']:
+            return 0.0
+        retry_after=self.email_buckets.take(str(email).strip().lower())
+        if retry_after:
+            DECISIONS.inc('shed_email')
+        return retry_after
+
+    def _admitted(self, admitted:bool, started:float)->bool:
+        if admitted:
+            QUEUE_WAIT.labels().observe(time.monotonic()-started)
+            DECISIONS.inc('admitted')
+        else:
+            DECISIONS.inc('shed_overload')
+        return admitted
+
+    def acquire(self)->bool:
+        started=time.monotonic()
+        return self._admitted(self.limiter.acquire(self.config['queue_target']), started)
+
+    async def acquire_async(self)->bool:
+        started=time.monotonic()
+        return self._admitted(await self.limiter.acquire_async(self.config['queue_target']), started)
+
+    def release(self)->None:
+        self.limiter.release()
+
+    def stats(self)->dict:
+        return {'active':self.limiter.active, 'queued':self.limiter.queued(),
+                'tracked_ips':len(self.ip_buckets), 'tracked_emails':len(self.email_buckets)}
+
+
+admission:AdmissionController=AdmissionController(ADMISSION_CONFIG)
+
+
+def too_many_requests(retry_after:Optional[float]=None)->JsonResponse:
+    """429 response telling the client when to come back."""
+    response=JsonResponse({'error':'Too many requests. Please try again later.'}, status=429)
+    response['Retry-After']=str(max(1, math.ceil(retry_after or admission.config['queue_target'])))
+    return response
+
+
+def admission_controlled(view):
+    """Runs a view behind the per-IP bucket and the concurrency limit. Works on sync and async views."""
+    if iscoroutinefunction(view):
+        @wraps(view)
+        async def async_wrapper(request, *args, **kwargs):
+            if not admission.config['enabled']:
+                return await view(request, *args, **kwargs)
+            retry_after=admission.check_ip(request)
+            if retry_after:
+                return too_many_requests(retry_after)
+            if not await admission.acquire_async():
+                return too_many_requests()
+            try:
+                return await view(request, *args, **kwargs)
+            finally:
+                admission.release()
+        return async_wrapper
+
+    @wraps(view)
+    def wrapper(request, *args, **kwargs):
+        if not admission.config['enabled']:
+            return view(request, *args, **kwargs)
+        retry_after=admission.check_ip(request)
+        if retry_after:
+            return too_many_requests(retry_after)
+        if not admission.acquire():
+            return too_many_requests()
+        try:
+            return view(request, *args, **kwargs)
+        finally:
+            admission.release()
+    return wrapper
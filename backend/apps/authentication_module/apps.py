@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class AuthenticationModuleConfig(AppConfig):
+    """Authentication module application configuration."""
+    name='apps.authentication_module'
+    label='authentication_module'
@@ -0,0 +1,269 @@
+"""
+Bulk user import.
+
+Records stream in as NDJSON or CSV lines and are processed in fixed-size chunks, so memory stays
+flat regardless of input size. Each chunk is validated with the registration endpoint's field
+rules, hashed in parallel on the bulk hashing executor (overlapping with the previous chunk's
+write; kept apart from the executor live logins use), loaded into a session-local staging table
+(executemany on SQLite, COPY on Postgres) and moved into `users` with one INSERT ... SELECT in
+its own transaction. Rows that collide with existing users are reported, not fatal.
+
+Records: {"username": ..., "email": ..., "password": ...}, or "password_hash" carrying an
+already-encoded hash (see hashers.py) when migrating users from another system.
+"""
+
+import codecs
+import csv
+import json
+import os
+from typing import Callable, Dict, Iterable, Iterator, List, Optional, Tuple
+from django.db import connection, transaction
+from apps.authentication_module.existence import existence_index
+from apps.authentication_module.schema import normalize_email, normalize_username
+from apps.authentication_module.sharding import user_shards
+from apps.authentication_module.hashers import (
+    PasswordHasherError, get_bulk_hashing_executor, identify_hasher, make_password,
+)
+from apps.authentication_module.payloads import REGISTRATION_FIELDS, REGISTRATION_PAYLOAD, PayloadError, PayloadSchema
+
+
+BULK_IMPORT_CONFIG={
+    'chunk_size':int(os.environ.get('AUTH_BULK_CHUNK_SIZE', 2_000)),
+    'max_reported_errors':1_000, # per import, to keep responses bounded
+    'token':os.environ.get('AUTH_BULK_IMPORT_TOKEN'), # X-Import-Token for the HTTP endpoint; unset disables it
+}
+
+STAGING_TABLE:dict={
+    'postgresql':"""
+        CREATE TEMP TABLE IF NOT EXISTS users_import (
+            line INTEGER, username TEXT, email TEXT, password TEXT,
+            username_normalized TEXT, email_normalized TEXT
+        ) ON COMMIT DELETE ROWS
+    """,
+    'sqlite':"""
+        CREATE TEMP TABLE IF NOT EXISTS users_import (
+            line INTEGER, username TEXT, email TEXT, password TEXT,
+            username_normalized TEXT, email_normalized TEXT
+        )
+    """,
+}
+
+# Separate EXISTS probes (not one OR) so each is a point lookup on its unique index
+CONFLICTS_QUERY:str="""
+    SELECT s.line,
+           EXISTS (SELECT 1 FROM users u WHERE u.username_normalized = s.username_normalized),
+           EXISTS (SELECT 1 FROM users u WHERE u.email_normalized = s.email_normalized)
+    FROM users_import s
+    WHERE EXISTS (SELECT 1 FROM users u WHERE u.username_normalized = s.username_normalized)
+       OR EXISTS (SELECT 1 FROM users u WHERE u.email_normalized = s.email_normalized)
+"""
+
+# The WHERE clause also disambiguates ON CONFLICT after INSERT ... SELECT for SQLite's parser
+INSERT_FROM_STAGING:str="""
+    INSERT INTO users (username, email, password, username_normalized, email_normalized)
+    SELECT s.username, s.email, s.password, s.username_normalized, s.email_normalized
+    FROM users_import s
+    WHERE NOT EXISTS (SELECT 1 FROM users u WHERE u.username_normalized = s.username_normalized)
+      AND NOT EXISTS (SELECT 1 FROM users u WHERE u.email_normalized = s.email_normalized)
+    ON CONFLICT DO NOTHING
+    RETURNING username, email
+"""
+
+# Records carrying password_hash instead of password: the same rules for username and email
+PREHASHED_RECORD:PayloadSchema=PayloadSchema(
+    tuple(field for field in REGISTRATION_FIELDS if field.name!='password'), REGISTRATION_PAYLOAD.max_body_bytes)
+
+Record=Tuple[int, dict] # (line number, decoded fields)
+Row=Tuple[int, str, str, str] # (line number, username, email, password or encoded hash)
+
+
+def iter_ndjson_records(lines:Iterable[bytes])->Iterator[Record]:
+    """Decodes one JSON object per line. Undecodable lines yield an {'_error': ...} record."""
+    for line_number, line in enumerate(lines, start=1):
+        if not line.strip():
+            continue
+        try:
+            record=json.loads(line)
+        except (json.JSONDecodeError, UnicodeDecodeError):
+            record={'_error':'INVALID JSON'}
+        yield line_number, record if isinstance(record, dict) else {'_error':'Expected a JSON object'}
+
+
+def iter_csv_records(lines:Iterable[bytes])->Iterator[Record]:
+    """Decodes CSV lines with a header row naming the fields."""
+    reader=csv.DictReader(codecs.iterdecode(lines, 'utf-8'))
+    for record in reader:
+        yield reader.line_num, record
+
+
+def iter_records(lines:Iterable[bytes], data_format:str)->Iterator[Record]:
+    """Decodes an NDJSON ('ndjson') or CSV ('csv') line stream."""
+    if data_format=='csv':
+        return iter_csv_records(lines)
+    return iter_ndjson_records(lines)
+
+
+def validate_record(line_number:int, record:dict)->Tuple[Optional[tuple], Optional[str]]:
+    """Returns ((line, username, email, password, prehashed), None), or (None, error message)."""
+    if '_error' in record:
+        return None, record['_error']
+
+    password_hash=record.get('password_hash')
+    try:
+        if not password_hash:
+            username, email, password=REGISTRATION_PAYLOAD.validate(record)
+            return (line_number, username, email, password, False), None
+        username, email=PREHASHED_RECORD.validate(record)
+    except PayloadError as exc:
+        return None, exc.message
+
+    if not isinstance(password_hash, str):
+        return None, 'Invalid password_hash'
+    try:
+        identify_hasher(password_hash)
+    except PasswordHasherError as exc:
+        return None, str(exc)
+    return (line_number, username, email, password_hash, True), None
+
+
+def _load_staging(cursor, rows:List[Row])->None:
+    """Loads a chunk, with its lookup columns, into the staging table: COPY on Postgres, executemany elsewhere."""
+    staged=((line, username, email, password, normalize_username(username), normalize_email(email))
+            for line, username, email, password in rows)
+    raw_cursor=cursor.cursor
+    if connection.vendor=='postgresql' and hasattr(raw_cursor, 'copy'): # psycopg 3
+        with raw_cursor.copy("COPY users_import (line, username, email, password, username_normalized, email_normalized) "
+                             "FROM STDIN") as copy:
+            for row in staged:
+                copy.write_row(row)
+        return
+
+    cursor.executemany(
+        "INSERT INTO users_import (line, username, email, password, username_normalized, email_normalized) "
+        "VALUES (%s, %s, %s, %s, %s, %s)",
+        staged
+    )
+
+
+def write_chunk(rows:List[Row])->Tuple[int, List[Tuple[int, str]]]:
+    """
+    Writes a chunk of hashed rows in one transaction.
+    Returns the number inserted and (line, error) pairs for rows that collided with existing users.
+    """
+    if user_shards.enabled:
+        return write_sharded_chunk(rows)
+
+    conflicts:List[Tuple[int, str]]=[]
+    with transaction.atomic(), connection.cursor() as cursor:
+        cursor.execute(STAGING_TABLE.get(connection.vendor, STAGING_TABLE['postgresql']))
+        cursor.execute("DELETE FROM users_import")
+        _load_staging(cursor, rows)
+
+        cursor.execute(CONFLICTS_QUERY)
+        conflicted_lines=set()
+        for line, username_exists, email_exists in cursor.fetchall():
+            conflicted_lines.add(line)
+            conflicts.append((line, "Username already exists" if username_exists else "Email already exists"))
+
+        cursor.execute(INSERT_FROM_STAGING)
+        inserted=cursor.fetchall()
+        cursor.execute("DELETE FROM users_import")
+
+    for username, email in inserted:
+        existence_index.add(username, email)
+
+    # Rows neither inserted nor flagged above lost a race with a concurrent registration
+    if len(inserted)+len(conflicted_lines)<len(rows):
+        inserted_usernames={username for username, _ in inserted}
+        conflicts.extend(
+            (line, "User already exists") for line, username, _email, _password in rows
+            if username not in inserted_usernames and line not in conflicted_lines
+        )
+
+    return len(inserted), conflicts
+
+
+def write_sharded_chunk(rows:List[Row])->Tuple[int, List[Tuple[int, str]]]:
+    """write_chunk() for sharded user storage: one transaction per touched shard, shards written in parallel."""
+    inserted, conflicts=user_shards.insert_many(
+        (line, username, email, password, None) for line, username, email, password in rows)
+    for _line, _user_id, username, email in inserted:
+        existence_index.add(username, email)
+    return len(inserted), [
+        (line, "Username already exists" if field=='username' else "Email already exists") for line, field in conflicts
+    ]
+
+
+def _hash_chunk(chunk:List[tuple]):
+    """Submits a chunk's plaintext passwords to the bulk hashing executor. Returns rows with hash futures."""
+    executor=get_bulk_hashing_executor()
+    return [
+        (line, username, email, password if prehashed else executor.submit(make_password, password))
+        for line, username, email, password, prehashed in chunk
+    ]
+
+
+def _resolve_chunk(pending)->List[Row]:
+    return [
+        (line, username, email, password if isinstance(password, str) else password.result())
+        for line, username, email, password in pending
+    ]
+
+
+def import_users(records:Iterable[Record], chunk_size:Optional[int]=None,
+                 on_error:Optional[Callable[[int, str], None]]=None)->Dict:
+    """
+    Imports decoded records chunk by chunk.
+    Args:
+        records: (line number, fields) pairs, e.g. from iter_records()
+        chunk_size: Rows per transaction
+        on_error: Called with (line, message) for every invalid or conflicting row
+    Returns:
+        Summary with received/inserted/invalid/conflicts counts and the first reported errors
+    """
+    chunk_size=chunk_size or BULK_IMPORT_CONFIG['chunk_size']
+    summary={'received':0, 'inserted':0, 'invalid':0, 'conflicts':0, 'errors':[]}
+
+    def report(line:int, message:str)->None:
+        if len(summary['errors'])<BULK_IMPORT_CONFIG['max_reported_errors']:
+            summary['errors'].append({'line':line, 'error':message})
+        if on_error:
+            on_error(line, message)
+
+    def flush(pending)->None:
+        inserted, conflicts=write_chunk(_resolve_chunk(pending))
+        summary['inserted']+=inserted
+        summary['conflicts']+=len(conflicts)
+        for line, message in conflicts:
+            report(line, message)
+
+    chunk:List[tuple]=[]
+    seen=set() # duplicates (after normalization) within one chunk would abort the INSERT ... SELECT
+    pending=None
+    for line_number, record in records:
+        summary['received']+=1
+        row, error=validate_record(line_number, record)
+        if error is None:
+            keys=(('u', normalize_username(row[1])), ('e', normalize_email(row[2])))
+            if keys[0] in seen or keys[1] in seen:
+                error='Duplicate username or email within import'
+        if error:
+            summary['invalid']+=1
+            report(line_number, error)
+            continue
+
+        seen.update(keys)
+        chunk.append(row)
+        if len(chunk)>=chunk_size:
+            # Hash this chunk while the previous one is written
+            hashing=_hash_chunk(chunk)
+            if pending:
+                flush(pending)
+            pending, chunk, seen=hashing, [], set()
+
+    if pending:
+        flush(pending)
+    if chunk:
+        flush(_hash_chunk(chunk))
+
+    return summary
@@ -0,0 +1,262 @@
+"""
+Auth event log, written off the request path into the analytics database.
+
+register() and login() push one compact tuple per attempt (time, kind, outcome, latency, hashed
+client IP) onto a bounded in-memory queue; a background thread batch-inserts them through the
+sqlconfig pool. When the queue is full events are dropped and counted, never waited for.
+
+Rollups over the table: attempts per minute, and failure rates per kind.
+"""
+
+import atexit
+import hashlib
+import hmac
+import os
+import queue
+import threading
+import time
+from functools import wraps
+from typing import Dict, List, Optional
+from asgiref.sync import iscoroutinefunction
+from django.db import connections
+from django.utils.connection import ConnectionDoesNotExist
+from config.snapshot import configuration
+from config.metrics import counter
+from config.sqlconfig import execute_sqlite_query, sqlite_connection
+from apps.authentication_module.admission import admission
+
+
+EVENTS_CONFIG={
+    'enabled':os.environ.get('AUTH_EVENTS_ENABLED', 'true').lower()=='true',
+    'queue_size':int(os.environ.get('AUTH_EVENTS_QUEUE_SIZE', 10_000)),
+    'batch_size':int(os.environ.get('AUTH_EVENTS_BATCH_SIZE', 500)),
+    'flush_interval':float(os.environ.get('AUTH_EVENTS_FLUSH_INTERVAL', 1.0)), # seconds a partial batch may wait
+    'database':'analytics', # DATABASES alias; must be SQLite
+}
+
+EVENTS_TABLE:str="""
+    CREATE TABLE IF NOT EXISTS auth_events (
+        id INTEGER PRIMARY KEY,
+        occurred_at REAL NOT NULL,
+        kind TEXT NOT NULL,
+        outcome TEXT NOT NULL,
+        latency_ms REAL NOT NULL,
+        ip_hash TEXT NOT NULL
+    )
+"""
+EVENTS_INDEX:str="CREATE INDEX IF NOT EXISTS auth_events_occurred_at ON auth_events (occurred_at)"
+INSERT_EVENTS:str="INSERT INTO auth_events (occurred_at, kind, outcome, latency_ms, ip_hash) VALUES (?, ?, ?, ?, ?)"
+
+ATTEMPTS_PER_MINUTE_QUERY:str="""
+    SELECT CAST(occurred_at / 60 AS INTEGER) * 60 AS minute, kind,
+           COUNT(*) AS attempts,
+           SUM(outcome <> 'success') AS unsuccessful
+    FROM auth_events
+    WHERE occurred_at >= ?
+    GROUP BY minute, kind
+    ORDER BY minute, kind
+"""
+
+FAILURE_RATES_QUERY:str="""
+    SELECT kind,
+           COUNT(*) AS attempts,
+           SUM(outcome = 'failure') AS failures,
+           SUM(outcome = 'throttled') AS throttled,
+           SUM(outcome = 'error') AS errors,
+           ROUND(1.0 * SUM(outcome = 'failure') / COUNT(*), 4) AS failure_rate,
+           ROUND(AVG(latency_ms), 2) AS mean_latency_ms
+    FROM auth_events
+    WHERE occurred_at >= ?
+    GROUP BY kind
+    ORDER BY kind
+"""
+
+EVENTS=counter('auth_events_total', 'Auth events by pipeline stage.', ('stage',))
+
+# Client IPs are stored as truncated keyed hashes: countable and joinable, not reversible by dictionary
+_ip_key=hmac.new(configuration.secret_key.encode(), b'authentication_module.event-ip', hashlib.sha256).digest()
+
+
+def hash_ip(ip:str)->str:
+    return hmac.new(_ip_key, ip.encode(), hashlib.sha256).hexdigest()[:16]
+
+
+def outcome_for(status_code:int)->str:
+    """Classifies a response: success, failure (bad credentials or input), throttled or error."""
+    if status_code<300:
+        return 'success'
+    if status_code==429:
+        return 'throttled'
+    if status_code>=500:
+        return 'error'
+    return 'failure'
+
+
+class AuthEventLog:
+    """Bounded event queue drained by one writer thread per process."""
+
+    def __init__(self, config:dict):
+        self.config=config
+        self._queue:Optional[queue.Queue]=None
+        self._pid:Optional[int]=None
+        self._lock=threading.Lock()
+        self._tables_ready=set() # database paths whose auth_events table exists
+        self._writable:Optional[bool]=None
+        self._target:Optional[dict]=None # database() when first recording; queued events are written there
+        self._counters:Dict[str, int]={'recorded':0, 'dropped':0, 'written':0, 'failed':0}
+
+    def database(self)->Optional[dict]:
+        """sqlite_connection() keyword arguments for the analytics database, or None when it is not SQLite."""
+        # The connection's settings: the test runner repoints those, not the DATABASES setting
+        try:
+            database=connections[self.config['database']].settings_dict
+        except ConnectionDoesNotExist:
+            return None
+        if 'sqlite' not in database['ENGINE']:
+            return None
+        pragmas=(database.get('POOL_CONFIG') or {}).get('pragmas')
+        return {
+            'db_path':str(database['NAME']),
+            'min_connections':1,
+            'max_connections':2,
+            **({'pragmas':tuple(pragmas.items())} if pragmas else {}),
+        }
+
+    def writable(self)->bool:
+        """
+        Whether events are stored at all: enabled, with a SQLite analytics database. Settled on first
+        use, together with the database they go to, so events still queued when a test run restores
+        the configured database are not written into it.
+        """
+        if self._writable is None:
+            self._target=self.database() if self.config['enabled'] else None
+            self._writable=self._target is not None
+        return self._writable
+
+    def _ensure_writer(self)->queue.Queue:
+        """Starts this process's writer thread (again, after a fork)."""
+        if self._pid==os.getpid():
+            return self._queue
+        with self._lock:
+            if self._pid!=os.getpid():
+                self._queue=queue.Queue(maxsize=self.config['queue_size'])
+                threading.Thread(target=self._run, args=(self._queue,), name='auth-event-writer', daemon=True).start()
+                self._pid=os.getpid()
+        return self._queue
+
+    def record(self, kind:str, outcome:str, latency:float, ip:str)->None:
+        """Queues an event without blocking; drops it when the queue is full. A no-op without an events database."""
+        if not self.writable(): # e.g. the Postgres default: no hashing, queueing or writer thread
+            return
+        event=(time.time(), kind, outcome, round(latency*1000, 3), hash_ip(ip))
+        try:
+            self._ensure_writer().put_nowait(event)
+        except queue.Full:
+            self._counters['dropped']+=1
+            EVENTS.inc('dropped')
+            return
+        self._counters['recorded']+=1
+        EVENTS.inc('recorded')
+
+    def _run(self, events:queue.Queue)->None:
+        """Writer thread body: waits for a first event, then tops the batch up until full or the flush interval passes."""
+        while True:
+            batch=[events.get()]
+            deadline=time.monotonic()+self.config['flush_interval']
+            while len(batch)<self.config['batch_size']:
+                remaining=deadline-time.monotonic()
+                if remaining<=0:
+                    break
+                try:
+                    batch.append(events.get(timeout=remaining))
+                except queue.Empty:
+                    break
+            self._write(batch)
+            for _ in batch:
+                events.task_done()
+
+    def _ensure_table(self, conn, db_path:str)->None:
+        if db_path not in self._tables_ready:
+            conn.execute(EVENTS_TABLE)
+            conn.execute(EVENTS_INDEX)
+            self._tables_ready.add(db_path)
+
+    def _write(self, batch:List[tuple])->None:
+        database=self._target
+        try:
+            with sqlite_connection(**database) as conn:
+                self._ensure_table(conn, database['db_path'])
+                conn.execute('BEGIN')
+                try:
+                    conn.executemany(INSERT_EVENTS, batch)
+                    conn.execute('COMMIT')
+                except Exception:
+                    conn.rollback()
+                    raise
+        except Exception:
+            self._counters['failed']+=len(batch)
+            EVENTS.inc('failed', amount=len(batch))
+            return
+        self._counters['written']+=len(batch)
+        EVENTS.inc('written', amount=len(batch))
+
+    def flush(self, timeout:float=5.0)->bool:
+        """Waits until queued events are written. Returns False on timeout."""
+        events=self._queue
+        if events is None or self._pid!=os.getpid():
+            return True
+        deadline=time.monotonic()+timeout
+        while events.unfinished_tasks:
+            if time.monotonic()>=deadline:
+                return False
+            time.sleep(0.01)
+        return True
+
+    def query(self, sql:str, since:float)->Dict:
+        """Runs a rollup query over events since the given unix time."""
+        database=self.database()
+        if database is None:
+            return {'columns':[], 'data':[]}
+        with sqlite_connection(**database) as conn:
+            self._ensure_table(conn, database['db_path'])
+        return execute_sqlite_query(sql, (since,), **database)
+
+    def attempts_per_minute(self, minutes:int=60)->Dict:
+        """Attempts and unsuccessful attempts per minute and kind over the last `minutes`."""
+        return self.query(ATTEMPTS_PER_MINUTE_QUERY, time.time()-minutes*60)
+
+    def failure_rates(self, minutes:int=60)->Dict:
+        """Attempts, outcome counts, failure rate and mean latency per kind over the last `minutes`."""
+        return self.query(FAILURE_RATES_QUERY, time.time()-minutes*60)
+
+    def stats(self)->Dict[str, int]:
+        events=self._queue
+        return {**self._counters, 'queued':events.qsize() if events is not None else 0}
+
+
+event_log:AuthEventLog=AuthEventLog(EVENTS_CONFIG)
+atexit.register(event_log.flush, 2.0)
+
+
+def recorded(kind:str):
+    """Records an event for every response of the decorated view (sync or async)."""
+    def decorator(view):
+        if iscoroutinefunction(view):
+            @wraps(view)
+            async def async_wrapper(request, *args, **kwargs):
+                started=time.perf_counter()
+                response=await view(request, *args, **kwargs)
+                event_log.record(kind, outcome_for(response.status_code), time.perf_counter()-started,
+                                 admission.client_ip(request))
+                return response
+            return async_wrapper
+
+        @wraps(view)
+        def wrapper(request, *args, **kwargs):
+            started=time.perf_counter()
+            response=view(request, *args, **kwargs)
+            event_log.record(kind, outcome_for(response.status_code), time.perf_counter()-started,
+                             admission.client_ip(request))
+            return response
+        return wrapper
+    return decorator
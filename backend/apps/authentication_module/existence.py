@@ -0,0 +1,255 @@
+"""
+In-process username/email existence index.
+
+A Bloom filter over every username and email in `users` answers "definitely not present"
+without a database round trip; a bounded LRU of confirmed positives answers "present".
+Anything else falls through to the database.
+
+Each process keeps its own index: it is warmed from `users` on a background thread started by the
+first lookup (lookups fall through to the database until it is ready, so no request waits for
+the full scan), updated on local inserts, and pulls rows inserted by other processes
+(`id > last seen id`) at most once per `refresh_interval` seconds, when a negative answer is
+about to be trusted.
+"""
+
+import hashlib
+import math
+import os
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional
+from django.db import connection, DatabaseError
+from apps.authentication_module.schema import normalize_email, normalize_username
+
+
+EXISTENCE_INDEX_CONFIG={
+    'capacity':int(os.environ.get('AUTH_EXISTENCE_CAPACITY', 1_000_000)), # users expected; filter holds 2 keys per user
+    'error_rate':float(os.environ.get('AUTH_EXISTENCE_ERROR_RATE', 0.01)),
+    'positive_cache_size':int(os.environ.get('AUTH_EXISTENCE_LRU_SIZE', 10_000)),
+    'refresh_interval':float(os.environ.get('AUTH_EXISTENCE_REFRESH_INTERVAL', 1.0)),
+    'refresh_overlap':100, # re-read ids this far behind the last seen id; sequences can commit out of order
+    'fetch_size':5_000,
+}
+
+
+class BloomFilter:
+    """Fixed-size Bloom filter using double hashing over one blake2b digest."""
+    __slots__=('size', 'hash_count', 'bits', 'count')
+
+    def __init__(self, capacity:int, error_rate:float):
+        capacity=max(capacity, 1)
+        self.size=max(8, int(-capacity*math.log(error_rate)/(math.log(2)**2)))
+        self.hash_count=max(1, round(self.size/capacity*math.log(2)))
+        self.bits=bytearray((self.size+7)//8)
+        self.count=0
+
+    def _positions(self, key:str):
+        digest=hashlib.blake2b(key.encode(), digest_size=16).digest()
+        first=int.from_bytes(digest[:8], 'little')
+        second=int.from_bytes(digest[8:], 'little') | 1
+        return [(first+i*second)%self.size for i in range(self.hash_count)]
+
+    def add(self, key:str)->None:
+        for position in self._positions(key):
+            self.bits[position>>3]|=1<<(position&7)
+        self.count+=1
+
+    def __contains__(self, key:str)->bool:
+        bits=self.bits
+        return all(bits[position>>3]&(1<<(position&7)) for position in self._positions(key))
+
+    def estimated_error_rate(self)->float:
+        """False positive probability at the current fill."""
+        return (1-math.exp(-self.hash_count*self.count/self.size))**self.hash_count
+
+
+class LRUCache:
+    """Bounded least-recently-used set of keys."""
+    __slots__=('maxsize', '_keys')
+
+    def __init__(self, maxsize:int):
+        self.maxsize=maxsize
+        self._keys:OrderedDict=OrderedDict()
+
+    def add(self, key:str)->None:
+        self._keys[key]=None
+        self._keys.move_to_end(key)
+        if len(self._keys)>self.maxsize:
+            self._keys.popitem(last=False)
+
+    def __contains__(self, key:str)->bool:
+        try:
+            self._keys.move_to_end(key)
+            return True
+        except KeyError:
+            return False
+
+    def __len__(self)->int:
+        return len(self._keys)
+
+    def clear(self)->None:
+        self._keys.clear()
+
+
+def _username_key(username:str)->str:
+    return f"u:{normalize_username(username)}"
+
+
+def _email_key(email:str)->str:
+    return f"e:{normalize_email(email)}"
+
+
+class ExistenceIndex:
+    """Bloom filter + LRU membership layer in front of the users table."""
+
+    def __init__(self, capacity:int, error_rate:float, positive_cache_size:int, refresh_interval:float):
+        self._capacity=capacity
+        self._error_rate=error_rate
+        self._refresh_interval=refresh_interval
+        self._lock=threading.RLock()
+        self._filter:Optional[BloomFilter]=None
+        self._confirmed=LRUCache(positive_cache_size)
+        self._last_id=0
+        self._last_refresh=0.0
+        self._warming:Optional[int]=None # pid whose warming thread is running
+        self._next_warm=0.0
+        self._counters:Dict[str, int]={
+            'bloom_negatives':0,
+            'bloom_positives':0,
+            'lru_hits':0,
+            'lru_misses':0,
+            'false_positives':0,
+            'refreshes':0,
+            'rebuilds':0,
+        }
+
+    def _load_rows(self, bloom:BloomFilter, after_id:int)->int:
+        """Adds users rows with id > after_id to a filter. Returns the highest id seen."""
+        last_id=after_id
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT id, username, email FROM users WHERE id > %s ORDER BY id", [after_id])
+            while rows:=cursor.fetchmany(EXISTENCE_INDEX_CONFIG['fetch_size']):
+                for user_id, username, email in rows:
+                    bloom.add(_username_key(username))
+                    bloom.add(_email_key(email))
+                    last_id=max(last_id, user_id)
+        return last_id
+
+    def rebuild(self)->Dict[str, float]:
+        """Rebuilds the filter from the users table and clears the positive cache."""
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT COUNT(*) FROM users")
+            user_count=cursor.fetchone()[0]
+
+        # Two keys per user, with headroom so inserts do not degrade the error rate too soon
+        bloom=BloomFilter(2*max(self._capacity, user_count*2), self._error_rate)
+        last_id=self._load_rows(bloom, 0)
+        with self._lock:
+            self._filter=bloom
+            self._confirmed.clear()
+            self._last_id=last_id
+            self._last_refresh=time.monotonic()
+            self._counters['rebuilds']+=1
+        return self.stats()
+
+    def _ensure_warm(self)->bool:
+        """
+        Whether the filter is ready. The first call starts warming it on a background thread (again
+        after a fork, and at most once per refresh interval while the users table is unavailable);
+        until then, callers answer from the database.
+        """
+        if self._filter is not None:
+            return True
+        now=time.monotonic()
+        with self._lock:
+            if self._filter is None and self._warming!=os.getpid() and now>=self._next_warm:
+                self._warming=os.getpid()
+                self._next_warm=now+self._refresh_interval
+                threading.Thread(target=self._warm, name='existence-index-warm', daemon=True).start()
+        return self._filter is not None
+
+    def _warm(self)->None:
+        """Warming thread body."""
+        try:
+            self.rebuild()
+        except DatabaseError:
+            pass # e.g. migrations not applied yet; answer "unknown" until they are
+        finally:
+            self._warming=None
+            connection.close() # this thread's connection
+
+    def _refresh(self)->None:
+        """Pulls rows inserted elsewhere since the last refresh, at most once per refresh interval."""
+        now=time.monotonic()
+        if now-self._last_refresh<self._refresh_interval:
+            return
+        with self._lock:
+            if now-self._last_refresh<self._refresh_interval:
+                return
+            self._last_refresh=now
+            after_id=max(0, self._last_id-EXISTENCE_INDEX_CONFIG['refresh_overlap'])
+            self._last_id=max(self._last_id, self._load_rows(self._filter, after_id))
+            self._counters['refreshes']+=1
+
+    def _absent(self, key:str)->bool:
+        if key in self._filter:
+            return False
+        self._refresh()
+        return key not in self._filter
+
+    def definitely_absent(self, username:Optional[str]=None, email:Optional[str]=None)->bool:
+        """True when none of the given username/email can be in the users table. May run a refresh query."""
+        if not self._ensure_warm():
+            return False
+        keys=[key for key in (username and _username_key(username), email and _email_key(email)) if key]
+        absent=all(self._absent(key) for key in keys)
+        self._counters['bloom_negatives' if absent else 'bloom_positives']+=1
+        return absent
+
+    def confirmed(self, username:Optional[str]=None, email:Optional[str]=None)->Optional[str]:
+        """Returns 'username' or 'email' when that value is known to exist, without touching the database."""
+        for field, key in (('username', username and _username_key(username)), ('email', email and _email_key(email))):
+            if key and key in self._confirmed:
+                self._counters['lru_hits']+=1
+                return field
+        self._counters['lru_misses']+=1
+        return None
+
+    def confirm(self, username:Optional[str]=None, email:Optional[str]=None)->None:
+        """Records values the database has shown to exist."""
+        with self._lock:
+            for key in (username and _username_key(username), email and _email_key(email)):
+                if key:
+                    self._confirmed.add(key)
+                    if self._filter is not None:
+                        self._filter.add(key)
+
+    def record_false_positive(self)->None:
+        self._counters['false_positives']+=1
+
+    def add(self, username:str, email:str)->None:
+        """Records a freshly inserted user."""
+        self.confirm(username, email)
+
+    def stats(self)->Dict[str, float]:
+        """Hit/miss counters and filter sizing."""
+        bloom=self._filter
+        return {
+            **self._counters,
+            'warm':bloom is not None,
+            'keys':bloom.count if bloom else 0,
+            'bits':bloom.size if bloom else 0,
+            'hash_count':bloom.hash_count if bloom else 0,
+            'estimated_error_rate':bloom.estimated_error_rate() if bloom else 0.0,
+            'confirmed_cache_size':len(self._confirmed),
+            'last_id':self._last_id,
+        }
+
+
+existence_index:ExistenceIndex=ExistenceIndex(
+    capacity=EXISTENCE_INDEX_CONFIG['capacity'],
+    error_rate=EXISTENCE_INDEX_CONFIG['error_rate'],
+    positive_cache_size=EXISTENCE_INDEX_CONFIG['positive_cache_size'],
+    refresh_interval=EXISTENCE_INDEX_CONFIG['refresh_interval'],
+)
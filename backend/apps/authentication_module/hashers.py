@@ -0,0 +1,271 @@
+"""
+Password hashing for the authentication module.
+
+Encoded hashes are '$'-separated and lead with the algorithm name:
+    pbkdf2_sha256$<iterations>$<salt>$<hash>
+    scrypt$<n>$<r>$<p>$<salt>$<hash>
+Rows written before this module hold bare sha256 hex digests. They still verify, and are flagged
+for rehashing so login() can upgrade them transparently.
+
+Hashing runs on a bounded thread pool (hashlib's pbkdf2/scrypt release the GIL), which caps how
+many CPU-heavy hashes run at once no matter how many requests are in flight.
+"""
+
+import asyncio
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+from functools import lru_cache
+from typing import Dict, Optional
+from config.metrics import histogram
+
+
+# Hashing configuration; work factors are tunable per deployment (see `manage.py benchmark_hashers`)
+HASHER_CONFIG={
+    'algorithm':os.environ.get('AUTH_PASSWORD_HASHER', 'pbkdf2_sha256'),
+    'pbkdf2_iterations':int(os.environ.get('AUTH_PBKDF2_ITERATIONS', 600_000)),
+    'scrypt_n':int(os.environ.get('AUTH_SCRYPT_N', 2**14)),
+    'scrypt_r':int(os.environ.get('AUTH_SCRYPT_R', 8)),
+    'scrypt_p':int(os.environ.get('AUTH_SCRYPT_P', 1)),
+    'max_workers':int(os.environ.get('AUTH_HASHER_WORKERS', os.cpu_count() or 2)),
+    'bulk_workers':int(os.environ.get('AUTH_BULK_HASHER_WORKERS', max(1, (os.cpu_count() or 2)//2))),
+    'salt_bytes':16,
+}
+
+
+class PasswordHasherError(Exception):
+    """Custom exception for unknown algorithms or malformed encoded hashes."""
+    pass
+
+
+def _b64encode(raw:bytes)->str:
+    return base64.b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text:str)->bytes:
+    return base64.b64decode(text+'='*(-len(text)%4))
+
+
+class PasswordHasher:
+    """Base hasher. Subclasses set `algorithm` and implement encode/verify/must_update."""
+    algorithm:str=''
+
+    def salt(self)->str:
+        """Generates a random salt."""
+        return _b64encode(secrets.token_bytes(HASHER_CONFIG['salt_bytes']))
+
+    def encode(self, password:str, salt:str)->str:
+        raise NotImplementedError
+
+    def verify(self, password:str, encoded:str)->bool:
+        raise NotImplementedError
+
+    def must_update(self, encoded:str)->bool:
+        """Whether the encoded hash was made with outdated work factors."""
+        return False
+
+
+class PBKDF2PasswordHasher(PasswordHasher):
+    """PBKDF2-HMAC-SHA256 with a configurable iteration count."""
+    algorithm='pbkdf2_sha256'
+
+    def encode(self, password:str, salt:str, iterations:Optional[int]=None)->str:
+        iterations=iterations or HASHER_CONFIG['pbkdf2_iterations']
+        derived=hashlib.pbkdf2_hmac('sha256', password.encode(), salt.encode(), iterations)
+        return f"{self.algorithm}${iterations}${salt}${_b64encode(derived)}"
+
+    def verify(self, password:str, encoded:str)->bool:
+        _, iterations, salt, _hash=encoded.split('$', 3)
+        return hmac.compare_digest(self.encode(password, salt, int(iterations)), encoded)
+
+    def must_update(self, encoded:str)->bool:
+        return int(encoded.split('$', 2)[1])!=HASHER_CONFIG['pbkdf2_iterations']
+
+
+class ScryptPasswordHasher(PasswordHasher):
+    """scrypt with configurable n (CPU/memory cost), r (block size) and p (parallelism)."""
+    algorithm='scrypt'
+
+    def encode(self, password:str, salt:str, n:Optional[int]=None, r:Optional[int]=None, p:Optional[int]=None)->str:
+        n=n or HASHER_CONFIG['scrypt_n']
+        r=r or HASHER_CONFIG['scrypt_r']
+        p=p or HASHER_CONFIG['scrypt_p']
+        derived=hashlib.scrypt(password.encode(), salt=salt.encode(), n=n, r=r, p=p,
+                               maxmem=256*n*r*p, dklen=64) # 128*n*r is the working set; leave headroom
+        return f"{self.algorithm}${n}${r}${p}${salt}${_b64encode(derived)}"
+
+    def verify(self, password:str, encoded:str)->bool:
+        _, n, r, p, salt, _hash=encoded.split('$', 5)
+        return hmac.compare_digest(self.encode(password, salt, int(n), int(r), int(p)), encoded)
+
+    def must_update(self, encoded:str)->bool:
+        _, n, r, p, _rest=encoded.split('$', 4)
+        current=(HASHER_CONFIG['scrypt_n'], HASHER_CONFIG['scrypt_r'], HASHER_CONFIG['scrypt_p'])
+        return (int(n), int(r), int(p))!=current
+
+
+class LegacySHA256PasswordHasher(PasswordHasher):
+    """Unsalted sha256 hex digests written by the original register() view. Verify-only."""
+    algorithm='sha256'
+
+    def encode(self, password:str, salt:str='')->str:
+        return hashlib.sha256(password.encode()).hexdigest()
+
+    def verify(self, password:str, encoded:str)->bool:
+        return hmac.compare_digest(self.encode(password), encoded)
+
+    def must_update(self, encoded:str)->bool:
+        return True
+
+
+# Registered hashers by algorithm name; `register_hasher()` plugs in new ones
+HASHERS:Dict[str, PasswordHasher]={}
+
+
+def register_hasher(hasher:PasswordHasher)->PasswordHasher:
+    """Registers a hasher instance under its algorithm name."""
+    HASHERS[hasher.algorithm]=hasher
+    return hasher
+
+
+for _hasher in (PBKDF2PasswordHasher(), ScryptPasswordHasher(), LegacySHA256PasswordHasher()):
+    register_hasher(_hasher)
+
+
+def identify_hasher(encoded:str)->PasswordHasher:
+    """Finds the hasher an encoded hash was made with."""
+    if '$' not in encoded:
+        if len(encoded)==64:
+            return HASHERS[LegacySHA256PasswordHasher.algorithm]
+        raise PasswordHasherError('Unrecognised password hash format.')
+
+    algorithm=encoded.split('$', 1)[0]
+    try:
+        return HASHERS[algorithm]
+    except KeyError:
+        raise PasswordHasherError(f"Unknown password hashing algorithm: '{algorithm}'")
+
+
+def get_hasher(algorithm:Optional[str]=None)->PasswordHasher:
+    """Fetches the configured (or named) hasher."""
+    algorithm=algorithm or HASHER_CONFIG['algorithm']
+    try:
+        return HASHERS[algorithm]
+    except KeyError:
+        raise PasswordHasherError(f"Unknown password hashing algorithm: '{algorithm}'")
+
+
+# Hashing time per algorithm, for picking work factors on the deployment's own CPUs
+_stats_lock=threading.Lock()
+_hashing_stats:Dict[str, Dict[str, float]]={}
+HASH_DURATION=histogram('password_hash_duration_seconds', 'Password hashing and verification time.',
+                        ('algorithm',), (0.001, 0.01, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5))
+
+
+def _record_timing(algorithm:str, seconds:float)->None:
+    HASH_DURATION.labels(algorithm).observe(seconds)
+    with _stats_lock:
+        stats=_hashing_stats.setdefault(algorithm, {'count':0, 'total_seconds':0.0, 'max_seconds':0.0})
+        stats['count']+=1
+        stats['total_seconds']+=seconds
+        stats['max_seconds']=max(stats['max_seconds'], seconds)
+
+
+def get_hashing_stats()->Dict[str, Dict[str, float]]:
+    """Returns count, total, mean and max hashing time per algorithm."""
+    with _stats_lock:
+        return {
+            algorithm:{**stats, 'mean_seconds':stats['total_seconds']/stats['count'] if stats['count'] else 0.0}
+            for algorithm, stats in _hashing_stats.items()
+        }
+
+
+def make_password(password:str, algorithm:Optional[str]=None)->str:
+    """Hashes a password on the calling thread."""
+    hasher=get_hasher(algorithm)
+    started=time.perf_counter()
+    encoded=hasher.encode(password, hasher.salt())
+    _record_timing(hasher.algorithm, time.perf_counter()-started)
+    return encoded
+
+
+def check_password(password:str, encoded:str)->bool:
+    """Verifies a password against an encoded hash on the calling thread."""
+    try:
+        hasher=identify_hasher(encoded)
+        started=time.perf_counter()
+        valid=hasher.verify(password, encoded)
+    except (PasswordHasherError, ValueError):
+        return False
+    _record_timing(hasher.algorithm, time.perf_counter()-started)
+    return valid
+
+
+def needs_rehash(encoded:str)->bool:
+    """Whether a stored hash uses another algorithm or outdated work factors than configured."""
+    try:
+        hasher=identify_hasher(encoded)
+    except PasswordHasherError:
+        return False
+    return hasher.algorithm!=HASHER_CONFIG['algorithm'] or hasher.must_update(encoded)
+
+
+@lru_cache(maxsize=None)
+def dummy_hash(algorithm:Optional[str]=None)->str:
+    """A hash of a random secret with the configured hasher. Verifying against it costs as much as a real login."""
+    return make_password(secrets.token_urlsafe(16), algorithm or HASHER_CONFIG['algorithm'])
+
+
+@lru_cache(maxsize=1)
+def get_hashing_executor()->ThreadPoolExecutor:
+    """Fetches the bounded executor all offloaded hashing runs on."""
+    return ThreadPoolExecutor(max_workers=HASHER_CONFIG['max_workers'], thread_name_prefix='password-hasher')
+
+
+@lru_cache(maxsize=1)
+def get_bulk_hashing_executor()->ThreadPoolExecutor:
+    """
+    Executor for bulk imports, separate from (and smaller than) the one login and registration use,
+    so an import's thousands of queued hashes never wait ahead of a live request.
+    """
+    return ThreadPoolExecutor(max_workers=HASHER_CONFIG['bulk_workers'], thread_name_prefix='password-hasher-bulk')
+
+
+def hash_password(password:str)->str:
+    """Hashes a password on the hashing executor, waiting for the result."""
+    return get_hashing_executor().submit(make_password, password).result()
+
+
+def verify_password(password:str, encoded:str)->bool:
+    """Verifies a password on the hashing executor, waiting for the result."""
+    return get_hashing_executor().submit(check_password, password, encoded).result()
+
+
+async def hash_password_async(password:str)->str:
+    """Hashes a password on the hashing executor without blocking the event loop."""
+    return await asyncio.wrap_future(get_hashing_executor().submit(make_password, password))
+
+
+async def verify_password_async(password:str, encoded:str)->bool:
+    """Verifies a password on the hashing executor without blocking the event loop."""
+    return await asyncio.wrap_future(get_hashing_executor().submit(check_password, password, encoded))
+
+
+def _check_dummy(password:str)->bool:
+    check_password(password, dummy_hash())
+    return False
+
+
+def reject_password(password:str)->bool:
+    """Spends a real verification's work on the hashing executor, then returns False (unknown accounts)."""
+    return get_hashing_executor().submit(_check_dummy, password).result()
+
+
+async def reject_password_async(password:str)->bool:
+    """reject_password() without blocking the event loop."""
+    return await asyncio.wrap_future(get_hashing_executor().submit(_check_dummy, password))
@@ -0,0 +1,34 @@
+"""
+Summarises recent auth events from the analytics database.
+
+    python manage.py auth_event_rollup --minutes 60
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from apps.authentication_module.events import event_log
+
+
+class Command(BaseCommand):
+    help='Prints auth attempts per minute and failure rates per kind from the analytics database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--minutes', type=int, default=60, help='Window to summarise, in minutes.')
+
+    def handle(self, *args, **options):
+        if event_log.database() is None:
+            self.stderr.write("The 'analytics' database is not configured as SQLite; no events are recorded.")
+            return
+
+        self.stdout.write(f"{'minute':<20} {'kind':<10} {'attempts':>9} {'unsuccessful':>13}")
+        for minute, kind, attempts, unsuccessful in event_log.attempts_per_minute(options['minutes'])['data']:
+            stamp=time.strftime('%Y-%m-%d %H:%M', time.localtime(minute))
+            self.stdout.write(f"{stamp:<20} {kind:<10} {attempts:>9} {unsuccessful:>13}")
+
+        self.stdout.write('')
+        self.stdout.write(f"{'kind':<10} {'attempts':>9} {'failures':>9} {'throttled':>10} {'errors':>7} "
+                          f"{'failure rate':>13} {'mean ms':>9}")
+        for kind, attempts, failures, throttled, errors, failure_rate, mean_latency in \
+                event_log.failure_rates(options['minutes'])['data']:
+            self.stdout.write(f"{kind:<10} {attempts:>9} {failures:>9} {throttled:>10} {errors:>7} "
+                              f"{failure_rate:>13.2%} {mean_latency:>9.2f}")
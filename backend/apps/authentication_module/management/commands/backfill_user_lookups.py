@@ -0,0 +1,42 @@
+"""
+Fills the normalized username/email lookup columns (schema version 2) of rows that lack them.
+
+    python manage.py backfill_user_lookups --batch-size 5000
+    python manage.py backfill_user_lookups --check
+
+Migration 0002 already backfills; run this for rows written by processes that were still on the
+previous release while it ran, or to backfill a large table ahead of the migration's index step.
+With AUTH_USER_SHARDS set, the shard files and their username index are backfilled as well.
+AUTH_BACKFILL_PAUSE (seconds) spaces the batches out to leave room for live traffic.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.authentication_module.schema import SCHEMA_CONFIG, backfill_lookup_columns, lookup_duplicates
+from apps.authentication_module.sharding import user_shards
+
+
+class Command(BaseCommand):
+    help='Backfills normalized lookup columns in batches and reports accounts that differ only in case.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=SCHEMA_CONFIG['backfill_batch_size'],
+                            help='Rows per transaction.')
+        parser.add_argument('--check', action='store_true', help='Only report duplicates; write nothing.')
+
+    def handle(self, *args, **options):
+        if not options['check']:
+            updated=backfill_lookup_columns(
+                connection, options['batch_size'], lambda total: self.stdout.write(f"  {total} rows backfilled"))
+            self.stdout.write(f"Backfilled {updated} rows.")
+            if user_shards.enabled:
+                updated=user_shards.backfill_lookups(
+                    options['batch_size'], lambda total: self.stdout.write(f"  {total} shard rows backfilled"))
+                self.stdout.write(f"Backfilled {updated} shard rows.")
+
+        duplicates=lookup_duplicates(connection)
+        if duplicates:
+            for column, values in duplicates.items():
+                self.stderr.write(f"{column}: {', '.join(values)}")
+            raise CommandError('Accounts above differ only in case or surrounding spaces; rename or merge them.')
+        self.stdout.write(self.style.SUCCESS('Lookup columns are complete and unique.'))
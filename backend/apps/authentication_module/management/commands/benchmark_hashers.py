@@ -0,0 +1,53 @@
+"""
+Times password hashing at a range of work factors on this machine.
+
+    python manage.py benchmark_hashers --algorithm pbkdf2_sha256 --rounds 5
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from apps.authentication_module.hashers import HASHER_CONFIG, get_hasher
+
+
+# Work factors tried per algorithm, cheapest first
+WORK_FACTORS={
+    'pbkdf2_sha256':[{'iterations':iterations} for iterations in (100_000, 300_000, 600_000, 1_000_000)],
+    'scrypt':[{'n':n} for n in (2**13, 2**14, 2**15, 2**16)],
+}
+
+
+class Command(BaseCommand):
+    help='Times each password hasher work factor so it can be tuned to the available CPU budget.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--algorithm', choices=sorted(WORK_FACTORS), action='append',
+                            help='Algorithm to time (repeatable). Defaults to all.')
+        parser.add_argument('--rounds', type=int, default=3, help='Hashes per work factor.')
+        parser.add_argument('--target-ms', type=float, default=250.0,
+                            help='Per-hash latency budget used to flag the recommended work factor.')
+
+    def handle(self, *args, **options):
+        self.stdout.write(f"Configured: {HASHER_CONFIG['algorithm']} "
+                          f"with {HASHER_CONFIG['max_workers']} hashing workers")
+
+        for algorithm in options['algorithm'] or sorted(WORK_FACTORS):
+            hasher=get_hasher(algorithm)
+            recommended=None
+            for params in WORK_FACTORS[algorithm]:
+                timings=[]
+                for _ in range(options['rounds']):
+                    started=time.perf_counter()
+                    hasher.encode('benchmark-password', hasher.salt(), **params)
+                    timings.append((time.perf_counter()-started)*1000)
+
+                mean_ms=sum(timings)/len(timings)
+                if mean_ms<=options['target_ms']:
+                    recommended=params
+                factor=', '.join(f"{key}={value}" for key, value in params.items())
+                self.stdout.write(f"{algorithm:<14} {factor:<20} mean {mean_ms:8.1f} ms  "
+                                  f"max {max(timings):8.1f} ms  "
+                                  f"~{HASHER_CONFIG['max_workers']*1000/mean_ms:7.1f} hashes/s")
+
+            self.stdout.write(self.style.SUCCESS(
+                f"{algorithm}: strongest work factor within {options['target_ms']:.0f} ms: {recommended or 'none'}"
+            ))
@@ -0,0 +1,65 @@
+"""
+Prints the slow-query profile collected by server processes running with DB_PROFILER_ENABLED=true.
+
+    python manage.py query_profile --sort total --limit 20
+    python manage.py query_profile --scans
+    python manage.py query_profile --clear
+
+Processes write their profiles every DB_PROFILER_DUMP_INTERVAL seconds and at exit; this merges them.
+"""
+
+import json
+from django.core.management.base import BaseCommand
+from config.profiler import PROFILER_CONFIG, clear_profiles, load_profiles, query_profiler
+
+
+SORT_KEYS={
+    'total':lambda stats: stats['total'],
+    'max':lambda stats: stats['max'],
+    'count':lambda stats: stats['count'],
+    'mean':lambda stats: stats['total']/stats['count'] if stats['count'] else 0.0,
+}
+
+
+class Command(BaseCommand):
+    help='Shows statements aggregated by fingerprint, with captured plans and flagged full table scans.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--sort', choices=sorted(SORT_KEYS), default='total', help='Ordering (default: total time).')
+        parser.add_argument('--limit', type=int, default=20, help='Fingerprints to show.')
+        parser.add_argument('--scans', action='store_true', help='Only statements whose plan scans a whole table.')
+        parser.add_argument('--json', action='store_true', help='Print the merged profile as JSON.')
+        parser.add_argument('--clear', action='store_true', help='Delete the collected profiles.')
+
+    def handle(self, *args, **options):
+        if options['clear']:
+            self.stdout.write(f"Removed {clear_profiles(PROFILER_CONFIG['directory'])} profiles.")
+            return
+
+        query_profiler.dump() # includes anything profiled in this process
+        profile=load_profiles(PROFILER_CONFIG['directory'])
+        if not profile:
+            self.stderr.write(f"No profiles in {PROFILER_CONFIG['directory']}; "
+                              'run the server with DB_PROFILER_ENABLED=true first.')
+            return
+
+        statements=sorted(profile.items(), key=lambda item: SORT_KEYS[options['sort']](item[1]), reverse=True)
+        if options['scans']:
+            statements=[(key, stats) for key, stats in statements if stats['full_scans']]
+        statements=statements[:options['limit']]
+        if options['json']:
+            self.stdout.write(json.dumps(dict(statements), indent=2))
+            return
+
+        self.stdout.write(f"Slow threshold {PROFILER_CONFIG['slow_threshold']*1000:.1f} ms; "
+                          f"{len(profile)} fingerprints, sorted by {options['sort']}.")
+        for key, stats in statements:
+            mean=stats['total']/stats['count'] if stats['count'] else 0.0
+            self.stdout.write('')
+            self.stdout.write(self.style.SQL_KEYWORD(key))
+            self.stdout.write(f"  count {stats['count']}  total {stats['total']*1000:.1f} ms  mean {mean*1000:.2f} ms  "
+                              f"max {stats['max']*1000:.2f} ms  slow {stats['slow']}  [{', '.join(stats['sources'])}]")
+            for line in stats['plan'] or []:
+                self.stdout.write(f"    {line}")
+            for scan in stats['full_scans']:
+                self.stdout.write(self.style.WARNING(f"  full table scan: {scan}"))
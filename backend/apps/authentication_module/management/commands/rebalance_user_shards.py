@@ -0,0 +1,46 @@
+"""
+Moves users rows between shard files after the shard count (AUTH_USER_SHARDS) changes.
+
+    AUTH_USER_SHARDS=8 AUTH_USER_SHARDS_PREVIOUS=4 python manage.py rebalance_user_shards
+    AUTH_USER_SHARDS=4 python manage.py rebalance_user_shards --import-default
+
+Serve with AUTH_USER_SHARDS_PREVIOUS set to the old count until the run finishes, so rows that
+have not moved yet are still found; unset it afterwards. An interrupted run can be repeated.
+--import-default copies the users table of the default database into the shards, keeping ids.
+"""
+
+from django.core.management.base import BaseCommand, CommandError
+from django.db import connection
+from apps.authentication_module.sharding import SHARDING_CONFIG, user_shards
+
+
+class Command(BaseCommand):
+    help='Moves users rows to their shard for the current AUTH_USER_SHARDS, or imports them from the default database.'
+
+    def add_arguments(self, parser):
+        parser.add_argument('--from', dest='source_shards', type=int, default=SHARDING_CONFIG['previous_shards'],
+                            help='Shard count the rows were written with (default: AUTH_USER_SHARDS_PREVIOUS).')
+        parser.add_argument('--import-default', action='store_true',
+                            help='Copy users from the default database into the shards instead.')
+
+    def handle(self, *args, **options):
+        if not user_shards.enabled:
+            raise CommandError('Set AUTH_USER_SHARDS to the number of shards first.')
+
+        if options['import_default']:
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id, username, email, password FROM users ORDER BY id")
+                inserted, conflicts=user_shards.import_rows(iter(cursor.fetchone, None))
+            self.stdout.write(f"Imported {inserted} users ({conflicts} conflicting rows skipped).")
+        else:
+            if options['source_shards']<1:
+                raise CommandError('Pass --from (or set AUTH_USER_SHARDS_PREVIOUS) to the previous shard count.')
+            moved=user_shards.rebalance(options['source_shards'])
+            for shard, count in moved.items():
+                self.stdout.write(f"shard {shard:>3}: moved {count} rows out")
+            self.stdout.write(f"Moved {sum(moved.values())} rows from {options['source_shards']} "
+                              f"to {SHARDING_CONFIG['shards']} shards.")
+
+        for shard, count in user_shards.count().items():
+            self.stdout.write(f"shard {shard:>3}: {count} users")
+        self.stdout.write(self.style.SUCCESS('Shards are balanced for the current layout.'))
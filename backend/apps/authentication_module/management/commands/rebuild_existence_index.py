@@ -0,0 +1,31 @@
+"""
+Rebuilds the username/email existence index from the users table and reports its sizing.
+
+    python manage.py rebuild_existence_index
+
+Offline only: the index lives in each server process's memory, and this command rebuilds a
+copy in its own process, which is useful to check fill and error rate before adjusting
+AUTH_EXISTENCE_CAPACITY / AUTH_EXISTENCE_ERROR_RATE. Running servers are not signalled: they
+warm their own index after their first lookup, pull new rows periodically, and pick up new
+settings (or drop deleted users) only when restarted.
+"""
+
+import time
+from django.core.management.base import BaseCommand
+from apps.authentication_module.existence import existence_index
+
+
+class Command(BaseCommand):
+    help='Rebuilds a copy of the username/email existence index and prints its statistics (servers are not affected).'
+
+    def handle(self, *args, **options):
+        started=time.perf_counter()
+        stats=existence_index.rebuild()
+        elapsed=time.perf_counter()-started
+
+        self.stdout.write(f"Indexed {stats['keys']} keys (last user id {stats['last_id']}) in {elapsed:.2f}s")
+        self.stdout.write(f"Filter: {stats['bits']} bits ({stats['bits']//8//1024} KiB), "
+                          f"{stats['hash_count']} hashes, "
+                          f"estimated false positive rate {stats['estimated_error_rate']:.4%}")
+        self.stdout.write(self.style.SUCCESS('Existence index rebuilt.'))
+        self.stdout.write('Running server processes keep their own index; restart them to rebuild theirs.')
@@ -0,0 +1,16 @@
+from django.utils.deprecation import MiddlewareMixin
+from apps.authentication_module.tokens import TokenError, token_from_request, token_verifier
+
+
+class SessionTokenMiddleware(MiddlewareMixin):
+    """Sets `request.user_id` from a signed session token (None when absent or invalid). No database access."""
+
+    def process_request(self, request)->None:
+        request.user_id=None
+        token=token_from_request(request)
+        if not token:
+            return
+        try:
+            request.user_id=token_verifier.verify(token)
+        except TokenError:
+            pass
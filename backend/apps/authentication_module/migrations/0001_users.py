@@ -0,0 +1,46 @@
+"""
+Creates the `users` table once, ahead of serving requests, instead of on every registration.
+`IF NOT EXISTS` keeps databases where the table was created ad hoc by the old register() view intact.
+"""
+
+from django.db import migrations
+
+
+USERS_TABLE:dict={
+    'postgresql':"""
+        CREATE TABLE IF NOT EXISTS users (
+            id SERIAL PRIMARY KEY,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """,
+    # SERIAL has no meaning in SQLite; INTEGER PRIMARY KEY aliases the rowid
+    'sqlite':"""
+        CREATE TABLE IF NOT EXISTS users (
+            id INTEGER PRIMARY KEY AUTOINCREMENT,
+            username TEXT UNIQUE NOT NULL,
+            email TEXT UNIQUE NOT NULL,
+            password TEXT NOT NULL
+        )
+    """,
+}
+
+
+def create_users_table(apps, schema_editor)->None:
+    """Creates the users table using the connection vendor's DDL."""
+    vendor=schema_editor.connection.vendor
+    schema_editor.execute(USERS_TABLE.get(vendor, USERS_TABLE['postgresql']))
+
+
+def drop_users_table(apps, schema_editor)->None:
+    """Drops the users table."""
+    schema_editor.execute('DROP TABLE IF EXISTS users')
+
+
+class Migration(migrations.Migration):
+    initial=True
+    dependencies=[]
+    operations=[
+        migrations.RunPython(create_users_table, drop_users_table),
+    ]
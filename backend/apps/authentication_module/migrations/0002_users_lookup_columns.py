@@ -0,0 +1,36 @@
+"""
+Schema version 2: normalized username/email lookup columns with unique and covering indexes.
+
+Non-atomic so that it can run against a live table: each backfill batch commits on its own and
+Postgres builds the indexes CONCURRENTLY. If it stops part way (e.g. on accounts that differ only
+in case), fix the cause and run migrate again; every step is idempotent.
+"""
+
+from django.db import migrations
+from apps.authentication_module import schema
+
+
+def add_lookup_columns(apps, schema_editor)->None:
+    schema.add_lookup_columns(schema_editor.connection)
+
+
+def backfill_lookup_columns(apps, schema_editor)->None:
+    schema.backfill_lookup_columns(schema_editor.connection)
+
+
+def create_lookup_indexes(apps, schema_editor)->None:
+    schema.create_lookup_indexes(schema_editor.connection)
+
+
+def drop_lookup_columns(apps, schema_editor)->None:
+    schema.drop_lookup_columns(schema_editor.connection)
+
+
+class Migration(migrations.Migration):
+    atomic=False
+    dependencies=[('authentication_module', '0001_users')]
+    operations=[
+        migrations.RunPython(add_lookup_columns, drop_lookup_columns),
+        migrations.RunPython(backfill_lookup_columns, migrations.RunPython.noop),
+        migrations.RunPython(create_lookup_indexes, migrations.RunPython.noop),
+    ]
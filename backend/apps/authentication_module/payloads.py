@@ -0,0 +1,197 @@
+"""
+Request-body decoding for the auth endpoints.
+
+    values, error_response=parse_payload(request, REGISTRATION_PAYLOAD)
+
+A `PayloadSchema` is compiled once, at import: its fields become (name, max length, matcher, message)
+tuples checked in one pass over the decoded object. Decoding never reads more than the schema's
+`max_body_bytes` (+1 to detect overflow): a declared Content-Length above the cap is refused
+without reading, so a hostile body costs at most one small read. That holds under WSGI, where the
+view reads from the socket. Django's ASGI handler spools the whole body before any view runs, so
+config.asgi wraps the application in `BodyLimitMiddleware`, which applies the same caps (413) while
+the body is still arriving. The capped bytes are decoded as
+strict UTF-8 in one step; json.loads(bytes) would decode them to str internally as well, only
+slower (encoding detection plus a surrogatepass decode). JSON `\\ud800`-style escapes still yield
+lone surrogates, which neither hashing nor the database can encode, so fields holding one are
+invalid. Every check runs before the view does any hashing or database work.
+"""
+
+import json
+import os
+import re
+from typing import Callable, Dict, Optional, Sequence, Tuple
+from django.http import HttpResponseBadRequest, JsonResponse
+
+
+PAYLOAD_CONFIG={
+    'max_register_bytes':int(os.environ.get('AUTH_MAX_REGISTER_BYTES', 4_096)),
+    'max_login_bytes':int(os.environ.get('AUTH_MAX_LOGIN_BYTES', 2_048)),
+    'max_username_length':150,
+    'max_email_length':254,
+    'max_password_length':1_024, # bounds hashing work per request
+}
+
+EMAIL_SHAPE=re.compile(r'[^@\s]{1,64}@[^@\s.]+(?:\.[^@\s.]+)+')
+
+
+def encodable(value:str)->bool:
+    """False for strings holding lone surrogates, which have no UTF-8 encoding."""
+    if value.isascii():
+        return True
+    try:
+        value.encode('utf-8')
+    except UnicodeEncodeError:
+        return False
+    return True
+
+
+class PayloadError(Exception):
+    """Custom exception for request bodies that are too large, undecodable or fail their schema."""
+    def __init__(self, message:str, status:int=400):
+        super().__init__(message)
+        self.message=message
+        self.status=status
+
+
+class Field:
+    """One expected top-level string field."""
+    __slots__=('name', 'max_length', 'matcher', 'invalid_message')
+
+    def __init__(self, name:str, max_length:int, pattern:Optional[re.Pattern]=None, invalid_message:Optional[str]=None):
+        self.name=name
+        self.max_length=max_length
+        self.matcher:Optional[Callable]=pattern.fullmatch if pattern is not None else None
+        self.invalid_message=invalid_message or f"Invalid {name}"
+
+
+class PayloadSchema:
+    """Required string fields of a JSON object body, with the endpoint's size cap and error messages."""
+
+    def __init__(self, fields:Sequence[Field], max_body_bytes:int, invalid_json_message:str='INVALID JSON',
+                 missing_message:str="Missing fields: {fields}."):
+        self.max_body_bytes=max_body_bytes
+        self.invalid_json_message=invalid_json_message
+        self.missing_message=missing_message
+        self._checks:Tuple[tuple, ...]=tuple(
+            (field.name, field.max_length, field.matcher, field.invalid_message) for field in fields)
+
+    def read(self, request)->bytes:
+        """Reads at most max_body_bytes of the body. Raises PayloadError (413) beyond that."""
+        try:
+            declared=int(request.META.get('CONTENT_LENGTH') or 0)
+        except ValueError:
+            declared=0
+        if declared>self.max_body_bytes:
+            raise PayloadError('Request body too large', 413)
+        body=request.read(self.max_body_bytes+1) # also bounds bodies sent without a Content-Length
+        if len(body)>self.max_body_bytes:
+            raise PayloadError('Request body too large', 413)
+        return body
+
+    def decode(self, request)->tuple:
+        """Returns the fields' values in schema order. Raises PayloadError."""
+        try:
+            data=json.loads(self.read(request).decode('utf-8'))
+        except ValueError: # JSONDecodeError and UnicodeDecodeError
+            raise PayloadError(self.invalid_json_message)
+        return self.validate(data)
+
+    def validate(self, data)->tuple:
+        """Checks an already decoded object (e.g. one bulk import record). Returns the fields' values. Raises PayloadError."""
+        if type(data) is not dict:
+            raise PayloadError(self.invalid_json_message)
+
+        values=[]
+        missing=[]
+        invalid=None
+        for name, max_length, matcher, invalid_message in self._checks:
+            value=data.get(name)
+            if not value:
+                missing.append(name)
+            elif invalid is None and (type(value) is not str or len(value)>max_length or not encodable(value)
+                                      or (matcher is not None and matcher(value) is None)):
+                invalid=invalid_message
+            values.append(value)
+        if missing:
+            raise PayloadError(self.missing_message.format(fields=', '.join(missing)))
+        if invalid is not None:
+            raise PayloadError(invalid)
+        return tuple(values)
+
+
+def parse_payload(request, schema:PayloadSchema):
+    """Decodes a POST body against a schema. Returns (values, None), or (None, error response)."""
+    if request.method!='POST':
+        return None, HttpResponseBadRequest("REQUEST FAILED: Expected 'POST' request.")
+    try:
+        return schema.decode(request), None
+    except PayloadError as exc:
+        return None, JsonResponse({'error':exc.message}, status=exc.status)
+
+
+# Also the rules for bulk-imported users (bulk.py)
+REGISTRATION_FIELDS:Tuple[Field, ...]=(
+    Field('username', PAYLOAD_CONFIG['max_username_length']),
+    Field('email', PAYLOAD_CONFIG['max_email_length'], EMAIL_SHAPE),
+    Field('password', PAYLOAD_CONFIG['max_password_length']),
+)
+
+REGISTRATION_PAYLOAD:PayloadSchema=PayloadSchema(REGISTRATION_FIELDS, PAYLOAD_CONFIG['max_register_bytes'])
+
+# Login does not check the email's shape: accounts registered before it was enforced must still sign in
+LOGIN_PAYLOAD:PayloadSchema=PayloadSchema(
+    (
+        Field('email', PAYLOAD_CONFIG['max_email_length']),
+        Field('password', PAYLOAD_CONFIG['max_password_length']),
+    ),
+    PAYLOAD_CONFIG['max_login_bytes'],
+    invalid_json_message='INVALID JSON FORMAT!',
+    missing_message='Some fields are required but missing',
+)
+
+
+class BodyLimitMiddleware:
+    """
+    ASGI middleware capping request bodies per path, ahead of Django's handler (which would spool
+    them whole). Refuses a declared Content-Length above the cap without reading, and stops reading
+    once the cap is exceeded; accepted bodies are replayed to the application as one message.
+    """
+
+    def __init__(self, app, limits:Dict[str, int]):
+        self.app=app
+        self.limits=limits
+
+    async def __call__(self, scope, receive, send):
+        limit=self.limits.get(scope['path']) if scope['type']=='http' else None
+        if limit is None:
+            return await self.app(scope, receive, send)
+
+        declared=dict(scope['headers']).get(b'content-length', b'0')
+        if declared.isdigit() and int(declared)>limit:
+            return await self._refuse(send)
+        body=bytearray()
+        while True:
+            message=await receive()
+            if message['type']!='http.request': # http.disconnect: let the application see it
+                return await self.app(scope, self._replay(message, receive), send)
+            body+=message.get('body', b'')
+            if len(body)>limit:
+                return await self._refuse(send)
+            if not message.get('more_body', False):
+                break
+        return await self.app(scope, self._replay({'type':'http.request', 'body':bytes(body), 'more_body':False}, receive), send)
+
+    @staticmethod
+    def _replay(first:dict, receive):
+        pending=[first]
+
+        async def replayed():
+            return pending.pop() if pending else await receive()
+        return replayed
+
+    @staticmethod
+    async def _refuse(send)->None:
+        content=json.dumps({'error':'Request body too large'}).encode()
+        await send({'type':'http.response.start', 'status':413, 'headers':[
+            (b'content-type', b'application/json'), (b'content-length', str(len(content)).encode())]})
+        await send({'type':'http.response.body', 'body':content})
@@ -0,0 +1,160 @@
+"""
+Versioned `users` schema. Migrations apply these in order; the views and bulk import query the
+columns and indexes of the latest version.
+
+    1   users (id, username, email, password), unique username and email as entered; created by
+        migration 0001_users, which keeps its own DDL as shipped
+    2   username_normalized / email_normalized lookup columns (see normalize_username/normalize_email),
+        unique across case and surrounding whitespace, with a covering index for the login lookup:
+        `WHERE email_normalized = ?` reads (id, password) from the index alone
+
+Versions are append-only: a shipped version is never edited, a new one is added instead.
+
+Version 2 is applied to a live table in steps: the nullable columns are added (no table rewrite),
+rows are backfilled in short batched transactions, then the unique indexes are built (CONCURRENTLY on
+Postgres). Rows written by processes still running the previous release are caught by a final pass,
+and `manage.py backfill_user_lookups` repeats it on demand.
+"""
+
+import os
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from django.db import transaction
+
+
+SCHEMA_VERSION:int=2
+
+SCHEMA_CONFIG={
+    'backfill_batch_size':int(os.environ.get('AUTH_BACKFILL_BATCH_SIZE', 1_000)),
+    'backfill_pause':float(os.environ.get('AUTH_BACKFILL_PAUSE', 0.0)), # seconds between batches, to yield to live writers
+    'reported_duplicates':10,
+}
+
+LOOKUP_COLUMNS:Tuple[str, ...]=('username_normalized', 'email_normalized')
+
+# Index names keep the '_<field>_' infix that views.conflicting_field() reads off constraint violations
+LOOKUP_INDEXES:Dict[str, List[Tuple[str, str]]]={
+    'postgresql':[
+        ('users_username_normalized_key',
+         "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_username_normalized_key ON users (username_normalized)"),
+        ('users_email_normalized_key',
+         "CREATE UNIQUE INDEX CONCURRENTLY IF NOT EXISTS users_email_normalized_key ON users (email_normalized) "
+         "INCLUDE (id, password)"),
+    ],
+    # No INCLUDE in SQLite: the covering index carries password in its key (the rowid id is in every index)
+    'sqlite':[
+        ('users_username_normalized_key',
+         "CREATE UNIQUE INDEX IF NOT EXISTS users_username_normalized_key ON users (username_normalized)"),
+        ('users_email_normalized_key',
+         "CREATE UNIQUE INDEX IF NOT EXISTS users_email_normalized_key ON users (email_normalized)"),
+        ('users_email_login',
+         "CREATE INDEX IF NOT EXISTS users_email_login ON users (email_normalized, password)"),
+    ],
+}
+
+# Login lookup, (id, password) by email read from an index alone. SQLite's planner always prefers
+# the unique index for an equality match, so the covering one is named explicitly.
+LOGIN_LOOKUP:Dict[str, str]={
+    'postgresql':"SELECT id, password FROM users WHERE email_normalized = %s",
+    'sqlite':"SELECT id, password FROM users INDEXED BY users_email_login WHERE email_normalized = %s",
+}
+
+BACKFILL_BATCH:str="""
+    SELECT id, username, email FROM users
+    WHERE id > %s AND (username_normalized IS NULL OR email_normalized IS NULL)
+    ORDER BY id LIMIT %s
+"""
+BACKFILL_UPDATE:str="UPDATE users SET username_normalized = %s, email_normalized = %s WHERE id = %s"
+
+
+class SchemaError(Exception):
+    """The users table cannot be brought to the requested version as it stands."""
+
+
+def normalize_username(username:str)->str:
+    return str(username).strip().lower()
+
+
+def normalize_email(email:str)->str:
+    return str(email).strip().lower()
+
+
+def _vendor(connection)->str:
+    return connection.vendor if connection.vendor in LOOKUP_INDEXES else 'postgresql'
+
+
+def add_lookup_columns(connection)->None:
+    """Version 2, step 1: nullable columns, so neither SQLite nor Postgres rewrites the table. Idempotent."""
+    with connection.cursor() as cursor:
+        existing={column.name for column in connection.introspection.get_table_description(cursor, 'users')}
+        for column in LOOKUP_COLUMNS:
+            if column not in existing:
+                cursor.execute(f"ALTER TABLE users ADD COLUMN {column} TEXT")
+
+
+def backfill_lookup_columns(connection, batch_size:Optional[int]=None,
+                            on_batch:Optional[Callable[[int], None]]=None)->int:
+    """
+    Version 2, step 2: fills the lookup columns of rows that lack them, in id order, one short
+    transaction per batch so concurrent registrations and logins keep going.
+    Args:
+        on_batch: Called with the running total of updated rows after every batch
+    Returns:
+        Rows updated
+    """
+    batch_size=batch_size or SCHEMA_CONFIG['backfill_batch_size']
+    updated=last_id=0
+    while True:
+        with transaction.atomic(using=connection.alias), connection.cursor() as cursor:
+            cursor.execute(BACKFILL_BATCH, [last_id, batch_size])
+            rows=cursor.fetchall()
+            if not rows:
+                return updated
+            cursor.executemany(BACKFILL_UPDATE, [
+                (normalize_username(username), normalize_email(email), user_id) for user_id, username, email in rows
+            ])
+        last_id=rows[-1][0]
+        updated+=len(rows)
+        if on_batch is not None:
+            on_batch(updated)
+        if SCHEMA_CONFIG['backfill_pause']:
+            time.sleep(SCHEMA_CONFIG['backfill_pause'])
+
+
+def lookup_duplicates(connection)->Dict[str, List[str]]:
+    """Normalized usernames/emails held by more than one row; these block the unique indexes."""
+    duplicates={}
+    with connection.cursor() as cursor:
+        for column in LOOKUP_COLUMNS:
+            cursor.execute(f"SELECT {column} FROM users WHERE {column} IS NOT NULL "
+                           f"GROUP BY {column} HAVING COUNT(*) > 1 LIMIT %s", [SCHEMA_CONFIG['reported_duplicates']])
+            values=[row[0] for row in cursor.fetchall()]
+            if values:
+                duplicates[column]=values
+    return duplicates
+
+
+def create_lookup_indexes(connection)->None:
+    """
+    Version 2, step 3: backfills rows written meanwhile, then builds the unique and covering indexes.
+    Raises SchemaError, leaving the columns in place, when existing accounts differ only in case.
+    """
+    backfill_lookup_columns(connection)
+    duplicates=lookup_duplicates(connection)
+    if duplicates:
+        listed='; '.join(f"{column}: {', '.join(values)}" for column, values in duplicates.items())
+        raise SchemaError(f"Accounts differ only in case or surrounding spaces ({listed}). "
+                          'Rename or merge them, then run migrate again.')
+    with connection.cursor() as cursor:
+        for _name, statement in LOOKUP_INDEXES[_vendor(connection)]:
+            cursor.execute(statement)
+
+
+def drop_lookup_columns(connection)->None:
+    """Reverts version 2."""
+    with connection.cursor() as cursor:
+        for name, _statement in reversed(LOOKUP_INDEXES[_vendor(connection)]):
+            cursor.execute(f"DROP INDEX IF EXISTS {name}")
+        for column in reversed(LOOKUP_COLUMNS):
+            cursor.execute(f"ALTER TABLE users DROP COLUMN IF EXISTS {column}"
+                           if connection.vendor=='postgresql' else f"ALTER TABLE users DROP COLUMN {column}")
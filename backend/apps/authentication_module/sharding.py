@@ -0,0 +1,480 @@
+"""
+Hash-sharded user storage.
+
+With AUTH_USER_SHARDS=N (N>0) `users` rows live in N SQLite files instead of the default database.
+A row's shard is a stable hash of its normalized email (jump consistent hash: going from n to n+1
+shards moves only ~1/(n+1) of the rows), so an email can only ever collide within one shard.
+A small index database holds (id, username, email) for every user: it allocates the global user
+ids and enforces username uniqueness across shards.
+
+Registration reserves the username and id in the index, then inserts into the email's shard,
+releasing the reservation when the email turns out to be taken. Each shard has its own pool and
+write lock, so registrations that land on different shards commit in parallel.
+
+Lookups go through normalized columns, as in the default database (schema version 2): shards match
+`email_normalized`, the index `username_normalized`, each unique. Shard files written before those
+columns existed are upgraded on first use: columns added, rows backfilled in short batches, then the
+unique indexes built; PRAGMA user_version records the shard schema version.
+
+Changing N: keep the old count in AUTH_USER_SHARDS_PREVIOUS while `manage.py rebalance_user_shards`
+moves rows; until then lookups and duplicate checks also consult the previous layout's shard.
+"""
+
+import hashlib
+import os
+import sqlite3
+import threading
+import time
+from collections import defaultdict
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from typing import Callable, Dict, Iterable, List, Optional, Tuple
+from config.snapshot import configuration
+from config.sqlconfig import shared_memory_uri, sqlite_connection
+from apps.authentication_module.schema import SCHEMA_CONFIG, SchemaError, normalize_email, normalize_username
+
+
+SHARDING_CONFIG={
+    'shards':int(os.environ.get('AUTH_USER_SHARDS', 0)), # 0 keeps users in the default database
+    'previous_shards':int(os.environ.get('AUTH_USER_SHARDS_PREVIOUS', 0)), # set while rebalancing
+    'directory':os.environ.get('AUTH_USER_SHARD_DIR', str(configuration.base_dir/'shards')), # or ':memory:'
+    'max_connections':int(os.environ.get('AUTH_USER_SHARD_CONNECTIONS', 4)), # per shard
+    'fan_out_workers':int(os.environ.get('AUTH_USER_SHARD_WORKERS', 8)),
+    'move_batch_size':1_000,
+}
+
+SHARD_SCHEMA_VERSION:int=2 # 1: values as entered only; 2: normalized lookup columns
+
+# Usernames are unique through the index; emails through their shard
+SHARD_SCHEMA:str="""
+    CREATE TABLE IF NOT EXISTS users (
+        id INTEGER PRIMARY KEY,
+        username TEXT NOT NULL,
+        email TEXT UNIQUE NOT NULL,
+        password TEXT NOT NULL,
+        email_normalized TEXT
+    )
+"""
+INDEX_SCHEMA:str="""
+    CREATE TABLE IF NOT EXISTS user_index (
+        id INTEGER PRIMARY KEY AUTOINCREMENT,
+        username TEXT UNIQUE NOT NULL,
+        email TEXT NOT NULL,
+        username_normalized TEXT
+    )
+"""
+
+# table -> (lookup column, source column, normalizer) and the unique index over the lookup column
+LOOKUP_COLUMNS:Dict[str, Tuple[str, str, Callable[[str], str]]]={
+    'users':('email_normalized', 'email', normalize_email),
+    'user_index':('username_normalized', 'username', normalize_username),
+}
+LOOKUP_INDEXES:Dict[str, str]={
+    'users':"CREATE UNIQUE INDEX IF NOT EXISTS users_email_normalized_key ON users (email_normalized)",
+    'user_index':"CREATE UNIQUE INDEX IF NOT EXISTS user_index_username_normalized_key ON user_index (username_normalized)",
+}
+
+# (key, username, email, password, user id or None to allocate one); key is echoed back, e.g. a line number
+ShardRow=Tuple[object, str, str, str, Optional[int]]
+
+
+def jump_hash(key:int, buckets:int)->int:
+    """Jump consistent hash (Lamping & Veach): maps a 64-bit key to one of `buckets`."""
+    bucket, candidate=-1, 0
+    while candidate<buckets:
+        bucket=candidate
+        key=(key*2862933555777941757+1)&0xFFFFFFFFFFFFFFFF
+        candidate=int((bucket+1)*((1<<31)/((key>>33)+1)))
+    return bucket
+
+
+def shard_for(email:str, shards:int)->int:
+    """The shard holding an email's row in a layout of `shards` files."""
+    digest=hashlib.blake2b(normalize_email(email).encode(), digest_size=8).digest()
+    return jump_hash(int.from_bytes(digest, 'little'), shards)
+
+
+class UserShards:
+    """Routes users rows to their shard, keeps the username index and fans reads out."""
+
+    def __init__(self, config:dict):
+        self.config=config
+        self._ready=set() # databases whose schema exists, per process
+        self._lock=threading.Lock()
+        self._executor:Optional[ThreadPoolExecutor]=None
+        self._pid:Optional[int]=None
+
+    @property
+    def enabled(self)->bool:
+        return self.config['shards']>0
+
+    def _database(self, name:str)->str:
+        if self.config['directory']==':memory:':
+            return shared_memory_uri(f"users_{name}")
+        os.makedirs(self.config['directory'], exist_ok=True)
+        return os.path.join(self.config['directory'], f"users-{name}.sqlite3")
+
+    def shard_path(self, shard:int)->str:
+        return self._database(f"{shard:03d}")
+
+    def index_path(self)->str:
+        return self._database('index')
+
+    @contextmanager
+    def _connect(self, db_path:str, schema:str, table:str):
+        """Pooled connection to one shard or the index, creating or upgrading its table on first use."""
+        with sqlite_connection(db_path, min_connections=1, max_connections=self.config['max_connections'],
+                               profile='read_heavy') as conn:
+            if db_path not in self._ready:
+                conn.execute(schema)
+                if conn.execute('PRAGMA user_version').fetchone()[0]<SHARD_SCHEMA_VERSION:
+                    self._upgrade(conn, table)
+                self._ready.add(db_path)
+            yield conn
+
+    def shard(self, shard:int):
+        return self._connect(self.shard_path(shard), SHARD_SCHEMA, 'users')
+
+    def index(self):
+        return self._connect(self.index_path(), INDEX_SCHEMA, 'user_index')
+
+    def _upgrade(self, conn, table:str)->None:
+        """
+        Brings a database written before the lookup columns to SHARD_SCHEMA_VERSION. Each step is
+        idempotent, so processes upgrading the same file concurrently do not clash.
+        Raises SchemaError when existing rows differ only in case or surrounding spaces.
+        """
+        column=LOOKUP_COLUMNS[table][0]
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            if column not in {row[1] for row in conn.execute(f"PRAGMA table_info({table})")}:
+                conn.execute(f"ALTER TABLE {table} ADD COLUMN {column} TEXT")
+            conn.execute('COMMIT')
+        except BaseException:
+            conn.rollback()
+            raise
+
+        self._backfill(conn, table)
+        conn.execute('BEGIN IMMEDIATE')
+        try:
+            self._backfill_batch(conn, table, 0, None) # rows written meanwhile, now under the write lock
+            conn.execute(LOOKUP_INDEXES[table])
+            conn.execute(f"PRAGMA user_version = {SHARD_SCHEMA_VERSION}")
+            conn.execute('COMMIT')
+        except sqlite3.IntegrityError as exc:
+            conn.rollback()
+            raise SchemaError(f"Rows of {table} differ only in case or surrounding spaces in {column} ({exc}). "
+                              'Rename or merge those accounts, then retry.') from exc
+        except BaseException:
+            conn.rollback()
+            raise
+
+    @staticmethod
+    def _backfill_batch(conn, table:str, last_id:int, batch_size:Optional[int])->List[tuple]:
+        """Fills the lookup column of up to batch_size rows (all, for None) after last_id, in the open transaction."""
+        column, source, normalize=LOOKUP_COLUMNS[table]
+        rows=conn.execute(f"SELECT id, {source} FROM {table} WHERE id > ? AND {column} IS NULL ORDER BY id LIMIT ?",
+                          (last_id, -1 if batch_size is None else batch_size)).fetchall()
+        conn.executemany(f"UPDATE {table} SET {column} = ? WHERE id = ?",
+                         [(normalize(value), row_id) for row_id, value in rows])
+        return rows
+
+    def _backfill(self, conn, table:str, batch_size:Optional[int]=None,
+                  on_batch:Optional[Callable[[int], None]]=None)->int:
+        """Fills missing lookup values in id order, one short transaction per batch. Returns rows updated."""
+        batch_size=batch_size or SCHEMA_CONFIG['backfill_batch_size']
+        updated=last_id=0
+        while True:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                rows=self._backfill_batch(conn, table, last_id, batch_size)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.rollback()
+                raise
+            if not rows:
+                return updated
+            last_id=rows[-1][0]
+            updated+=len(rows)
+            if on_batch is not None:
+                on_batch(updated)
+            if SCHEMA_CONFIG['backfill_pause']:
+                time.sleep(SCHEMA_CONFIG['backfill_pause'])
+
+    def backfill_lookups(self, batch_size:Optional[int]=None, on_batch:Optional[Callable[[int], None]]=None)->int:
+        """
+        Fills lookup values missing from the index and every shard, e.g. rows written by processes still
+        on the previous release after the upgrade. Returns rows updated.
+        """
+        updated=0
+
+        def report(total:int)->None:
+            if on_batch is not None:
+                on_batch(updated+total)
+
+        with self.index() as conn:
+            updated+=self._backfill(conn, 'user_index', batch_size, report)
+        for shard in self.all_shards():
+            with self.shard(shard) as conn:
+                updated+=self._backfill(conn, 'users', batch_size, report)
+        return updated
+
+    def locations(self, email:str)->List[int]:
+        """Shards that may hold an email: its shard, plus its previous one while rebalancing."""
+        current=shard_for(email, self.config['shards'])
+        if self.config['previous_shards']:
+            previous=shard_for(email, self.config['previous_shards'])
+            if previous!=current:
+                return [current, previous]
+        return [current]
+
+    def all_shards(self)->range:
+        """Every shard that may hold rows (the larger of the current and previous layouts)."""
+        return range(max(self.config['shards'], self.config['previous_shards']))
+
+    def _get_executor(self)->ThreadPoolExecutor:
+        """Fan-out executor for this process (recreated after a fork)."""
+        if self._pid!=os.getpid():
+            with self._lock:
+                if self._pid!=os.getpid():
+                    self._executor=ThreadPoolExecutor(max_workers=self.config['fan_out_workers'],
+                                                      thread_name_prefix='user-shards')
+                    self._pid=os.getpid()
+        return self._executor
+
+    def map_shards(self, function:Callable[[int], object], shards:Optional[Iterable[int]]=None)->List:
+        """Calls function(shard) for every shard in parallel. Returns results in shard order."""
+        shards=list(self.all_shards() if shards is None else shards)
+        if len(shards)==1:
+            return [function(shards[0])]
+        return list(self._get_executor().map(function, shards))
+
+    # Writes
+
+    def _reserve(self, rows:List[ShardRow])->Tuple[List[tuple], List[Tuple[object, str]]]:
+        """Claims usernames (and ids) in the index in one transaction."""
+        reserved, conflicts=[], []
+        with self.index() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for key, username, email, password, user_id in rows:
+                    claimed=conn.execute(
+                        "INSERT INTO user_index (id, username, email, username_normalized) VALUES (?, ?, ?, ?) "
+                        "ON CONFLICT DO NOTHING RETURNING id",
+                        (user_id, username, email, normalize_username(username))).fetchone()
+                    if claimed is None:
+                        conflicts.append((key, 'username'))
+                    else:
+                        reserved.append((claimed[0], key, username, email, password))
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.rollback()
+                raise
+        return reserved, conflicts
+
+    def _release(self, user_ids:List[int])->None:
+        """Drops index reservations whose shard insert did not happen."""
+        if not user_ids:
+            return
+        with self.index() as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                conn.executemany("DELETE FROM user_index WHERE id = ?", [(user_id,) for user_id in user_ids])
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.rollback()
+                raise
+
+    def _email_in_previous_shard(self, email:str, shard:int)->bool:
+        for location in self.locations(email):
+            if location!=shard:
+                with self.shard(location) as conn:
+                    if conn.execute("SELECT 1 FROM users WHERE email_normalized = ?", (normalize_email(email),)).fetchone():
+                        return True
+        return False
+
+    def _insert_into_shard(self, shard:int, reserved:List[tuple])->List[tuple]:
+        """Inserts reserved rows into one shard in one transaction. Returns the rows whose email was taken."""
+        taken=[row for row in reserved if self._email_in_previous_shard(row[3], shard)]
+        skipped={row[0] for row in taken}
+        with self.shard(shard) as conn:
+            conn.execute('BEGIN IMMEDIATE')
+            try:
+                for row in reserved:
+                    if row[0] in skipped:
+                        continue
+                    user_id, _key, username, email, password=row
+                    inserted=conn.execute(
+                        "INSERT INTO users (id, username, email, password, email_normalized) VALUES (?, ?, ?, ?, ?) "
+                        "ON CONFLICT DO NOTHING",
+                        (user_id, username, email, password, normalize_email(email))).rowcount
+                    if not inserted:
+                        taken.append(row)
+                conn.execute('COMMIT')
+            except BaseException:
+                conn.rollback()
+                raise
+        return taken
+
+    def insert_many(self, rows:Iterable[ShardRow])->Tuple[List[Tuple[object, int, str, str]], List[Tuple[object, str]]]:
+        """
+        Inserts users, one transaction per touched shard, shards written in parallel.
+        Returns:
+            (key, user id, username, email) for inserted rows, and (key, 'username' or 'email') for conflicts
+        """
+        reserved, conflicts=self._reserve(list(rows))
+        by_shard=defaultdict(list)
+        for row in reserved:
+            by_shard[shard_for(row[3], self.config['shards'])].append(row)
+
+        def insert(shard:int):
+            try:
+                return self._insert_into_shard(shard, by_shard[shard]), None
+            except Exception as exc:
+                return by_shard[shard], exc
+
+        failed=set()
+        error=None
+        for taken, exc in self.map_shards(insert, list(by_shard)):
+            failed.update(row[0] for row in taken)
+            if exc is None:
+                conflicts.extend((row[1], 'email') for row in taken)
+            else:
+                error=error or exc
+        self._release(sorted(failed))
+        if error is not None:
+            raise error
+
+        inserted=[(key, user_id, username, email) for user_id, key, username, email, _ in reserved if user_id not in failed]
+        return inserted, conflicts
+
+    def create(self, username:str, email:str, password:str)->Optional[str]:
+        """Inserts one user. Returns None, or 'username'/'email' for the value already taken."""
+        _inserted, conflicts=self.insert_many([(None, username, email, password, None)])
+        return conflicts[0][1] if conflicts else None
+
+    def update_password(self, user_id:int, old_hash:str, new_hash:str)->None:
+        """Replaces a stored hash, unless it changed since it was read."""
+        with self.index() as conn:
+            row=conn.execute("SELECT email FROM user_index WHERE id = ?", (user_id,)).fetchone()
+        if row is None:
+            return
+        for shard in self.locations(row[0]):
+            with self.shard(shard) as conn:
+                if conn.execute("UPDATE users SET password = ? WHERE id = ? AND password = ?",
+                                (new_hash, user_id, old_hash)).rowcount:
+                    return
+
+    # Reads
+
+    def find_by_email(self, email:str)->Optional[tuple]:
+        """(id, password hash) for an email, from its shard."""
+        normalized=normalize_email(email)
+        for shard in self.locations(email):
+            with self.shard(shard) as conn:
+                user=conn.execute("SELECT id, password FROM users WHERE email_normalized = ?", (normalized,)).fetchone()
+            if user:
+                return user
+        return None
+
+    def existing(self, username:str, email:str)->Optional[str]:
+        """'username' or 'email' when either is taken, else None."""
+        with self.index() as conn:
+            if conn.execute("SELECT 1 FROM user_index WHERE username_normalized = ?",
+                            (normalize_username(username),)).fetchone():
+                return 'username'
+        return 'email' if self.find_by_email(email) else None
+
+    def fan_out(self, sql:str, params:tuple=())->List[tuple]:
+        """Runs a read on every shard in parallel and concatenates the rows (cross-shard queries only)."""
+        def query(shard:int)->List[tuple]:
+            with self.shard(shard) as conn:
+                return conn.execute(sql, params).fetchall()
+        return [row for rows in self.map_shards(query) for row in rows]
+
+    def count(self)->Dict[int, int]:
+        """Rows per shard."""
+        def count_rows(shard:int)->int:
+            with self.shard(shard) as conn:
+                return conn.execute("SELECT COUNT(*) FROM users").fetchone()[0]
+        return dict(zip(self.all_shards(), self.map_shards(count_rows)))
+
+    # Rebalancing
+
+    def rebalance(self, source_shards:int, on_batch:Optional[Callable[[int, int], None]]=None)->Dict[int, int]:
+        """
+        Moves every row not on its shard for the current layout, batch by batch.
+        Rows are copied to their target first and deleted from the source once the target holds them,
+        so an interrupted run can simply be repeated.
+        Args:
+            source_shards: Shard count the rows were written with
+            on_batch: Called with (source shard, rows moved) after every batch
+        Returns:
+            Rows moved out of each source shard
+        """
+        shards=self.config['shards']
+        moved:Dict[int, int]={}
+        for source in range(max(source_shards, shards)):
+            moved[source]=0
+            last_id=0
+            while True:
+                with self.shard(source) as conn:
+                    batch=conn.execute("SELECT id, username, email, password FROM users WHERE id > ? ORDER BY id LIMIT ?",
+                                       (last_id, self.config['move_batch_size'])).fetchall()
+                if not batch:
+                    break
+                last_id=batch[-1][0]
+                targets=defaultdict(list)
+                for row in batch:
+                    target=shard_for(row[2], shards)
+                    if target!=source:
+                        targets[target].append(row)
+
+                landed=[]
+                for target, rows in targets.items():
+                    with self.shard(target) as conn:
+                        conn.execute('BEGIN IMMEDIATE')
+                        try:
+                            conn.executemany("INSERT INTO users (id, username, email, password, email_normalized) "
+                                             "VALUES (?, ?, ?, ?, ?) ON CONFLICT DO NOTHING",
+                                             [(*row, normalize_email(row[2])) for row in rows])
+                            conn.execute('COMMIT')
+                        except BaseException:
+                            conn.rollback()
+                            raise
+                        # Only rows the target now holds (by id) may leave the source
+                        placeholders=','.join('?'*len(rows))
+                        landed+=[row[0] for row in conn.execute(f"SELECT id FROM users WHERE id IN ({placeholders})",
+                                                                [row[0] for row in rows])]
+                if landed:
+                    with self.shard(source) as conn:
+                        conn.execute('BEGIN IMMEDIATE')
+                        try:
+                            conn.executemany("DELETE FROM users WHERE id = ?", [(user_id,) for user_id in landed])
+                            conn.execute('COMMIT')
+                        except BaseException:
+                            conn.rollback()
+                            raise
+                moved[source]+=len(landed)
+                if on_batch is not None:
+                    on_batch(source, len(landed))
+        return moved
+
+    def import_rows(self, rows:Iterable[tuple], batch_size:Optional[int]=None)->Tuple[int, int]:
+        """Copies (id, username, email, password) rows into the shards, keeping their ids. Returns (inserted, conflicts)."""
+        batch_size=batch_size or self.config['move_batch_size']
+        inserted=conflicts=0
+        batch=[]
+        for user_id, username, email, password in rows:
+            batch.append((user_id, username, email, password, user_id))
+            if len(batch)>=batch_size:
+                done, clashes=self.insert_many(batch)
+                inserted, conflicts=inserted+len(done), conflicts+len(clashes)
+                batch=[]
+        if batch:
+            done, clashes=self.insert_many(batch)
+            inserted, conflicts=inserted+len(done), conflicts+len(clashes)
+        return inserted, conflicts
+
+
+user_shards:UserShards=UserShards(SHARDING_CONFIG)
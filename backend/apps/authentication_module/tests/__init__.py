@@ -0,0 +1,8 @@
+"""
+Tests for the authentication module.
+
+    DJANGO_SECRET_KEY=test DJANGO_SQLITE_POOL=true python manage.py test -t . apps/authentication_module/tests
+
+`apps` is a namespace package, so pass the directory and the top-level directory: discovery does not
+descend into it on its own. The database tests run against Django's SQLite test databases.
+"""
@@ -0,0 +1,51 @@
+import asyncio
+from django.test import SimpleTestCase
+from apps.authentication_module.admission import ConcurrencyLimiter
+
+
+class ConcurrencyLimiterTests(SimpleTestCase):
+    def test_queue_full_is_refused(self):
+        limiter=ConcurrencyLimiter(1, 0)
+        self.assertTrue(limiter.acquire(0))
+        self.assertFalse(limiter.acquire(1))
+
+    def test_timeout(self):
+        limiter=ConcurrencyLimiter(1, 1)
+        self.assertTrue(limiter.acquire(0))
+        self.assertFalse(limiter.acquire(0.01))
+        self.assertEqual(limiter.queued(), 0)
+
+    def test_cancelled_waiter_does_not_keep_its_place(self):
+        limiter=ConcurrencyLimiter(1, 1)
+
+        async def scenario():
+            self.assertTrue(await limiter.acquire_async(0))
+            waiter=asyncio.create_task(limiter.acquire_async(5))
+            while not limiter.queued():
+                await asyncio.sleep(0.001)
+            waiter.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+            self.assertEqual(limiter.queued(), 0)
+            limiter.release()
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.active, 0)
+        self.assertTrue(limiter.acquire(0))
+
+    def test_slot_granted_to_a_cancelled_waiter_is_passed_on(self):
+        limiter=ConcurrencyLimiter(1, 1)
+
+        async def scenario():
+            self.assertTrue(await limiter.acquire_async(0))
+            waiter=asyncio.create_task(limiter.acquire_async(5))
+            while not limiter.queued():
+                await asyncio.sleep(0.001)
+            waiter.cancel()
+            limiter.release() # hands the slot to the waiter before the cancellation reaches it
+            with self.assertRaises(asyncio.CancelledError):
+                await waiter
+
+        asyncio.run(scenario())
+        self.assertEqual(limiter.active, 0)
+        self.assertTrue(limiter.acquire(0))
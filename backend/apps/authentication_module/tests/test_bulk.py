@@ -0,0 +1,118 @@
+import json
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from apps.authentication_module import bulk
+from apps.authentication_module.bulk import import_users, iter_records, validate_record
+from apps.authentication_module.existence import existence_index
+from apps.authentication_module.hashers import check_password, make_password
+
+
+def ndjson(*records)->list:
+    return [json.dumps(record).encode()+b'\n' for record in records]
+
+
+class RecordTests(SimpleTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.password_hash=make_password('secret')
+
+    def test_ndjson_lines_that_are_not_objects_become_errors(self):
+        records=list(iter_records([b'{"username": "ada"}\n', b'\n', b'not json\n', b'[1]\n'], 'ndjson'))
+        self.assertEqual(records, [(1, {'username':'ada'}), (3, {'_error':'INVALID JSON'}),
+                                   (4, {'_error':'Expected a JSON object'})])
+
+    def test_csv_records_carry_their_line_numbers(self):
+        records=list(iter_records([b'username,email,password\n', b'ada,ada@example.com,secret\n'], 'csv'))
+        self.assertEqual(records, [(2, {'username':'ada', 'email':'ada@example.com', 'password':'secret'})])
+
+    def test_records_follow_the_registration_rules(self):
+        valid={'username':'ada', 'email':'ada@example.com', 'password':'secret'}
+        self.assertEqual(validate_record(1, valid), ((1, 'ada', 'ada@example.com', 'secret', False), None))
+        for changes, error in (({'email':None}, 'Missing fields: email.'),
+                               ({'password':None}, 'Missing fields: password.'),
+                               ({'username':'a'*151}, 'Invalid username'),
+                               ({'username':7}, 'Invalid username'),
+                               ({'username':'ada\ud800'}, 'Invalid username'),
+                               ({'email':'ada'}, 'Invalid email'),
+                               ({'password':'x'*1025}, 'Invalid password')):
+            with self.subTest(changes=changes):
+                self.assertEqual(validate_record(1, {**valid, **changes}), (None, error))
+
+    def test_prehashed_records(self):
+        record={'username':'ada', 'email':'ada@example.com', 'password_hash':self.password_hash}
+        self.assertEqual(validate_record(1, record), ((1, 'ada', 'ada@example.com', self.password_hash, True), None))
+        self.assertEqual(validate_record(1, {**record, 'email':'ada'}), (None, 'Invalid email'))
+        self.assertEqual(validate_record(1, {**record, 'password_hash':7}), (None, 'Invalid password_hash'))
+        row, error=validate_record(1, {**record, 'password_hash':'plaintext'})
+        self.assertIsNone(row)
+        self.assertTrue(error)
+
+
+class ImportTests(TransactionTestCase):
+    @classmethod
+    def setUpClass(cls):
+        super().setUpClass()
+        cls.password_hash=make_password('secret')
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users")
+        existence_index.rebuild()
+
+    def users(self)->dict:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT username, email, password FROM users")
+            return {username:(email, password) for username, email, password in cursor.fetchall()}
+
+    def prehashed(self, username:str, email:str)->dict:
+        return {'username':username, 'email':email, 'password_hash':self.password_hash}
+
+    def test_imports_across_chunks_and_reports_invalid_rows(self):
+        records=iter_records(ndjson(
+            self.prehashed('ada', 'ada@example.com'),
+            self.prehashed('grace', 'grace@example.com'),
+            {'username':'alan', 'email':'not-an-email', 'password':'secret'},
+            self.prehashed('edsger', 'edsger@example.com'),
+        ), 'ndjson')
+        summary=import_users(records, chunk_size=2)
+        self.assertEqual({key:summary[key] for key in ('received', 'inserted', 'invalid', 'conflicts')},
+                         {'received':4, 'inserted':3, 'invalid':1, 'conflicts':0})
+        self.assertEqual(summary['errors'], [{'line':3, 'error':'Invalid email'}])
+        self.assertEqual(set(self.users()), {'ada', 'grace', 'edsger'})
+        self.assertFalse(existence_index.definitely_absent(email='edsger@example.com'))
+
+    def test_conflicts_and_duplicates_ignore_case(self):
+        import_users(enumerate([self.prehashed('ada', 'ada@example.com')], start=1))
+        summary=import_users(enumerate([
+            self.prehashed('ADA', 'other@example.com'),
+            self.prehashed('grace', 'Ada@Example.com'),
+            self.prehashed('alan', 'alan@example.com'),
+            self.prehashed('Alan', 'alan2@example.com'),
+        ], start=1))
+        self.assertEqual((summary['inserted'], summary['conflicts'], summary['invalid']), (1, 2, 1))
+        self.assertEqual(sorted((error['line'], error['error']) for error in summary['errors']), [
+            (1, 'Username already exists'),
+            (2, 'Email already exists'),
+            (4, 'Duplicate username or email within import'),
+        ])
+
+    def test_plaintext_passwords_are_hashed_off_the_login_executor(self):
+        with mock.patch('apps.authentication_module.hashers.get_hashing_executor', side_effect=AssertionError), \
+             mock.patch.object(bulk, 'get_bulk_hashing_executor', wraps=bulk.get_bulk_hashing_executor) as executor:
+            summary=import_users(enumerate([{'username':'ada', 'email':'ada@example.com', 'password':'secret'}], start=1))
+        self.assertEqual(summary['inserted'], 1)
+        executor.assert_called()
+        self.assertTrue(check_password('secret', self.users()['ada'][1]))
+
+    def test_endpoint_requires_the_import_token(self):
+        body=b''.join(ndjson(self.prehashed('ada', 'ada@example.com')))
+        with mock.patch.dict(bulk.BULK_IMPORT_CONFIG, token='import-token'):
+            refused=self.client.post('/auth/register/bulk/', body, content_type='application/x-ndjson',
+                                     headers={'X-Import-Token':'wrong'})
+            accepted=self.client.post('/auth/register/bulk/', body, content_type='application/x-ndjson',
+                                      headers={'X-Import-Token':'import-token'})
+        self.assertEqual(refused.status_code, 403)
+        self.assertEqual(accepted.status_code, 200)
+        self.assertEqual(accepted.json()['inserted'], 1)
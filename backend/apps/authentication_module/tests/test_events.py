@@ -0,0 +1,96 @@
+import json
+import os
+import queue
+import threading
+from unittest import mock
+from django.conf import settings
+from django.test import SimpleTestCase, TransactionTestCase
+from apps.authentication_module.events import EVENTS_CONFIG, AuthEventLog, event_log, hash_ip, outcome_for
+
+
+# Read at import, before the test runner repoints the alias at its test database
+CONFIGURED_ANALYTICS_DATABASE:str=str(settings.DATABASES['analytics']['NAME'])
+
+def file_state(path:str)->tuple:
+    """(size, mtime) of a database file and its WAL, None where missing."""
+    state=[]
+    for name in (path, f"{path}-wal"):
+        try:
+            stat=os.stat(name)
+            state.append((stat.st_size, stat.st_mtime_ns))
+        except OSError:
+            state.append(None)
+    return tuple(state)
+
+
+class EventHelpersTests(SimpleTestCase):
+    def test_outcomes(self):
+        self.assertEqual([outcome_for(status) for status in (200, 201, 400, 401, 429, 500, 503)],
+                         ['success', 'success', 'failure', 'failure', 'throttled', 'error', 'error'])
+
+    def test_ip_hash_is_keyed_and_stable(self):
+        self.assertEqual(hash_ip('203.0.113.7'), hash_ip('203.0.113.7'))
+        self.assertNotEqual(hash_ip('203.0.113.7'), hash_ip('203.0.113.8'))
+        self.assertNotIn('203.0.113.7', hash_ip('203.0.113.7'))
+        self.assertEqual(len(hash_ip('203.0.113.7')), 16)
+
+
+class AuthEventLogTests(TransactionTestCase):
+    databases={'default', 'analytics'}
+
+    def make_log(self, **config)->AuthEventLog:
+        log=AuthEventLog({**EVENTS_CONFIG, 'flush_interval':0.01, **config})
+        self.addCleanup(log.flush)
+        return log
+
+    def test_without_an_events_database_nothing_is_queued_or_started(self):
+        log=self.make_log(database='missing')
+        threads=threading.active_count()
+        log.record('login', 'success', 0.01, '203.0.113.7')
+        self.assertEqual(log.stats(), {'recorded':0, 'dropped':0, 'written':0, 'failed':0, 'queued':0})
+        self.assertEqual(threading.active_count(), threads)
+
+    def test_full_queue_drops_instead_of_waiting(self):
+        log=self.make_log()
+        full=queue.Queue(maxsize=1)
+        full.put(None)
+        with mock.patch.object(log, '_ensure_writer', return_value=full):
+            log.record('login', 'success', 0.01, '203.0.113.7')
+        self.assertEqual(log.stats()['dropped'], 1)
+
+    def test_rollups_count_recorded_events(self):
+        log=self.make_log()
+        for outcome in ('success', 'failure', 'failure', 'throttled'):
+            log.record('rollup-test', outcome, 0.02, '203.0.113.7')
+        self.assertTrue(log.flush())
+        self.assertEqual(log.stats()['written'], 4)
+
+        rates=log.failure_rates()
+        row=dict(zip(rates['columns'], next(row for row in rates['data'] if row[0]=='rollup-test')))
+        self.assertEqual((row['attempts'], row['failures'], row['throttled'], row['failure_rate']), (4, 2, 1, 0.5))
+        minutes=log.attempts_per_minute()
+        self.assertEqual(sum(row[2] for row in minutes['data'] if row[1]=='rollup-test'), 4)
+
+    def test_events_go_to_the_test_database_not_the_configured_file(self):
+        configured=CONFIGURED_ANALYTICS_DATABASE
+        before=file_state(configured)
+
+        response=self.client.post('/auth/login/', json.dumps({'email':'nobody@example.com', 'password':'secret'}),
+                                  content_type='application/json')
+        self.assertEqual(response.status_code, 400)
+        self.assertTrue(event_log.flush())
+
+        self.assertEqual(file_state(configured), before)
+        rates=event_log.failure_rates()
+        self.assertIn('login', [row[0] for row in rates['data']])
+
+    def test_queued_events_stay_with_the_database_they_were_recorded_for(self):
+        configured=CONFIGURED_ANALYTICS_DATABASE
+        before=file_state(configured)
+        log=self.make_log(flush_interval=0.2)
+        log.record('login', 'success', 0.01, '203.0.113.7')
+        # What the connection reports once the test runner has destroyed its test database
+        with mock.patch.object(log, 'database', return_value={'db_path':configured}):
+            self.assertTrue(log.flush())
+        self.assertEqual(log.stats()['written'], 1)
+        self.assertEqual(file_state(configured), before)
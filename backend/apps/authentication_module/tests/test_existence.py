@@ -0,0 +1,104 @@
+import io
+import threading
+from unittest import mock
+from django.core.management import call_command
+from django.db import connection
+from django.test import SimpleTestCase, TransactionTestCase
+from apps.authentication_module.existence import BloomFilter, ExistenceIndex, LRUCache
+from config.tests.test_sqlconfig import wait_until
+
+
+class BloomFilterTests(SimpleTestCase):
+    def test_no_false_negatives_and_about_the_configured_error_rate(self):
+        bloom=BloomFilter(1_000, 0.01)
+        for i in range(1_000):
+            bloom.add(f"member-{i}")
+        self.assertTrue(all(f"member-{i}" in bloom for i in range(1_000)))
+        false_positives=sum(f"other-{i}" in bloom for i in range(10_000))
+        self.assertLess(false_positives, 300)
+        self.assertAlmostEqual(bloom.estimated_error_rate(), 0.01, delta=0.005)
+
+
+class LRUCacheTests(SimpleTestCase):
+    def test_evicts_the_least_recently_used_key(self):
+        cache=LRUCache(2)
+        cache.add('a')
+        cache.add('b')
+        self.assertIn('a', cache) # now the most recently used
+        cache.add('c')
+        self.assertEqual((('a' in cache), ('b' in cache), ('c' in cache), len(cache)), (True, False, True, 2))
+
+
+class ExistenceIndexTests(TransactionTestCase):
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users")
+        self.insert('ada', 'Ada@Example.com')
+
+    def insert(self, username:str, email:str)->None:
+        with connection.cursor() as cursor:
+            cursor.execute("INSERT INTO users (username, email, password, username_normalized, email_normalized) "
+                           "VALUES (%s, %s, 'x', %s, %s)", [username, email, username.lower(), email.lower()])
+
+    def make_index(self, refresh_interval:float=60.0)->ExistenceIndex:
+        return ExistenceIndex(capacity=100, error_rate=0.01, positive_cache_size=10, refresh_interval=refresh_interval)
+
+    def test_first_lookup_warms_in_the_background_and_falls_through_until_ready(self):
+        index=self.make_index()
+        started=threading.Event()
+        release=threading.Event()
+        rebuild=index.rebuild
+
+        def slow_rebuild():
+            started.set()
+            release.wait(5)
+            return rebuild()
+
+        with mock.patch.object(index, 'rebuild', side_effect=slow_rebuild):
+            self.assertFalse(index.definitely_absent(email='nobody@example.com')) # unknown: ask the database
+            self.assertTrue(started.wait(5))
+            self.assertFalse(index.definitely_absent(email='nobody@example.com')) # no second warming thread
+            release.set()
+            wait_until(lambda: index.stats()['warm'])
+        self.assertEqual(index.stats()['rebuilds'], 1)
+        self.assertTrue(index.definitely_absent(email='nobody@example.com'))
+        self.assertFalse(index.definitely_absent(email='ada@example.com'))
+        self.assertFalse(index.definitely_absent(username='ADA'))
+
+    def test_warming_is_retried_after_a_database_error(self):
+        index=self.make_index(refresh_interval=0)
+        with connection.cursor() as cursor:
+            cursor.execute("ALTER TABLE users RENAME TO users_hidden")
+        try:
+            index.definitely_absent(email='ada@example.com')
+            wait_until(lambda: index._warming is None)
+            self.assertFalse(index.stats()['warm'])
+        finally:
+            with connection.cursor() as cursor:
+                cursor.execute("ALTER TABLE users_hidden RENAME TO users")
+        index.definitely_absent(email='ada@example.com')
+        wait_until(lambda: index.stats()['warm'])
+
+    def test_refresh_picks_up_rows_inserted_elsewhere(self):
+        index=self.make_index(refresh_interval=0)
+        index.rebuild()
+        self.insert('grace', 'grace@example.com')
+        self.assertFalse(index.definitely_absent(email='grace@example.com'))
+        self.assertEqual(index.stats()['refreshes'], 1)
+
+    def test_confirmed_values(self):
+        index=self.make_index()
+        index.rebuild()
+        self.assertIsNone(index.confirmed(email='grace@example.com'))
+        index.add('grace', 'Grace@Example.com')
+        self.assertEqual(index.confirmed(email='grace@example.com'), 'email')
+        self.assertEqual(index.confirmed(username='Grace'), 'username')
+        self.assertFalse(index.definitely_absent(email='grace@example.com'))
+        index.rebuild()
+        self.assertIsNone(index.confirmed(email='grace@example.com'))
+
+    def test_rebuild_command(self):
+        output=io.StringIO()
+        call_command('rebuild_existence_index', stdout=output)
+        self.assertIn('Indexed 2 keys', output.getvalue())
+        self.assertIn('restart them', output.getvalue())
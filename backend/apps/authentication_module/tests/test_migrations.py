@@ -0,0 +1,52 @@
+from django.core.management import call_command
+from django.db import connection
+from django.test import TransactionTestCase
+from apps.authentication_module.schema import SchemaError
+
+
+class LookupColumnsMigrationTests(TransactionTestCase):
+    """Migration 0002 against a users table written before it."""
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users")
+        call_command('migrate', 'authentication_module', '0001', verbosity=0)
+
+    def tearDown(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users")
+        call_command('migrate', 'authentication_module', verbosity=0)
+
+    def insert(self, *rows:tuple)->None:
+        with connection.cursor() as cursor:
+            cursor.executemany("INSERT INTO users (username, email, password) VALUES (%s, %s, %s)", rows)
+
+    def lookup_values(self)->list:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT username_normalized, email_normalized FROM users ORDER BY id")
+            return cursor.fetchall()
+
+    def index_names(self)->set:
+        with connection.cursor() as cursor:
+            cursor.execute("SELECT name FROM sqlite_master WHERE type = 'index' AND tbl_name = 'users'")
+            return {row[0] for row in cursor.fetchall()}
+
+    def test_backfills_and_indexes(self):
+        self.insert(('Ada', ' Ada@Example.com', 'hash'), ('grace', 'grace@example.com', 'hash'))
+        call_command('migrate', 'authentication_module', verbosity=0)
+        self.assertEqual(self.lookup_values(), [('ada', 'ada@example.com'), ('grace', 'grace@example.com')])
+        self.assertTrue({'users_username_normalized_key', 'users_email_normalized_key', 'users_email_login'}
+                        <=self.index_names())
+
+    def test_case_only_duplicates_stop_before_the_indexes(self):
+        self.insert(('ada', 'ada@example.com', 'hash'), ('Ada', 'ADA@example.com', 'hash'))
+        with self.assertRaisesMessage(SchemaError, 'username_normalized: ada; email_normalized: ada@example.com'):
+            call_command('migrate', 'authentication_module', verbosity=0)
+        # Columns and backfill stay; only the unique indexes are missing
+        self.assertEqual(self.lookup_values(), [('ada', 'ada@example.com'), ('ada', 'ada@example.com')])
+        self.assertNotIn('users_email_normalized_key', self.index_names())
+
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users WHERE username = %s", ['Ada'])
+        call_command('migrate', 'authentication_module', verbosity=0)
+        self.assertIn('users_email_normalized_key', self.index_names())
@@ -0,0 +1,110 @@
+import asyncio
+import json
+from unittest import mock
+from django.test import RequestFactory, SimpleTestCase
+from apps.authentication_module.payloads import (
+    LOGIN_PAYLOAD, REGISTRATION_PAYLOAD, BodyLimitMiddleware, Field, PayloadSchema, parse_payload,
+)
+
+
+class ParsePayloadTests(SimpleTestCase):
+    def setUp(self):
+        self.factory=RequestFactory()
+
+    def post(self, body, **extra):
+        content=body if isinstance(body, (str, bytes)) else json.dumps(body)
+        return self.factory.post('/auth/register/', content, content_type='application/json', **extra)
+
+    def assert_error(self, request, schema:PayloadSchema, status:int, message:str)->None:
+        values, response=parse_payload(request, schema)
+        self.assertIsNone(values)
+        self.assertEqual(response.status_code, status)
+        self.assertEqual(json.loads(response.content), {'error':message})
+
+    def test_values_in_schema_order(self):
+        values, response=parse_payload(
+            self.post({'password':'secret', 'email':'ada@example.com', 'username':'ada'}), REGISTRATION_PAYLOAD)
+        self.assertIsNone(response)
+        self.assertEqual(values, ('ada', 'ada@example.com', 'secret'))
+
+    def test_only_post(self):
+        _values, response=parse_payload(self.factory.get('/auth/register/'), REGISTRATION_PAYLOAD)
+        self.assertEqual(response.status_code, 400)
+
+    def test_body_over_the_cap(self):
+        body={'email':'ada@example.com', 'password':'x'*LOGIN_PAYLOAD.max_body_bytes}
+        self.assert_error(self.post(body), LOGIN_PAYLOAD, 413, 'Request body too large')
+
+    def test_declared_length_over_the_cap_is_refused_without_reading(self):
+        request=self.post({'email':'ada@example.com', 'password':'secret'},
+                          CONTENT_LENGTH=str(LOGIN_PAYLOAD.max_body_bytes+1))
+        with mock.patch.object(request, 'read', side_effect=AssertionError('body was read')):
+            self.assert_error(request, LOGIN_PAYLOAD, 413, 'Request body too large')
+
+    def test_invalid_json(self):
+        self.assert_error(self.post('{"email":'), REGISTRATION_PAYLOAD, 400, 'INVALID JSON')
+        self.assert_error(self.post(b'{"email":"\xff"}'), REGISTRATION_PAYLOAD, 400, 'INVALID JSON')
+        self.assert_error(self.post(['not', 'an', 'object']), LOGIN_PAYLOAD, 400, 'INVALID JSON FORMAT!')
+
+    def test_missing_fields(self):
+        self.assert_error(self.post({'username':'ada', 'email':''}), REGISTRATION_PAYLOAD, 400,
+                          'Missing fields: email, password.')
+        self.assert_error(self.post({'email':'ada@example.com'}), LOGIN_PAYLOAD, 400,
+                          'Some fields are required but missing')
+
+    def test_invalid_fields(self):
+        self.assert_error(self.post({'username':'ada', 'email':'not-an-email', 'password':'secret'}),
+                          REGISTRATION_PAYLOAD, 400, 'Invalid email')
+        self.assert_error(self.post({'username':['ada'], 'email':'ada@example.com', 'password':'secret'}),
+                          REGISTRATION_PAYLOAD, 400, 'Invalid username')
+
+    def test_lone_surrogates_are_invalid(self):
+        # json.dumps writes the surrogate as a \udXXX escape, which json.loads turns back into one
+        for field, message in (('username', 'Invalid username'), ('password', 'Invalid password')):
+            body={'username':'ada', 'email':'ada@example.com', 'password':'secret', field:'ab\ud800'}
+            self.assert_error(self.post(body), REGISTRATION_PAYLOAD, 400, message)
+        self.assert_error(self.post({'email':'ada\udfff@example.com', 'password':'secret'}),
+                          LOGIN_PAYLOAD, 400, 'Invalid email')
+
+    def test_non_ascii_values_are_accepted(self):
+        values, response=parse_payload(self.post({'email':'zoë@example.com', 'password':'pässwörd ✓'}), LOGIN_PAYLOAD)
+        self.assertIsNone(response)
+        self.assertEqual(values, ('zoë@example.com', 'pässwörd ✓'))
+
+    def test_field_length_cap(self):
+        schema=PayloadSchema((Field('name', 3),), 100)
+        self.assert_error(self.post({'name':'abcd'}), schema, 400, 'Invalid name')
+
+
+class BodyLimitMiddlewareTests(SimpleTestCase):
+    def call(self, chunks, headers=()):
+        """Runs the middleware over an echo application. Returns (status, body)."""
+        async def echo(scope, receive, send):
+            message=await receive()
+            await send({'type':'http.response.start', 'status':200, 'headers':[]})
+            await send({'type':'http.response.body', 'body':message['body']})
+
+        messages=[{'type':'http.request', 'body':chunk, 'more_body':index<len(chunks)-1}
+                  for index, chunk in enumerate(chunks)]
+        sent=[]
+
+        async def receive():
+            return messages.pop(0)
+
+        async def send(message):
+            sent.append(message)
+
+        scope={'type':'http', 'path':'/auth/login/', 'headers':list(headers)}
+        asyncio.run(BodyLimitMiddleware(echo, {'/auth/login/':10})(scope, receive, send))
+        return sent[0]['status'], sent[1]['body']
+
+    def test_body_within_the_cap_is_replayed_whole(self):
+        self.assertEqual(self.call([b'12345', b'678']), (200, b'12345678'))
+
+    def test_body_over_the_cap(self):
+        status, body=self.call([b'12345', b'678901', b'never read'])
+        self.assertEqual(status, 413)
+        self.assertEqual(json.loads(body), {'error':'Request body too large'})
+
+    def test_declared_length_over_the_cap(self):
+        self.assertEqual(self.call([], [(b'content-length', b'11')])[0], 413)
@@ -0,0 +1,100 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from django.test import SimpleTestCase
+from apps.authentication_module.schema import SchemaError
+from apps.authentication_module.sharding import SHARDING_CONFIG, UserShards, jump_hash, shard_for
+
+
+class JumpHashTests(SimpleTestCase):
+    def test_growing_the_layout_moves_only_rows_to_the_new_shard(self):
+        before=[jump_hash(key, 10) for key in range(10_000)]
+        after=[jump_hash(key, 11) for key in range(10_000)]
+        moved=[new for old, new in zip(before, after) if old!=new]
+        self.assertTrue(set(moved)<={10})
+        self.assertAlmostEqual(len(moved)/10_000, 1/11, delta=0.02)
+        self.assertEqual({jump_hash(key, 1) for key in range(100)}, {0})
+
+    def test_shards_follow_the_normalized_email(self):
+        self.assertEqual(shard_for(' Ada@Example.com', 16), shard_for('ada@example.com', 16))
+
+
+class UserShardsTests(SimpleTestCase):
+    def setUp(self):
+        directory=tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory=directory.name
+
+    def make_shards(self, shards:int, previous_shards:int=0)->UserShards:
+        return UserShards({**SHARDING_CONFIG, 'shards':shards, 'previous_shards':previous_shards,
+                           'directory':self.directory, 'move_batch_size':7})
+
+    def emails(self, count:int)->list:
+        return [f"user{i}@example.com" for i in range(count)]
+
+    def test_create_and_look_up_across_shards(self):
+        shards=self.make_shards(4)
+        for i, email in enumerate(self.emails(40)):
+            self.assertIsNone(shards.create(f"user{i}", email, f"hash{i}"))
+        self.assertEqual(sum(shards.count().values()), 40)
+        self.assertGreater(min(shards.count().values()), 0)
+        user_id, password=shards.find_by_email('USER7@example.com')
+        self.assertEqual(password, 'hash7')
+        self.assertIsNone(shards.find_by_email('nobody@example.com'))
+
+        shards.update_password(user_id, 'stale', 'hash-new')
+        self.assertEqual(shards.find_by_email('user7@example.com')[1], 'hash7')
+        shards.update_password(user_id, 'hash7', 'hash-new')
+        self.assertEqual(shards.find_by_email('user7@example.com')[1], 'hash-new')
+
+    def test_conflicts_ignore_case_and_release_the_reservation(self):
+        shards=self.make_shards(4)
+        shards.create('ada', 'ada@example.com', 'hash')
+        self.assertEqual(shards.existing('ADA', 'other@example.com'), 'username')
+        self.assertEqual(shards.existing('grace', 'Ada@Example.com'), 'email')
+        self.assertEqual(shards.create('Ada', 'other@example.com', 'hash'), 'username')
+        self.assertEqual(shards.create('grace', 'ADA@example.com', 'hash'), 'email')
+        # The failed email insert gave the username back
+        self.assertIsNone(shards.create('grace', 'grace@example.com', 'hash'))
+
+        inserted, conflicts=shards.insert_many([(1, 'alan', 'alan@example.com', 'hash', None),
+                                                (2, 'ALAN', 'alan2@example.com', 'hash', None)])
+        self.assertEqual([row[0] for row in inserted], [1])
+        self.assertEqual(conflicts, [(2, 'username')])
+
+    def test_rebalancing_to_more_shards(self):
+        emails=self.emails(30)
+        old=self.make_shards(2)
+        for i, email in enumerate(emails):
+            old.create(f"user{i}", email, 'hash')
+
+        shards=self.make_shards(3, previous_shards=2)
+        # Before the move, rows are found on their previous shard
+        self.assertTrue(all(shards.find_by_email(email) for email in emails))
+        moved=shards.rebalance(2)
+        expected=sum(shard_for(email, 2)!=shard_for(email, 3) for email in emails)
+        self.assertEqual(sum(moved.values()), expected)
+        self.assertEqual(sum(shards.count().values()), 30)
+        settled=self.make_shards(3)
+        self.assertTrue(all(settled.find_by_email(email) for email in emails))
+        self.assertEqual(shards.rebalance(2), {0:0, 1:0, 2:0}) # repeating a finished run moves nothing
+
+    def write_version_1_shard(self, *rows:tuple)->None:
+        with closing(sqlite3.connect(os.path.join(self.directory, 'users-000.sqlite3'))) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, username TEXT NOT NULL, "
+                         "email TEXT UNIQUE NOT NULL, password TEXT NOT NULL)")
+            conn.executemany("INSERT INTO users (id, username, email, password) VALUES (?, ?, ?, ?)", rows)
+            conn.commit()
+
+    def test_version_1_shards_are_upgraded_on_first_use(self):
+        self.write_version_1_shard((1, 'ada', ' Ada@Example.com', 'hash'))
+        shards=self.make_shards(1)
+        self.assertEqual(shards.find_by_email('ada@example.com'), (1, 'hash'))
+        with shards.shard(0) as conn:
+            self.assertEqual(conn.execute('PRAGMA user_version').fetchone()[0], 2)
+
+    def test_upgrade_stops_on_case_only_duplicates(self):
+        self.write_version_1_shard((1, 'ada', 'ada@example.com', 'hash'), (2, 'ada2', 'ADA@example.com', 'hash'))
+        with self.assertRaisesMessage(SchemaError, 'differ only in case'):
+            self.make_shards(1).find_by_email('ada@example.com')
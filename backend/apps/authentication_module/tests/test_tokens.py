@@ -0,0 +1,76 @@
+import time
+from unittest import mock
+from django.test import RequestFactory, SimpleTestCase
+from apps.authentication_module.tokens import (
+    TOKEN_CONFIG, TokenError, TokenVerifier, _b64decode, _b64encode, issue_token, token_from_request, token_verifier,
+)
+
+
+class TokenVerifierTests(SimpleTestCase):
+    def setUp(self):
+        self.verifier=TokenVerifier(cache_size=2)
+
+    def test_issued_tokens_verify_and_are_cached(self):
+        token=issue_token(42)
+        self.assertEqual(self.verifier.verify(token), 42)
+        self.assertEqual(self.verifier.verify(token), 42)
+        self.assertEqual((self.verifier.misses, self.verifier.hits), (1, 1))
+
+    def test_forged_and_malformed_tokens(self):
+        payload, signature=issue_token(42).split('.')
+        other_payload=issue_token(43).split('.')[0]
+        for token, message in ((f"{other_payload}.{signature}", 'Invalid token signature.'),
+                               (f"{payload}.{_b64encode(b'x'*32)}", 'Invalid token signature.'),
+                               (payload, 'Malformed token.'),
+                               (f"{_b64encode(_b64decode(payload)[:-1])}.{signature}", 'Malformed token.'),
+                               ('not a token', 'Malformed token.')):
+            with self.subTest(token=token), self.assertRaisesMessage(TokenError, message):
+                self.verifier.verify(token)
+
+    def test_expired_tokens_are_refused_and_forgotten(self):
+        token=issue_token(42, ttl=60)
+        self.verifier.verify(token)
+        with mock.patch('apps.authentication_module.tokens.time.time', return_value=2**32-1):
+            with self.assertRaisesMessage(TokenError, 'Token expired.'):
+                self.verifier.verify(token)
+        self.assertEqual(self.verifier.stats()['cached'], 0)
+
+    def test_revoked_tokens_are_refused_until_they_expire(self):
+        token, other=issue_token(42, ttl=60), issue_token(42)
+        self.verifier.verify(token)
+        self.verifier.revoke(token)
+        with self.assertRaisesMessage(TokenError, 'Token revoked.'):
+            self.verifier.verify(token)
+        self.assertEqual(self.verifier.verify(other), 42) # the user's other sessions stay valid
+        with mock.patch('apps.authentication_module.tokens.time.time', return_value=time.time()+120):
+            self.verifier._next_purge=0
+            self.verifier.revoke(other)
+        self.assertEqual(self.verifier.stats()['revoked'], 1) # the first revocation expired with its token
+
+    def test_cache_is_bounded(self):
+        for user_id in range(5):
+            self.verifier.verify(issue_token(user_id))
+        self.assertEqual(self.verifier.stats()['cached'], 2)
+
+
+class TokenRequestTests(SimpleTestCase):
+    def test_bearer_header_before_cookie(self):
+        factory=RequestFactory()
+        request=factory.get('/', headers={'Authorization':'Bearer header-token'})
+        request.COOKIES[TOKEN_CONFIG['cookie_name']]='cookie-token'
+        self.assertEqual(token_from_request(request), 'header-token')
+        request=factory.get('/')
+        request.COOKIES[TOKEN_CONFIG['cookie_name']]='cookie-token'
+        self.assertEqual(token_from_request(request), 'cookie-token')
+        self.assertIsNone(token_from_request(factory.get('/')))
+
+    def test_dashboard_and_logout(self):
+        token=issue_token(42)
+        self.assertEqual(self.client.get('/dashboard/').status_code, 401)
+        self.assertEqual(self.client.get('/dashboard/', headers={'Authorization':f"Bearer {token}"}).status_code, 200)
+
+        response=self.client.post('/auth/logout/', headers={'Authorization':f"Bearer {token}"})
+        self.assertEqual(response.status_code, 200)
+        with self.assertRaisesMessage(TokenError, 'Token revoked.'):
+            token_verifier.verify(token)
+        self.assertEqual(self.client.get('/dashboard/', headers={'Authorization':f"Bearer {token}"}).status_code, 401)
@@ -0,0 +1,68 @@
+import json
+import sqlite3
+from contextlib import closing
+from unittest import mock
+from django.db import connection
+from django.test import TransactionTestCase
+from apps.authentication_module.existence import existence_index
+from apps.authentication_module.hashers import make_password
+
+
+class LoginTests(TransactionTestCase):
+    # analytics too, so the event log writes to its test database
+    databases={'default', 'analytics'}
+
+    def setUp(self):
+        with connection.cursor() as cursor:
+            cursor.execute("DELETE FROM users")
+        existence_index.rebuild() # forget users of earlier tests
+
+    def post(self, path:str, body:dict):
+        return self.client.post(path, json.dumps(body), content_type='application/json')
+
+    def login(self, email:str, password:str):
+        return self.post('/auth/login/', {'email':email, 'password':password})
+
+    def test_register_then_login_ignores_case(self):
+        response=self.post('/auth/register/', {'username':'ada', 'email':'Ada@Example.com', 'password':'secret'})
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(self.login('ada@example.com', 'secret').status_code, 200)
+        self.assertEqual(self.login('ada@example.com', 'wrong').status_code, 400)
+
+    def test_register_refuses_an_email_differing_only_in_case(self):
+        self.post('/auth/register/', {'username':'ada', 'email':'ada@example.com', 'password':'secret'})
+        response=self.post('/auth/register/', {'username':'ada2', 'email':'ADA@example.com', 'password':'secret'})
+        self.assertEqual(response.status_code, 400)
+
+    def test_login_after_insert_from_another_connection(self):
+        # A first login warms the in-process existence index without the row below
+        self.assertEqual(self.login('grace@example.com', 'secret').status_code, 400)
+
+        with closing(sqlite3.connect(connection.settings_dict['NAME'], uri=True)) as other:
+            other.execute("INSERT INTO users (username, email, password, username_normalized, email_normalized) "
+                          "VALUES (?, ?, ?, ?, ?)",
+                          ('grace', 'grace@example.com', make_password('secret'), 'grace', 'grace@example.com'))
+            other.commit()
+
+        self.assertEqual(self.login('grace@example.com', 'secret').status_code, 200)
+
+    def test_unknown_email_still_verifies_a_password(self):
+        with mock.patch('apps.authentication_module.views.reject_password', return_value=False) as reject:
+            self.assertEqual(self.login('nobody@example.com', 'secret').status_code, 400)
+        reject.assert_called_once_with('secret')
+
+    def test_lone_surrogates_are_refused_as_invalid_input(self):
+        for body, field in (({'username':'ada\ud800', 'email':'ada@example.com', 'password':'secret'}, 'username'),
+                            ({'username':'ada', 'email':'ada@example.com', 'password':'se\ud800cret'}, 'password')):
+            response=self.post('/auth/register/', body)
+            self.assertEqual(response.status_code, 400)
+            self.assertEqual(response.json(), {'error':f"Invalid {field}"})
+        response=self.login('ada\ud800@example.com', 'secret')
+        self.assertEqual(response.status_code, 400)
+        self.assertEqual(response.json(), {'error':'Invalid email'})
+
+    def test_registration_errors_do_not_echo_the_exception(self):
+        with mock.patch('apps.authentication_module.views.create_user', side_effect=RuntimeError('ada@example.com')):
+            response=self.post('/auth/register/', {'username':'ada', 'email':'ada@example.com', 'password':'secret'})
+        self.assertEqual(response.status_code, 500)
+        self.assertNotIn('ada@example.com', response.content.decode())
@@ -0,0 +1,148 @@
+"""
+Stateless signed session tokens.
+
+A token is `<payload>.<signature>`, both urlsafe base64: the payload packs the user id, expiry
+and a random token id; the signature is an HMAC-SHA256 keyed off `configuration.secret_key`.
+Verification needs no database. Recently verified tokens are cached (bounded LRU with TTL), and
+revoked token ids are held in memory until the token would have expired anyway.
+"""
+
+import base64
+import hashlib
+import hmac
+import os
+import secrets
+import struct
+import threading
+import time
+from collections import OrderedDict
+from typing import Dict, Optional, Tuple
+from config.snapshot import configuration
+
+
+TOKEN_CONFIG={
+    'ttl':int(os.environ.get('AUTH_TOKEN_TTL', 12*60*60)), # seconds
+    'cache_size':int(os.environ.get('AUTH_TOKEN_CACHE_SIZE', 10_000)),
+    'cookie_name':'auth_token',
+}
+
+# user id (uint64), expiry (uint32 unix time), token id (8 random bytes)
+PAYLOAD_FORMAT=struct.Struct('>QI8s')
+
+# Derived rather than used directly, so tokens cannot be confused with other secret_key signatures
+_signing_key=hmac.new(configuration.secret_key.encode(), b'authentication_module.session-token',
+                      hashlib.sha256).digest()
+
+
+class TokenError(Exception):
+    """Custom exception for malformed, forged, expired or revoked tokens."""
+    pass
+
+
+def _b64encode(raw:bytes)->str:
+    return base64.urlsafe_b64encode(raw).decode('ascii').rstrip('=')
+
+
+def _b64decode(text:str)->bytes:
+    return base64.urlsafe_b64decode(text+'='*(-len(text)%4))
+
+
+def _sign(payload:bytes)->bytes:
+    return hmac.new(_signing_key, payload, hashlib.sha256).digest()
+
+
+def issue_token(user_id:int, ttl:Optional[int]=None)->str:
+    """Issues a signed token for a user, valid for `ttl` seconds."""
+    expires=int(time.time())+(ttl or TOKEN_CONFIG['ttl'])
+    payload=PAYLOAD_FORMAT.pack(user_id, expires, secrets.token_bytes(8))
+    return f"{_b64encode(payload)}.{_b64encode(_sign(payload))}"
+
+
+def _decode(token:str)->Tuple[int, int, bytes]:
+    """Checks a token's signature. Returns (user id, expiry, token id)."""
+    try:
+        encoded_payload, encoded_signature=token.split('.', 1)
+        payload=_b64decode(encoded_payload)
+        signature=_b64decode(encoded_signature)
+        user_id, expires, token_id=PAYLOAD_FORMAT.unpack(payload)
+    except (ValueError, struct.error):
+        raise TokenError('Malformed token.')
+
+    if not hmac.compare_digest(signature, _sign(payload)):
+        raise TokenError('Invalid token signature.')
+    return user_id, expires, token_id
+
+
+class TokenVerifier:
+    """Verifies tokens, caching recent verifications and tracking revocations in memory."""
+
+    def __init__(self, cache_size:int):
+        self._cache_size=cache_size
+        self._verified:OrderedDict=OrderedDict() # token -> (user id, expiry, token id)
+        self._revoked:Dict[bytes, int]={} # token id -> expiry
+        self._lock=threading.Lock()
+        self._next_purge=0.0
+        self.hits=0
+        self.misses=0
+
+    def verify(self, token:str)->int:
+        """Returns the token's user id, or raises TokenError."""
+        now=time.time()
+        with self._lock:
+            cached=self._verified.get(token)
+            if cached is not None:
+                self._verified.move_to_end(token)
+                self.hits+=1
+        if cached is None:
+            self.misses+=1
+            cached=_decode(token)
+
+        user_id, expires, token_id=cached
+        if expires<=now:
+            self._forget(token)
+            raise TokenError('Token expired.')
+        if token_id in self._revoked:
+            self._forget(token)
+            raise TokenError('Token revoked.')
+
+        with self._lock:
+            self._verified[token]=cached
+            if len(self._verified)>self._cache_size:
+                self._verified.popitem(last=False)
+        return user_id
+
+    def revoke(self, token:str)->None:
+        """Revokes a token until it expires."""
+        _user_id, expires, token_id=_decode(token)
+        with self._lock:
+            self._revoked[token_id]=expires
+            self._verified.pop(token, None)
+            self._purge_revocations()
+
+    def _forget(self, token:str)->None:
+        with self._lock:
+            self._verified.pop(token, None)
+
+    def _purge_revocations(self)->None:
+        """Drops revocations of tokens that have expired anyway. Caller holds the lock."""
+        now=time.time()
+        if now<self._next_purge:
+            return
+        self._next_purge=now+60
+        for token_id in [token_id for token_id, expires in self._revoked.items() if expires<=now]:
+            del self._revoked[token_id]
+
+    def stats(self)->Dict[str, int]:
+        return {'hits':self.hits, 'misses':self.misses,
+                'cached':len(self._verified), 'revoked':len(self._revoked)}
+
+
+token_verifier:TokenVerifier=TokenVerifier(TOKEN_CONFIG['cache_size'])
+
+
+def token_from_request(request)->Optional[str]:
+    """Reads a token from the Authorization: Bearer header or the auth cookie."""
+    authorization=request.headers.get('Authorization', '')
+    if authorization.startswith('Bearer '):
+        return authorization[len('Bearer '):].strip()
+    return request.COOKIES.get(TOKEN_CONFIG['cookie_name'])
@@ -1,7 +1,13 @@
+from django.conf import settings
 from django.urls import path
-from apps.authentication_module.views import register, login
+from apps.authentication_module.views import register, login, register_async, login_async, bulk_register, logout
+
+# Native async views when served under ASGI (config.asgi); the sync views remain the default
+register_view, login_view=(register_async, login_async) if settings.ASYNC_AUTH_VIEWS else (register, login)
 
 urlpatterns=[
-    path('register/', register),
-    path('login/', login),
+    path('register/', register_view),
+    path('login/', login_view),
+    path('register/bulk/', bulk_register),
+    path('logout/', logout),
 ]
\ No newline at end of file
@@ -1,27 +1,61 @@
-import json
-from django.http import JsonResponse, HttpResponseBadRequest
+import hmac
+import re
+from contextlib import nullcontext
+from django.conf import settings
+from django.http import JsonResponse, HttpResponseBadRequest, FileResponse
 from django.views.decorators.csrf import csrf_exempt
-import hashlib
-from django.db import connection
+from django.db import connection, transaction, IntegrityError, close_old_connections
+from asgiref.sync import sync_to_async
+from apps.authentication_module.hashers import (
+    hash_password, hash_password_async, verify_password, verify_password_async, needs_rehash,
+    reject_password, reject_password_async,
+)
+from apps.authentication_module.admission import admission, admission_controlled, too_many_requests
+from apps.authentication_module.events import recorded
+from apps.authentication_module.payloads import LOGIN_PAYLOAD, REGISTRATION_PAYLOAD, parse_payload
+from apps.authentication_module.existence import existence_index
+from apps.authentication_module.schema import LOGIN_LOOKUP, normalize_email, normalize_username
+from apps.authentication_module.bulk import BULK_IMPORT_CONFIG, import_users, iter_records
+from apps.authentication_module.sharding import user_shards
+from apps.authentication_module.tokens import TOKEN_CONFIG, TokenError, issue_token, token_from_request, token_verifier
+from apps.frontend_module.assets import asset_response, manifest
+
+# Column named by the driver's unique-violation message (Postgres: 'Key (email_normalized)=...', SQLite: 'users.email')
+CONFLICT_COLUMN_PATTERN=re.compile(r'(?:Key \(|users\.)(username|email)(?:_normalized)?\b')
+CONFLICT_MESSAGES:dict={
+    'username':"Username already exists",
+    'email':"Email already exists",
+}
 
 def check_if_existing(username: str, email: str) -> str | None:
+    if user_shards.enabled:
+        existing = user_shards.existing(username, email)
+        return CONFLICT_MESSAGES[existing] if existing else None
+
+    # The existence index answers most probes without a round trip
+    if existence_index.definitely_absent(username, email):
+        return None
+    confirmed = existence_index.confirmed(username, email)
+    if confirmed:
+        return CONFLICT_MESSAGES[confirmed]
+
+    # Two point lookups, each answered by its unique index alone
     query = """
-        SELECT username, email
-        FROM users
-        WHERE username = %s OR email = %s
+        SELECT 'username' FROM users WHERE username_normalized = %s
+        UNION ALL
+        SELECT 'email' FROM users WHERE email_normalized = %s
     """
     with connection.cursor() as cursor:
-        cursor.execute(query, [username, email])
-        results = cursor.fetchall()
+        cursor.execute(query, [normalize_username(username), normalize_email(email)])
+        found = {field for field, in cursor.fetchall()}
 
-    username_exists = False
-    email_exists = False
+    username_exists = 'username' in found
+    email_exists = 'email' in found
 
-    for db_username, db_email in results:
-        if db_username == username:
-            username_exists = True
-        if db_email == email:
-            email_exists = True
+    if username_exists or email_exists:
+        existence_index.confirm(username if username_exists else None, email if email_exists else None)
+    else:
+        existence_index.record_false_positive()
 
     # Username fields will be replaced with firstName, lastName
     if username_exists:
@@ -32,103 +66,322 @@ def check_if_existing(username: str, email: str) -> str | None:
     return None  # No match found
 
 
-@csrf_exempt
-def register(request):
-    if request.method != 'POST':
-        return HttpResponseBadRequest("REQUEST FAILED: Expected 'POST' request.")
+def conflicting_field(exc:IntegrityError)->str | None:
+    """Reads the violated unique column (username or email) off the driver's IntegrityError."""
+    diag=getattr(exc.__cause__, 'diag', None) # psycopg exposes the constraint name, e.g. 'users_email_key'
+    constraint=getattr(diag, 'constraint_name', None) or ''
+    for field in ('username', 'email'):
+        if f"_{field}_" in constraint:
+            return field
 
+    match=CONFLICT_COLUMN_PATTERN.search(str(exc))
+    return match.group(1) if match else None
+
+
+def create_user(username: str, email: str, hashed_password: str) -> str | None:
+    """
+    Inserts a user in a single round trip, letting the unique constraints detect duplicates.
+    Returns None on success, or the error message for the violated constraint.
+    """
+    if user_shards.enabled:
+        field=user_shards.create(username, email, hashed_password)
+        if field:
+            existence_index.confirm(**{field: username if field == 'username' else email})
+            return CONFLICT_MESSAGES[field]
+        existence_index.add(username, email)
+        return None
+
+    # A failed statement poisons an enclosing transaction, so only pay for a savepoint inside one
+    savepoint=transaction.atomic() if connection.in_atomic_block else nullcontext()
     try:
-        data = json.loads(request.body.decode('utf-8'))
-    except (json.JSONDecodeError, UnicodeDecodeError):
-        return JsonResponse({'error': 'INVALID JSON'}, status=400)
+        with savepoint, connection.cursor() as cursor:
+            cursor.execute(
+                "INSERT INTO users (username, email, password, username_normalized, email_normalized) "
+                "VALUES (%s, %s, %s, %s, %s) RETURNING id",
+                [username, email, hashed_password, normalize_username(username), normalize_email(email)]
+            )
+            cursor.fetchone()
+    except IntegrityError as exc:
+        field=conflicting_field(exc)
+        if field:
+            existence_index.confirm(**{field: username if field == 'username' else email})
+            return CONFLICT_MESSAGES[field]
+        # Unrecognised driver message: fall back to looking the duplicate up
+        return check_if_existing(username, email) or "User already exists"
 
-    username = data.get('username')
-    email = data.get('email')
-    password = data.get('password')
+    existence_index.add(username, email)
+    return None
 
-    missing_fields = [field for field in ['username', 'email', 'password'] if not data.get(field)]
-    if missing_fields:
-        return JsonResponse({'error': f"Missing fields: {', '.join(missing_fields)}."}, status=400)
 
-    hashed_password = hashlib.sha256(password.encode()).hexdigest()
+def find_user_by_email(email: str) -> tuple | None:
+    """
+    Fetches (id, password hash) for the user with an email address. Always asks the database: the
+    existence index may not have seen a user registered through another process yet, and a stale
+    negative here would turn away a valid login (registration can trust it, the UNIQUE constraint backs it).
+    """
+    if user_shards.enabled:
+        return user_shards.find_by_email(email)
 
-    # TEMP: Ensure users table exists (for testing only)
     with connection.cursor() as cursor:
-        cursor.execute("""
-            CREATE TABLE IF NOT EXISTS users (
-                id SERIAL PRIMARY KEY,
-                username TEXT UNIQUE NOT NULL,
-                email TEXT UNIQUE NOT NULL,
-                password TEXT NOT NULL
-            )
-        """)
+        cursor.execute(LOGIN_LOOKUP.get(connection.vendor, LOGIN_LOOKUP['postgresql']), [normalize_email(email)])
+        user = cursor.fetchone()
+
+    if user:
+        existence_index.confirm(email=email)
+    return user
+
 
+def update_password_hash(user_id: int, old_hash: str, new_hash: str) -> None:
+    """Replaces a stored hash, unless it changed since it was read."""
+    if user_shards.enabled:
+        return user_shards.update_password(user_id, old_hash, new_hash)
+    with connection.cursor() as cursor:
+        cursor.execute(
+            "UPDATE users SET password = %s WHERE id = %s AND password = %s",
+            [new_hash, user_id, old_hash]
+        )
+
+
+def database_sync_to_async(func):
+    """
+    Wraps a blocking database helper for async views. The helper runs on a worker thread,
+    which releases its connection afterwards so threads do not pin connections between requests.
+    """
+    def run_and_release(*args, **kwargs):
         try:
-            # Check for existing username or email
-            existing=check_if_existing(username, email)
-            if existing:
-                return JsonResponse({
-                    'error': existing
-                }, status=400)
-
-            # Insert user
-            cursor.execute(
-                "INSERT INTO users (username, email, password) VALUES (%s, %s, %s)",
-                [username, email, hashed_password]
-            )
+            return func(*args, **kwargs)
+        finally:
+            close_old_connections()
 
-            return JsonResponse({
-                'message': 'User registered successfully!',
-                # 'username': username,
-                # 'email': email,
-                # These were unaccounted for in the frontend response mechanism,
-                # which is why I kept getting an error even though user details went through to database
-                }, status=201)
+    return sync_to_async(run_and_release, thread_sensitive=False)
 
-        except Exception as e:
-            return JsonResponse({'error': f"Database error: {str(e)}"}, status=500)
 
+# Async counterparts of the blocking helpers, for the ASGI views
+create_user_async=database_sync_to_async(create_user)
+find_user_by_email_async=database_sync_to_async(find_user_by_email)
+update_password_hash_async=database_sync_to_async(update_password_hash)
 
-@csrf_exempt
-def login(request):
-    """Login route logic."""
-    if request.method!='POST':
-        return HttpResponseBadRequest(f"REQUEST FAILED: Expected 'POST' request.")
 
-    try:
-        data=json.loads(request.body.decode('utf-8'))
-    except (json.JSONDecodeError, UnicodeDecodeError):
+def parse_registration(request):
+    """Decodes a registration request. Returns ((username, email, password), None), or (None, error response)."""
+    return parse_payload(request, REGISTRATION_PAYLOAD)
+
+
+def registration_response(existing: str | None) -> JsonResponse:
+    """Builds the registration outcome response."""
+    if existing:
         return JsonResponse({
-            'error':'INVALID JSON FORMAT!'
+            'error': existing
         }, status=400)
 
-    email=data.get('email')
-    password=data.get('password')
+    return JsonResponse({
+        'message': 'User registered successfully!',
+        # 'username': username,
+        # 'email': email,
+        # These were unaccounted for in the frontend response mechanism,
+        # which is why I kept getting an error even though user details went through to database
+        }, status=201)
+
+
+# Exception text is not returned: it can echo the submitted values (e.g. a codec error quoting them)
+REGISTRATION_ERROR_MESSAGE:str='An internal server error occurred while registering. Please try again later.'
+
 
-    missing_fields=[field for field in ['email', 'password'] if not data.get(field)]
-    if missing_fields:
+@csrf_exempt
+@recorded('register')
+@admission_controlled
+def register(request):
+    fields, error_response = parse_registration(request)
+    if error_response:
+        return error_response
+    username, email, password = fields
+
+    # Known duplicates are turned away before paying for hashing or a round trip
+    confirmed = existence_index.confirmed(username, email)
+    if confirmed:
+        return registration_response(CONFLICT_MESSAGES[confirmed])
+
+    try:
+        hashed_password = hash_password(password)
+        # Insert user; duplicates are reported by the unique constraints (users table is created by migration 0001)
+        existing=create_user(username, email, hashed_password)
+        return registration_response(existing)
+
+    except Exception:
+        return JsonResponse({'error': REGISTRATION_ERROR_MESSAGE}, status=500)
+
+
+@csrf_exempt
+@recorded('register')
+@admission_controlled
+async def register_async(request):
+    """Registration route logic for ASGI. Hashing and database work run off the event loop."""
+    fields, error_response = parse_registration(request)
+    if error_response:
+        return error_response
+    username, email, password = fields
+
+    confirmed = existence_index.confirmed(username, email)
+    if confirmed:
+        return registration_response(CONFLICT_MESSAGES[confirmed])
+
+    try:
+        hashed_password = await hash_password_async(password)
+        existing=await create_user_async(username, email, hashed_password)
+        return registration_response(existing)
+
+    except Exception:
+        return JsonResponse({'error': REGISTRATION_ERROR_MESSAGE}, status=500)
+
+
+def parse_login(request):
+    """Decodes a login request. Returns ((email, password), None), or (None, error response)."""
+    return parse_payload(request, LOGIN_PAYLOAD)
+
+
+def login_response(user_id: int | None) -> JsonResponse:
+    """Builds the login outcome response, issuing a session token on success."""
+    if user_id is None:
+        # Same answer for unknown emails and wrong passwords
         return JsonResponse({
-            'error':'Some fields are required but missing'
+            'error':'Credentials not found!',
         }, status=400)
 
+    # To reconfigure for tighter security later, like two-factor security features
+    token=issue_token(user_id)
+    response=JsonResponse(data={
+        'message':'User login successful!',
+        'token':token,
+    }, status=200)
+    response.set_cookie(TOKEN_CONFIG['cookie_name'], token, max_age=TOKEN_CONFIG['ttl'],
+                        httponly=True, samesite='Lax', secure=not settings.DEBUG)
+    return response
+
+
+LOGIN_ERROR_MESSAGE:str='An internal server error occurred while logging in. Please try again later.'
+
+
+@csrf_exempt
+@recorded('login')
+@admission_controlled
+def login(request):
+    """Login route logic."""
+    fields, error_response=parse_login(request)
+    if error_response:
+        return error_response
+    email, password=fields
+
+    # Per-account brake against password guessing
+    retry_after=admission.check_email(email)
+    if retry_after:
+        return too_many_requests(retry_after)
+
     try:
-        with connection.cursor() as cursor:
-            cursor.execute("""SELECT email FROM users WHERE email = %s""", [email])
-            existing=cursor.fetchall()
+        user=find_user_by_email(email)
+        if not user:
+            reject_password(password) # same hashing work as a known email, so response time does not reveal registered addresses
+            return login_response(None)
+        if not verify_password(password, user[1]):
+            return login_response(None)
 
-        if not existing:
-            return JsonResponse({
-                'error':'Credentials not found!',
-            }, status=400)
+        # Upgrade legacy sha256 rows (and outdated work factors) while the plaintext is at hand
+        if needs_rehash(user[1]):
+            update_password_hash(user[0], user[1], hash_password(password))
 
-        # to verify_password() if matches hash from user credentials
+        return login_response(user[0])
 
-        # Simulating temporary direct success if user in database- to reconfigure for tighter security, like two-factor security features
+    except Exception as exc:
         return JsonResponse(data={
-            'message':'User login successful!',
-        }, status=200)
+            'error':LOGIN_ERROR_MESSAGE
+        }, status=500)
+
+
+@csrf_exempt
+@recorded('login')
+@admission_controlled
+async def login_async(request):
+    """Login route logic for ASGI. Hashing and database work run off the event loop."""
+    fields, error_response=parse_login(request)
+    if error_response:
+        return error_response
+    email, password=fields
+
+    retry_after=admission.check_email(email)
+    if retry_after:
+        return too_many_requests(retry_after)
+
+    try:
+        user=await find_user_by_email_async(email)
+        if not user:
+            await reject_password_async(password)
+            return login_response(None)
+        if not await verify_password_async(password, user[1]):
+            return login_response(None)
+
+        if needs_rehash(user[1]):
+            await update_password_hash_async(user[0], user[1], await hash_password_async(password))
+
+        return login_response(user[0])
 
     except Exception as exc:
         return JsonResponse(data={
-            'error':'An internal server error occurred while logging in. Please try again later.'
-        }, status=500)
\ No newline at end of file
+            'error':LOGIN_ERROR_MESSAGE
+        }, status=500)
+
+
+
+@csrf_exempt
+def bulk_register(request):
+    """
+    Bulk registration route. Streams an NDJSON (default) or CSV (Content-Type: text/csv) body
+    into the users table in chunks. Requires the X-Import-Token header to match AUTH_BULK_IMPORT_TOKEN.
+    """
+    if request.method != 'POST':
+        return HttpResponseBadRequest("REQUEST FAILED: Expected 'POST' request.")
+
+    expected_token=BULK_IMPORT_CONFIG['token']
+    supplied_token=request.headers.get('X-Import-Token', '')
+    if not expected_token or not hmac.compare_digest(supplied_token.encode(), expected_token.encode()):
+        return JsonResponse({'error': 'Bulk import is not permitted.'}, status=403)
+
+    data_format='csv' if request.content_type == 'text/csv' else 'ndjson'
+    try:
+        # Iterating the request reads the body line by line instead of buffering request.body
+        summary=import_users(iter_records(request, data_format))
+    except Exception as e:
+        return JsonResponse({'error': f"Database error: {str(e)}"}, status=500)
+
+    return JsonResponse(summary, status=200)
+
+
+
+@csrf_exempt
+def logout(request):
+    """Logout route logic. Revokes the presented session token."""
+    if request.method!='POST':
+        return HttpResponseBadRequest(f"REQUEST FAILED: Expected 'POST' request.")
+
+    token=token_from_request(request)
+    if token:
+        try:
+            token_verifier.revoke(token)
+        except TokenError:
+            pass
+
+    response=JsonResponse(data={'message':'User logout successful!'}, status=200)
+    response.delete_cookie(TOKEN_CONFIG['cookie_name'], samesite='Lax')
+    return response
+
+
+DASHBOARD_PAGE=settings.BASE_DIR/'frontend'/'src'/'assets'/'pages'/'dashboard.html'
+
+
+def dashboard(request):
+    """Dashboard page for holders of a valid session token (checked by SessionTokenMiddleware, no database work)."""
+    if getattr(request, 'user_id', None) is None:
+        return JsonResponse({'error':'Authentication required.'}, status=401)
+    built_path=DASHBOARD_PAGE.relative_to(settings.BASE_DIR).as_posix()
+    asset=manifest.get(built_path)
+    if asset is not None: # precompressed copy from build_assets; never cached by shared caches
+        return asset_response(request, built_path, asset, cache_control='private, no-cache')
+    return FileResponse(open(DASHBOARD_PAGE, 'rb'), content_type='text/html; charset=utf-8')
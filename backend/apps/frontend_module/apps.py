@@ -0,0 +1,7 @@
+from django.apps import AppConfig
+
+
+class FrontendModuleConfig(AppConfig):
+    """Frontend asset serving application configuration."""
+    name='apps.frontend_module'
+    label='frontend_module'
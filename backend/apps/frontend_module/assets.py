@@ -0,0 +1,233 @@
+"""
+Fingerprinted, precompressed frontend assets.
+
+`build_assets()` (run by `manage.py build_assets`) copies the served frontend files into the
+build directory:
+    scripts/styles  also written as name.<hash>.ext; pages refer to those copies, which never change
+                    and are served with a far-future immutable Cache-Control
+    pages           keep their URL and are revalidated on every load (no-cache + ETag)
+    every file      gets .gz (and .br when the brotli module is installed) siblings when that saves bytes
+A manifest maps URL paths to the built file, its content-hash ETag and the encoded variants, so
+serving is a dictionary lookup plus a FileResponse (sendfile via wsgi.file_wrapper where the server has it).
+"""
+
+import gzip
+import hashlib
+import json
+import mimetypes
+import os
+import posixpath
+import re
+import shutil
+import threading
+from pathlib import Path
+from typing import Dict, List, Optional
+from django.http import FileResponse, HttpResponseNotModified
+from django.utils.cache import patch_vary_headers
+from config.snapshot import configuration
+
+try:
+    import brotli
+except ImportError: # optional; gzip alone covers every browser
+    brotli=None
+
+
+ASSETS_CONFIG={
+    'source_root':configuration.base_dir,
+    'build_dir':Path(os.environ.get('FRONTEND_BUILD_DIR', configuration.base_dir/'frontend'/'build')),
+    'pages':('index.html', 'frontend/src/assets/pages/*.html'),
+    'static':('frontend/src/assets/typescript/*.js', 'frontend/src/assets/styles/*.css'),
+    'private':('frontend/src/assets/pages/dashboard.html',), # built, but only served by their own (gated) views
+    'min_compress_size':512, # bytes; smaller files are not worth a variant
+    'gzip_level':9,
+    'brotli_quality':11,
+}
+
+IMMUTABLE_CACHE_CONTROL:str='public, max-age=31536000, immutable'
+REVALIDATE_CACHE_CONTROL:str='no-cache'
+MANIFEST_NAME:str='manifest.json'
+
+# Preference order when a client accepts several encodings
+ENCODINGS=(('br', '.br'), ('gzip', '.gz'))
+
+_REFERENCE=re.compile(r'''((?:src|href)\s*=\s*["'])([^"'#?]+)''')
+
+
+def content_hash(data:bytes)->str:
+    return hashlib.sha256(data).hexdigest()[:16]
+
+
+def fingerprinted_name(path:str, digest:str)->str:
+    """frontend/.../login.js -> frontend/.../login.<digest>.js"""
+    stem, extension=posixpath.splitext(path)
+    return f"{stem}.{digest[:12]}{extension}"
+
+
+def _collect(root:Path, patterns)->List[str]:
+    paths=set()
+    for pattern in patterns:
+        paths.update(path.relative_to(root).as_posix() for path in root.glob(pattern) if path.is_file())
+    return sorted(paths)
+
+
+def _rewrite_references(html:str, page:str, fingerprinted:Dict[str, str])->str:
+    """Points relative src/href attributes of a page at the fingerprinted copies."""
+    directory=posixpath.dirname(page)
+
+    def replace(match):
+        reference=match.group(2)
+        if '://' in reference or reference.startswith(('/', 'data:', 'mailto:')):
+            return match.group(0)
+        target=fingerprinted.get(posixpath.normpath(posixpath.join(directory, reference)))
+        if target is None:
+            return match.group(0)
+        return match.group(1)+posixpath.relpath(target, directory or '.')
+    return _REFERENCE.sub(replace, html)
+
+
+def _write_variants(path:Path, data:bytes, config:dict)->Dict[str, str]:
+    """Writes .gz/.br siblings that are smaller than the original. Returns {encoding: suffix}."""
+    variants={}
+    if len(data)<config['min_compress_size']:
+        return variants
+    encoders={'gzip':lambda raw: gzip.compress(raw, compresslevel=config['gzip_level'], mtime=0)}
+    if brotli is not None:
+        encoders['br']=lambda raw: brotli.compress(raw, quality=config['brotli_quality'])
+    for encoding, suffix in ENCODINGS:
+        encoder=encoders.get(encoding)
+        if encoder is None:
+            continue
+        encoded=encoder(data)
+        if len(encoded)<len(data):
+            path.with_name(path.name+suffix).write_bytes(encoded)
+            variants[encoding]=suffix
+    return variants
+
+
+def build_assets(config:dict=ASSETS_CONFIG)->dict:
+    """Rebuilds the build directory from the sources and writes its manifest."""
+    root, build_dir=Path(config['source_root']), Path(config['build_dir'])
+    if build_dir.exists():
+        shutil.rmtree(build_dir)
+
+    files:Dict[str, bytes]={} # URL path -> content
+    immutable:Dict[str, bool]={}
+    fingerprinted:Dict[str, str]={}
+    for path in _collect(root, config['static']):
+        data=(root/path).read_bytes()
+        files[path]=data # the plain name stays available (revalidated) for old references
+        immutable[path]=False
+        fingerprinted[path]=fingerprinted_name(path, content_hash(data))
+        files[fingerprinted[path]]=data
+        immutable[fingerprinted[path]]=True
+    for page in _collect(root, config['pages']):
+        html=(root/page).read_text(encoding='utf-8')
+        files[page]=_rewrite_references(html, page, fingerprinted).encode('utf-8')
+        immutable[page]=False
+
+    assets={}
+    for url_path, data in files.items():
+        target=build_dir/url_path
+        target.parent.mkdir(parents=True, exist_ok=True)
+        target.write_bytes(data)
+        content_type, _=mimetypes.guess_type(url_path)
+        if content_type and (content_type.startswith('text/') or content_type.endswith('javascript')):
+            content_type+='; charset=utf-8'
+        assets[url_path]={
+            'etag':f'"{content_hash(data)}"',
+            'size':len(data),
+            'content_type':content_type or 'application/octet-stream',
+            'immutable':immutable[url_path],
+            'private':url_path in config['private'],
+            'encodings':_write_variants(target, data, config),
+        }
+
+    manifest={'assets':assets, 'fingerprinted':fingerprinted}
+    (build_dir/MANIFEST_NAME).write_text(json.dumps(manifest, indent=2, sort_keys=True), encoding='utf-8')
+    return manifest
+
+
+class AssetManifest:
+    """The build manifest, reloaded when a rebuild replaces it."""
+
+    def __init__(self, build_dir:Path):
+        self.build_dir=Path(build_dir)
+        self._assets:Dict[str, dict]={}
+        self._mtime:Optional[int]=None
+        self._lock=threading.Lock()
+
+    def _current(self)->Dict[str, dict]:
+        try:
+            mtime=(self.build_dir/MANIFEST_NAME).stat().st_mtime_ns
+        except FileNotFoundError:
+            return {}
+        if mtime!=self._mtime:
+            with self._lock:
+                if mtime!=self._mtime:
+                    with open(self.build_dir/MANIFEST_NAME, encoding='utf-8') as manifest:
+                        self._assets=json.load(manifest)['assets']
+                    self._mtime=mtime
+        return self._assets
+
+    def get(self, url_path:str)->Optional[dict]:
+        return self._current().get(url_path)
+
+
+manifest:AssetManifest=AssetManifest(ASSETS_CONFIG['build_dir'])
+
+
+def accepted_encodings(request)->set:
+    """Content codings the client accepts (those not given q=0)."""
+    accepted=set()
+    for item in request.META.get('HTTP_ACCEPT_ENCODING', '').split(','):
+        coding, _, parameters=item.partition(';')
+        quality=parameters.strip().lower()
+        if quality.startswith('q=') and quality[2:].strip() in ('0', '0.0', '0.00', '0.000'):
+            continue
+        if coding.strip():
+            accepted.add(coding.strip().lower())
+    return accepted
+
+
+def _etag_matches(request, etag:str)->bool:
+    header=request.META.get('HTTP_IF_NONE_MATCH')
+    if not header:
+        return False
+    if header.strip()=='*':
+        return True
+    digest=etag.strip('"')
+    for candidate in header.split(','):
+        candidate=candidate.strip()
+        if candidate.startswith('W/'):
+            candidate=candidate[2:]
+        if candidate.strip('"').split('-', 1)[0]==digest:
+            return True
+    return False
+
+
+def asset_response(request, url_path:str, asset:dict, cache_control:Optional[str]=None):
+    """304 for a current ETag, else the best encoded variant the client accepts."""
+    if cache_control is None:
+        cache_control=IMMUTABLE_CACHE_CONTROL if asset['immutable'] else REVALIDATE_CACHE_CONTROL
+
+    encoding, suffix=None, ''
+    if asset['encodings']:
+        accepted=accepted_encodings(request)
+        for candidate, candidate_suffix in ENCODINGS:
+            if candidate in asset['encodings'] and candidate in accepted:
+                encoding, suffix=candidate, candidate_suffix
+                break
+    # Each representation gets its own strong ETag; any of them validates the same content
+    etag=asset['etag'] if encoding is None else asset['etag'][:-1]+f'-{encoding}"'
+
+    if _etag_matches(request, asset['etag']):
+        response=HttpResponseNotModified()
+    else:
+        response=FileResponse(open(manifest.build_dir/(url_path+suffix), 'rb'), content_type=asset['content_type'])
+        if encoding:
+            response['Content-Encoding']=encoding
+    response['ETag']=etag
+    response['Cache-Control']=cache_control
+    if asset['encodings']:
+        patch_vary_headers(response, ('Accept-Encoding',))
+    return response
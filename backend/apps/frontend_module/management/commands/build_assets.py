@@ -0,0 +1,27 @@
+"""
+Fingerprints and precompresses the frontend assets into the build directory.
+
+    python manage.py build_assets
+"""
+
+from django.core.management.base import BaseCommand
+from apps.frontend_module.assets import ASSETS_CONFIG, brotli, build_assets
+
+
+class Command(BaseCommand):
+    help='Builds fingerprinted, gzip/brotli-precompressed frontend assets and their manifest.'
+
+    def handle(self, *args, **options):
+        assets=build_assets(ASSETS_CONFIG)['assets']
+        if brotli is None:
+            self.stderr.write('brotli is not installed; only gzip variants were written.')
+
+        self.stdout.write(f"{'asset':<64} {'bytes':>7} {'gzip':>7} {'br':>7}  cache")
+        for url_path, asset in sorted(assets.items()):
+            sizes=[]
+            for encoding in ('gzip', 'br'):
+                suffix=asset['encodings'].get(encoding)
+                sizes.append(str((ASSETS_CONFIG['build_dir']/(url_path+suffix)).stat().st_size) if suffix else '-')
+            cache='private' if asset['private'] else ('immutable' if asset['immutable'] else 'revalidate')
+            self.stdout.write(f"{url_path:<64} {asset['size']:>7} {sizes[0]:>7} {sizes[1]:>7}  {cache}")
+        self.stdout.write(self.style.SUCCESS(f"{len(assets)} assets written to {ASSETS_CONFIG['build_dir']}"))
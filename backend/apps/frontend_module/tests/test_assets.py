@@ -0,0 +1,88 @@
+import gzip
+import tempfile
+from pathlib import Path
+from unittest import mock
+from django.test import RequestFactory, SimpleTestCase
+from apps.frontend_module import assets
+from apps.frontend_module.assets import (
+    ASSETS_CONFIG, AssetManifest, accepted_encodings, build_assets, content_hash, fingerprinted_name,
+)
+
+
+SCRIPT='console.log("login");\n'*50
+PAGE='<html><script src="js/login.js"></script><link href="https://cdn.example.com/x.css"></html>'
+
+
+class AssetBuildTests(SimpleTestCase):
+    def setUp(self):
+        directory=tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.root=Path(directory.name)/'src'
+        (self.root/'js').mkdir(parents=True)
+        (self.root/'pages').mkdir()
+        (self.root/'js'/'login.js').write_text(SCRIPT)
+        (self.root/'js'/'tiny.js').write_text('1;')
+        (self.root/'index.html').write_text(PAGE)
+        (self.root/'pages'/'private.html').write_text('<p>private</p>')
+        self.config={**ASSETS_CONFIG, 'source_root':self.root, 'build_dir':Path(directory.name)/'build',
+                     'pages':('index.html', 'pages/*.html'), 'static':('js/*.js',),
+                     'private':('pages/private.html',), 'min_compress_size':64}
+        self.manifest=build_assets(self.config)
+        served=AssetManifest(self.config['build_dir'])
+        for module in ('apps.frontend_module.assets', 'apps.frontend_module.views'):
+            patcher=mock.patch(f"{module}.manifest", served)
+            patcher.start()
+            self.addCleanup(patcher.stop)
+
+    def fingerprinted(self)->str:
+        return fingerprinted_name('js/login.js', content_hash(SCRIPT.encode()))
+
+    def test_build_fingerprints_scripts_and_rewrites_pages(self):
+        built=self.manifest['assets']
+        self.assertEqual(self.manifest['fingerprinted']['js/login.js'], self.fingerprinted())
+        self.assertTrue(built[self.fingerprinted()]['immutable'])
+        self.assertFalse(built['js/login.js']['immutable'])
+        page=(self.config['build_dir']/'index.html').read_text()
+        self.assertIn(f'src="{self.fingerprinted()}"', page)
+        self.assertIn('href="https://cdn.example.com/x.css"', page)
+        self.assertTrue(built['pages/private.html']['private'])
+
+    def test_only_compressible_files_get_variants(self):
+        built=self.manifest['assets']
+        self.assertIn('gzip', built['js/login.js']['encodings'])
+        self.assertEqual(built['js/tiny.js']['encodings'], {})
+        compressed=(self.config['build_dir']/'js'/'login.js.gz').read_bytes()
+        self.assertEqual(gzip.decompress(compressed).decode(), SCRIPT)
+
+    def test_serving_picks_an_accepted_encoding_and_revalidates(self):
+        response=self.client.get(f"/{self.fingerprinted()}", headers={'Accept-Encoding':'gzip, br;q=0'})
+        self.assertEqual(response['Content-Encoding'], 'gzip')
+        self.assertEqual(response['Cache-Control'], assets.IMMUTABLE_CACHE_CONTROL)
+        self.assertIn('Accept-Encoding', response['Vary'])
+        self.assertEqual(gzip.decompress(b''.join(response.streaming_content)).decode(), SCRIPT)
+
+        plain=self.client.get('/js/login.js')
+        self.assertNotIn('Content-Encoding', plain)
+        self.assertEqual(plain['Cache-Control'], assets.REVALIDATE_CACHE_CONTROL)
+        # Any representation's ETag validates the content
+        self.assertEqual(self.client.get('/js/login.js', headers={'If-None-Match':response['ETag']}).status_code, 304)
+
+    def test_index_private_and_unknown_assets(self):
+        self.assertEqual(self.client.get('/').status_code, 200)
+        self.assertEqual(self.client.get('/pages/private.html').status_code, 404)
+        self.assertEqual(self.client.get('/missing.js').status_code, 404)
+        self.assertEqual(self.client.post('/js/login.js').status_code, 405)
+
+    def test_manifest_reloads_after_a_rebuild(self):
+        self.assertIsNotNone(assets.manifest.get('js/tiny.js'))
+        (self.root/'js'/'tiny.js').unlink()
+        manifest_path=self.config['build_dir']/assets.MANIFEST_NAME
+        build_assets(self.config)
+        manifest_path.touch() # a distinct mtime even on coarse filesystem clocks
+        self.assertIsNone(assets.manifest.get('js/tiny.js'))
+
+
+class AcceptedEncodingTests(SimpleTestCase):
+    def test_q_zero_refuses_a_coding(self):
+        request=RequestFactory().get('/', headers={'Accept-Encoding':'gzip;q=0, br, deflate;q=0.5'})
+        self.assertEqual(accepted_encodings(request), {'br', 'deflate'})
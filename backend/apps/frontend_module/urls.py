@@ -0,0 +1,7 @@
+from django.urls import path
+from apps.frontend_module.views import serve_asset
+
+urlpatterns=[
+    path('', serve_asset),
+    path('<path:asset_path>', serve_asset),
+]
@@ -0,0 +1,12 @@
+from django.http import Http404
+from django.views.decorators.http import require_safe
+from apps.frontend_module.assets import asset_response, manifest
+
+
+@require_safe
+def serve_asset(request, asset_path:str='index.html'):
+    """Serves a built frontend asset (run `manage.py build_assets` first)."""
+    asset=manifest.get(asset_path)
+    if asset is None or asset['private']:
+        raise Http404('Unknown asset.')
+    return asset_response(request, asset_path, asset)
@@ -0,0 +1,130 @@
+"""
+Pragma profile autotuning: runs the same synthetic workload under every PRAGMA_PROFILES entry.
+
+For each profile, a fresh scratch database file (so page_size applies) is
+    seeded      `rows` users inserted in batches of 1,000 per transaction (bulk load)
+    read        login-style point lookups by email, single thread
+    mixed       `threads` clients doing lookups with `write_ratio` of single-row inserts
+The best profile is the one with the highest mixed throughput; the read and seed winners are reported
+too, since a database with a clear workload (users vs analytics) may prefer those.
+"""
+
+import os
+import random
+import shutil
+import tempfile
+import threading
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+from config import sqlconfig
+from benchmarks.micro import measure
+from benchmarks.report import summarize
+
+
+USERS_TABLE:str="CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, email TEXT UNIQUE, password TEXT)"
+INSERT_USER:str="INSERT INTO users (username, email, password) VALUES (?, ?, ?)"
+LOOKUP_USER:str="SELECT id, password FROM users WHERE email = ?"
+PASSWORD:str='pbkdf2_sha256$600000$'+'s'*22+'$'+'h'*44 # hash-sized value, like a real row
+
+
+def _seed(pool, rows:int)->Dict[str, float]:
+    """Inserts users in batches of 1,000 per transaction; one latency sample per batch."""
+    latencies=[]
+    started=time.perf_counter()
+    conn=pool.checkout()
+    try:
+        for batch_start in range(0, rows, 1_000):
+            batch_started=time.perf_counter()
+            conn.execute('BEGIN')
+            conn.executemany(INSERT_USER, ((f"user{i}", f"user{i}@example.com", PASSWORD)
+                                           for i in range(batch_start, min(rows, batch_start+1_000))))
+            conn.execute('COMMIT')
+            latencies.append(time.perf_counter()-batch_started)
+    finally:
+        pool.checkin(conn)
+    return summarize(latencies, time.perf_counter()-started)
+
+
+def _lookup(pool, rows:int, generator:random.Random)->None:
+    conn=pool.checkout()
+    try:
+        conn.execute(LOOKUP_USER, (f"user{generator.randrange(rows)}@example.com",)).fetchone()
+    finally:
+        pool.checkin(conn)
+
+
+def _mixed(pool, rows:int, operations:int, threads:int, write_ratio:float)->Dict[str, float]:
+    """`threads` clients sharing `operations`; inserts take a fresh username each."""
+    latencies:List[float]=[]
+    errors=[0]
+    lock=threading.Lock()
+    next_user=[rows]
+
+    def client(seed:int, count:int)->None:
+        generator=random.Random(seed)
+        local=[]
+        for _ in range(count):
+            started=time.perf_counter()
+            try:
+                if generator.random()<write_ratio:
+                    with lock:
+                        next_user[0]+=1
+                        index=next_user[0]
+                    conn=pool.checkout()
+                    try:
+                        conn.execute(INSERT_USER, (f"user{index}", f"user{index}@example.com", PASSWORD))
+                    finally:
+                        pool.checkin(conn)
+                else:
+                    _lookup(pool, rows, generator)
+            except Exception:
+                with lock:
+                    errors[0]+=1
+                continue
+            local.append(time.perf_counter()-started)
+        with lock:
+            latencies.extend(local)
+
+    workers=[threading.Thread(target=client, args=(seed, operations//threads)) for seed in range(threads)]
+    started=time.perf_counter()
+    for worker in workers:
+        worker.start()
+    for worker in workers:
+        worker.join()
+    return summarize(latencies, time.perf_counter()-started, errors[0])
+
+
+def run_autotune(rows:int=50_000, reads:int=20_000, operations:int=20_000, threads:int=4, write_ratio:float=0.1,
+                 profiles:Optional[Sequence[str]]=None, directory:Optional[str]=None)->Tuple[Dict[str, Dict[str, float]], Dict[str, str]]:
+    """
+    Runs the workload under each profile.
+    Returns:
+        (results by 'autotune.<profile>.<phase>', best profile by 'seed'/'read'/'mixed')
+    """
+    results:Dict[str, Dict[str, float]]={}
+    workdir=directory or tempfile.mkdtemp(prefix='azubi-autotune-')
+    try:
+        for profile in profiles or list(sqlconfig.PRAGMA_PROFILES):
+            db_path=os.path.join(workdir, f"{profile}.sqlite3")
+            pool=sqlconfig.create_sqlite_pool(db_path, 1, threads, profile=profile, reap_interval=0)
+            conn=pool.checkout()
+            conn.execute(USERS_TABLE)
+            pool.checkin(conn)
+
+            results[f"autotune.{profile}.seed"]=_seed(pool, rows)
+            generator=random.Random(0)
+            results[f"autotune.{profile}.read"]=measure(lambda index: _lookup(pool, rows, generator), reads)
+            results[f"autotune.{profile}.mixed"]=_mixed(pool, rows, operations, threads, write_ratio)
+            pool.close()
+    finally:
+        sqlconfig.clear_sqlite_pools()
+        if directory is None:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+    best={}
+    for phase, better in (('seed', lambda summary: summary['ops_per_sec']),
+                          ('read', lambda summary: -summary['p50_ms']),
+                          ('mixed', lambda summary: summary['ops_per_sec'])):
+        phase_results={name.split('.')[1]:summary for name, summary in results.items() if name.endswith(f".{phase}")}
+        best[phase]=max(phase_results, key=lambda profile: better(phase_results[profile]))
+    return results, best
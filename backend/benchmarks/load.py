@@ -0,0 +1,119 @@
+"""
+Local load generator for the auth endpoints.
+
+Drives /auth/register/ then /auth/login/ for `users` fresh accounts through Django's test client
+(one client per worker thread), or through AsyncClient with the async views. Storage is the pooled
+SQLite stand-in from benchmarks.settings, so no network database is involved.
+"""
+
+import asyncio
+import json
+import os
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Tuple
+from benchmarks.report import summarize
+
+
+def setup_django(async_views:bool=False)->None:
+    """Configures Django with benchmarks.settings and creates the schema. Call once, before any request."""
+    os.environ['DJANGO_SETTINGS_MODULE']='benchmarks.settings'
+    os.environ['DJANGO_ASYNC_VIEWS']='true' if async_views else 'false'
+    import django
+    django.setup()
+    from django.core.management import call_command
+    from django.db import connections
+    call_command('migrate', verbosity=0)
+    connections.close_all()
+
+
+def _registration(index:int, run_id:str)->Dict[str, str]:
+    return {'username':f"bench{run_id}u{index}", 'email':f"bench{run_id}u{index}@example.com",
+            'password':f"bench-password-{index}"}
+
+
+def _phase_requests(users:int, run_id:str)->List[Tuple[str, List[Tuple[str, dict, int]]]]:
+    """(phase name, [(path, body, expected status)]) for each phase, in order."""
+    registrations=[_registration(index, run_id) for index in range(users)]
+    return [
+        ('http.register', [('/auth/register/', body, 201) for body in registrations]),
+        ('http.login', [('/auth/login/', {'email':body['email'], 'password':body['password']}, 200)
+                        for body in registrations]),
+        ('http.register_duplicate', [('/auth/register/', body, 400) for body in registrations]),
+    ]
+
+
+def _run_threaded(requests:List[Tuple[str, dict, int]], concurrency:int)->Dict[str, float]:
+    from django.db import close_old_connections
+    from django.test import Client
+    latencies:List[float]=[]
+    errors=[0]
+    lock=threading.Lock()
+    position=iter(range(len(requests)))
+
+    def worker()->None:
+        client=Client()
+        local_latencies, local_errors=[], 0
+        while True:
+            with lock:
+                index=next(position, None)
+            if index is None:
+                break
+            path, body, expected=requests[index]
+            started=time.perf_counter()
+            response=client.post(path, json.dumps(body), content_type='application/json')
+            # The test client skips request_finished's connection cleanup; a server would return the
+            # connection to the pool here
+            close_old_connections()
+            local_latencies.append(time.perf_counter()-started)
+            local_errors+=response.status_code!=expected
+        with lock:
+            latencies.extend(local_latencies)
+            errors[0]+=local_errors
+
+    threads=[threading.Thread(target=worker, name=f"bench-client-{index}") for index in range(concurrency)]
+    started=time.perf_counter()
+    for thread in threads:
+        thread.start()
+    for thread in threads:
+        thread.join()
+    return summarize(latencies, time.perf_counter()-started, errors[0])
+
+
+def _run_async(requests:List[Tuple[str, dict, int]], concurrency:int)->Dict[str, float]:
+    from django.test import AsyncClient
+
+    async def drive()->Dict[str, float]:
+        client=AsyncClient()
+        semaphore=asyncio.Semaphore(concurrency)
+        latencies:List[float]=[]
+        errors=0
+
+        async def send(path:str, body:dict, expected:int)->None:
+            nonlocal errors
+            async with semaphore:
+                started=time.perf_counter()
+                response=await client.post(path, json.dumps(body), content_type='application/json')
+                latencies.append(time.perf_counter()-started)
+                errors+=response.status_code!=expected
+
+        started=time.perf_counter()
+        await asyncio.gather(*(send(*request) for request in requests))
+        return summarize(latencies, time.perf_counter()-started, errors)
+
+    return asyncio.run(drive())
+
+
+def run_load(users:int=200, concurrency:int=8, async_views:bool=False,
+             pbkdf2_iterations:Optional[int]=None)->Dict[str, Dict[str, float]]:
+    """Runs each phase to completion before the next. Returns summaries by phase."""
+    from apps.authentication_module.hashers import HASHER_CONFIG
+    run:Callable=_run_async if async_views else _run_threaded
+    run_id=f"{os.getpid()}x{int(time.time())}"
+
+    configured_iterations=HASHER_CONFIG['pbkdf2_iterations']
+    HASHER_CONFIG['pbkdf2_iterations']=pbkdf2_iterations or configured_iterations
+    try:
+        return {name:run(requests, concurrency) for name, requests in _phase_requests(users, run_id)}
+    finally:
+        HASHER_CONFIG['pbkdf2_iterations']=configured_iterations
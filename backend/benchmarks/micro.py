@@ -0,0 +1,118 @@
+"""
+Microbenchmarks for sqlconfig, password hashing and auth request decoding. No Django setup needed.
+
+Each benchmark times single operations back to back on one thread against a scratch database in
+a temporary directory, so results reflect per-call overhead rather than contention (see load.py).
+The payload.* pairs time the compiled decoding layer (payloads.py) against the previous
+json.loads(request.body.decode()) path, on a valid registration and on a 1 MB hostile body.
+"""
+
+import io
+import json
+import os
+import tempfile
+import time
+from typing import Callable, Dict, Optional
+from config import sqlconfig
+from apps.authentication_module.hashers import HASHER_CONFIG, check_password, make_password
+from apps.authentication_module.payloads import REGISTRATION_PAYLOAD, PayloadError
+from benchmarks.report import summarize
+
+
+def measure(operation:Callable[[int], object], count:int)->Dict[str, float]:
+    """Calls operation(i) `count` times, timing each call."""
+    latencies=[]
+    errors=0
+    started=time.perf_counter()
+    for index in range(count):
+        call_started=time.perf_counter()
+        try:
+            operation(index)
+        except Exception:
+            errors+=1
+            continue
+        latencies.append(time.perf_counter()-call_started)
+    return summarize(latencies, time.perf_counter()-started, errors)
+
+
+class _Request:
+    """Just enough of HttpRequest for body decoding: META, read() and body."""
+
+    def __init__(self, body:bytes):
+        self.META={'CONTENT_LENGTH':str(len(body))}
+        self._stream=io.BytesIO(body)
+
+    def read(self, size:int=-1)->bytes:
+        return self._stream.read(size)
+
+    @property
+    def body(self)->bytes:
+        return self._stream.getvalue()
+
+
+def _legacy_registration(request)->tuple:
+    """The decoding register() did before payloads.py: whole body, no cap, two passes over the fields."""
+    data=json.loads(request.body.decode('utf-8'))
+    username, email, password=data.get('username'), data.get('email'), data.get('password')
+    missing_fields=[field for field in ['username', 'email', 'password'] if not data.get(field)]
+    if missing_fields:
+        return f"Missing fields: {', '.join(missing_fields)}."
+    return username, email, password
+
+
+def _compiled_registration(request)->tuple:
+    try:
+        return REGISTRATION_PAYLOAD.decode(request)
+    except PayloadError:
+        return None
+
+
+def run_micro(count:int=2_000, hash_count:int=20, pbkdf2_iterations:Optional[int]=None)->Dict[str, Dict[str, float]]:
+    """Runs every microbenchmark. Returns summaries by name."""
+    results:Dict[str, Dict[str, float]]={}
+    workdir=tempfile.mkdtemp(prefix='azubi-micro-')
+    db_path=os.path.join(workdir, 'micro.sqlite3')
+    pool_kwargs={'db_path':db_path, 'min_connections':2, 'max_connections':4}
+
+    sqlconfig.execute_sqlite_command(
+        "CREATE TABLE users (id INTEGER PRIMARY KEY AUTOINCREMENT, username TEXT UNIQUE, email TEXT UNIQUE, password TEXT)",
+        **pool_kwargs)
+    sqlconfig.execute_sqlite_command("INSERT INTO users (username, email, password) VALUES ('probe', 'probe@example.com', 'x')",
+                                     **pool_kwargs)
+
+    results['sqlite.create_connection']=measure(
+        lambda index: sqlconfig.create_sqlite_connection(db_path, **sqlconfig.SQLite_CONFIG).close(), count//10)
+
+    pool=sqlconfig.create_sqlite_pool(db_path, 2, 4)
+    results['sqlite.pool_checkout_checkin']=measure(lambda index: pool.checkin(pool.checkout()), count*10)
+
+    results['sqlite.execute_query']=measure(
+        lambda index: sqlconfig.execute_sqlite_query("SELECT id, password FROM users WHERE email = ?",
+                                                     ('probe@example.com',), **pool_kwargs), count)
+
+    results['sqlite.execute_command']=measure(
+        lambda index: sqlconfig.execute_sqlite_command("INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
+                                                       (f"micro{index}", f"micro{index}@example.com", 'x'), **pool_kwargs), count)
+
+    results['sqlite.execute_command_group_commit']=measure(
+        lambda index: sqlconfig.execute_sqlite_command("INSERT INTO users (username, email, password) VALUES (?, ?, ?)",
+                                                       (f"group{index}", f"group{index}@example.com", 'x'),
+                                                       single_writer=True, **pool_kwargs), count)
+
+    configured_iterations=HASHER_CONFIG['pbkdf2_iterations']
+    HASHER_CONFIG['pbkdf2_iterations']=pbkdf2_iterations or configured_iterations
+    try:
+        encoded=make_password('benchmark-password', 'pbkdf2_sha256')
+        results['hash.pbkdf2_make']=measure(lambda index: make_password('benchmark-password', 'pbkdf2_sha256'), hash_count)
+        results['hash.pbkdf2_check']=measure(lambda index: check_password('benchmark-password', encoded), hash_count)
+    finally:
+        HASHER_CONFIG['pbkdf2_iterations']=configured_iterations
+
+    results['hash.scrypt_make']=measure(lambda index: make_password('benchmark-password', 'scrypt'), hash_count)
+
+    valid=json.dumps({'username':'benchmark', 'email':'benchmark@example.com', 'password':'benchmark-password'}).encode()
+    hostile=json.dumps({'username':'benchmark', 'padding':'x'*1_000_000}).encode()
+    for name, body in (('register', valid), ('oversized', hostile)):
+        results[f"payload.legacy_{name}"]=measure(lambda index: _legacy_registration(_Request(body)), count)
+        results[f"payload.compiled_{name}"]=measure(lambda index: _compiled_registration(_Request(body)), count)
+    return results
@@ -0,0 +1,108 @@
+"""
+Benchmark results: latency summaries, console tables and JSON baselines.
+
+A run is saved as {'meta': {...}, 'results': {name: summary}, 'pools': [...]}; `compare()` checks a
+run against a saved baseline, metric by metric.
+"""
+
+import json
+import math
+import platform
+import sqlite3
+import sys
+import time
+from typing import Dict, List, Optional, Sequence, Tuple
+
+
+# Higher is better for throughput, lower for latency
+COMPARED_METRICS:Dict[str, int]={'ops_per_sec':1, 'p50_ms':-1, 'p95_ms':-1, 'p99_ms':-1}
+
+
+def percentile(sorted_values:Sequence[float], q:float)->float:
+    """Nearest-rank percentile of already sorted values."""
+    if not sorted_values:
+        return 0.0
+    return sorted_values[min(len(sorted_values)-1, max(0, math.ceil(q*len(sorted_values))-1))]
+
+
+def summarize(latencies:List[float], elapsed:float, errors:int=0)->Dict[str, float]:
+    """Summarizes per-operation latencies (seconds) measured over `elapsed` wall-clock seconds."""
+    ordered=sorted(latencies)
+    return {
+        'ops':len(ordered),
+        'errors':errors,
+        'ops_per_sec':len(ordered)/elapsed if elapsed else 0.0,
+        'mean_ms':sum(ordered)/len(ordered)*1000 if ordered else 0.0,
+        'p50_ms':percentile(ordered, 0.50)*1000,
+        'p95_ms':percentile(ordered, 0.95)*1000,
+        'p99_ms':percentile(ordered, 0.99)*1000,
+        'max_ms':ordered[-1]*1000 if ordered else 0.0,
+    }
+
+
+def run_metadata(**options)->Dict:
+    return {
+        'timestamp':time.strftime('%Y-%m-%dT%H:%M:%S%z'),
+        'python':sys.version.split()[0],
+        'sqlite':sqlite3.sqlite_version,
+        'platform':platform.platform(),
+        'options':options,
+    }
+
+
+def format_table(results:Dict[str, Dict[str, float]])->str:
+    """Renders results as a fixed-width table."""
+    lines=[f"{'benchmark':<34} {'ops':>7} {'err':>5} {'ops/s':>11} {'p50 ms':>9} {'p95 ms':>9} {'p99 ms':>9}"]
+    for name, summary in results.items():
+        lines.append(f"{name:<34} {summary['ops']:>7} {summary['errors']:>5} {summary['ops_per_sec']:>11.1f} "
+                     f"{summary['p50_ms']:>9.3f} {summary['p95_ms']:>9.3f} {summary['p99_ms']:>9.3f}")
+    return '\n'.join(lines)
+
+
+def format_pools(pools:List[Dict])->str:
+    lines=[]
+    for stats in pools:
+        lines.append(f"pool {stats['database_path']}: {stats['total_connections']} open "
+                     f"(effective max {stats['effective_max_connections']}, high water {stats['high_water_active_connections']}), "
+                     f"{stats['checkouts']} checkouts, {stats['exhaustion_events']} exhausted, "
+                     f"wait p95 {stats['wait_p95_seconds']*1000:.2f} ms, hold p95 {stats['hold_p95_seconds']*1000:.2f} ms")
+    return '\n'.join(lines)
+
+
+def save_run(path:str, run:Dict)->None:
+    with open(path, 'w') as handle:
+        json.dump(run, handle, indent=2, default=str)
+
+
+def load_run(path:str)->Dict:
+    with open(path) as handle:
+        return json.load(handle)
+
+
+def compare(results:Dict[str, Dict[str, float]], baseline:Dict,
+            tolerance:float=0.10)->Tuple[List[str], List[str]]:
+    """
+    Compares results with a saved run.
+    Args:
+        tolerance: Relative change tolerated before a metric counts as a regression
+    Returns:
+        (report lines, regression lines)
+    """
+    lines, regressions=[], []
+    baseline_results=baseline.get('results', {})
+    for name, summary in results.items():
+        previous:Optional[Dict]=baseline_results.get(name)
+        if previous is None:
+            lines.append(f"{name:<34} (not in baseline)")
+            continue
+        changes=[]
+        for metric, direction in COMPARED_METRICS.items():
+            before, after=previous.get(metric, 0.0), summary[metric]
+            if not before:
+                continue
+            change=(after-before)/before
+            changes.append(f"{metric} {change*100:+6.1f}%")
+            if change*direction<-tolerance:
+                regressions.append(f"{name}: {metric} {before:.3f} -> {after:.3f} ({change*100:+.1f}%)")
+        lines.append(f"{name:<34} {'  '.join(changes)}")
+    return lines, regressions
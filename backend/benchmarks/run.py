@@ -0,0 +1,91 @@
+"""
+Benchmark runner.
+
+    python -m benchmarks.run micro
+    python -m benchmarks.run load --users 500 --concurrency 16 [--async] [--database file]
+    python -m benchmarks.run all --output run.json --compare baseline.json
+    python -m benchmarks.run autotune [--rows 50000] [--profiles read_heavy,write_heavy]
+
+Run from backend/. `--save-baseline` writes the run to compare later ones against; `--compare` exits
+non-zero when a metric regresses by more than `--tolerance`. `autotune` (not part of `all`) compares
+the sqlconfig pragma profiles on scratch database files and names the best one for this machine.
+"""
+
+import argparse
+import os
+import sys
+from benchmarks.report import compare, format_pools, format_table, load_run, run_metadata, save_run
+
+
+def parse_arguments(argv=None)->argparse.Namespace:
+    parser=argparse.ArgumentParser(prog='python -m benchmarks.run', description='Auth endpoint and SQLite pool benchmarks.')
+    parser.add_argument('suite', choices=('micro', 'load', 'all', 'autotune'), nargs='?', default='all')
+    parser.add_argument('--count', type=int, default=2_000, help='Operations per SQLite microbenchmark.')
+    parser.add_argument('--hash-count', type=int, default=20, help='Operations per hashing microbenchmark.')
+    parser.add_argument('--users', type=int, default=200, help='Accounts registered and logged in by the load run.')
+    parser.add_argument('--concurrency', type=int, default=8, help='Concurrent clients in the load run.')
+    parser.add_argument('--async', dest='async_views', action='store_true', help='Drive the async views via AsyncClient.')
+    parser.add_argument('--database', choices=('memory', 'file'), default=os.environ.get('BENCH_DATABASE', 'memory'),
+                        help='SQLite stand-in for the load run.')
+    parser.add_argument('--rows', type=int, default=50_000, help='Users seeded per profile by autotune.')
+    parser.add_argument('--profiles', help='Comma-separated pragma profiles for autotune (default: all).')
+    parser.add_argument('--pbkdf2-iterations', type=int,
+                        help='Override the PBKDF2 work factor (the configured one dominates endpoint latency).')
+    parser.add_argument('--output', help='Write this run as JSON.')
+    parser.add_argument('--save-baseline', metavar='PATH', help='Write this run as the baseline to compare against.')
+    parser.add_argument('--compare', metavar='PATH', help='Compare this run with a saved baseline.')
+    parser.add_argument('--tolerance', type=float, default=0.10, help='Relative regression tolerated by --compare.')
+    return parser.parse_args(argv)
+
+
+def main(argv=None)->int:
+    options=parse_arguments(argv)
+    os.environ['BENCH_DATABASE']=options.database
+    results={}
+
+    if options.suite in ('micro', 'all'):
+        from benchmarks.micro import run_micro
+        from config.sqlconfig import clear_sqlite_pools
+        results.update(run_micro(options.count, options.hash_count, options.pbkdf2_iterations))
+        clear_sqlite_pools() # the load run reports its own pools only
+
+    best={}
+    if options.suite=='autotune':
+        from benchmarks.autotune import run_autotune
+        autotune_results, best=run_autotune(options.rows, options.count*10, options.count*10, options.concurrency,
+                                            profiles=options.profiles.split(',') if options.profiles else None)
+        results.update(autotune_results)
+
+    pools=[]
+    if options.suite in ('load', 'all'):
+        from benchmarks.load import run_load, setup_django
+        setup_django(options.async_views)
+        results.update(run_load(options.users, options.concurrency, options.async_views, options.pbkdf2_iterations))
+        from config.sqlconfig import get_all_sqlite_pool_stats
+        pools=get_all_sqlite_pool_stats()
+
+    run={'meta':run_metadata(**vars(options)), 'results':results, 'pools':pools}
+    print(format_table(results))
+    if pools:
+        print(format_pools(pools))
+    if best:
+        print(f"\nBest profile: {best['mixed']} (mixed read/write); lookups: {best['read']}; bulk load: {best['seed']}")
+        run['best_profiles']=best
+
+    for path in (options.output, options.save_baseline):
+        if path:
+            save_run(path, run)
+
+    if options.compare:
+        lines, regressions=compare(results, load_run(options.compare), options.tolerance)
+        print(f"\nAgainst {options.compare}:")
+        print('\n'.join(lines))
+        if regressions:
+            print(f"\nRegressions beyond {options.tolerance*100:.0f}%:")
+            print('\n'.join(regressions))
+            return 1
+    return 0
+
+
+if __name__=='__main__':
+    sys.exit(main())
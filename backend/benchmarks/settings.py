@@ -0,0 +1,36 @@
+"""
+Django settings for load runs: the deploy settings with pooled SQLite standing in for Supabase.
+
+BENCH_DATABASE=memory (default) keeps both databases in shared process memory; BENCH_DATABASE=file
+puts them under BENCH_DATABASE_DIR (a fresh temporary directory by default). With AUTH_USER_SHARDS
+set, the user shards follow the same choice.
+"""
+
+import os
+import tempfile
+from pathlib import Path
+
+os.environ.setdefault('DJANGO_SECRET_KEY', 'benchmark-only-secret-key')
+# Every load-run request comes from one address; set AUTH_ADMISSION_ENABLED=true to measure shedding
+os.environ.setdefault('AUTH_ADMISSION_ENABLED', 'false')
+
+from config.deploy import * # noqa: E402,F401,F403
+from config.sqlconfig import get_sqlite_database_config, shared_memory_uri # noqa: E402
+
+
+if os.environ.get('BENCH_DATABASE', 'memory')=='file':
+    _database_dir=Path(os.environ.get('BENCH_DATABASE_DIR') or tempfile.mkdtemp(prefix='azubi-bench-'))
+    os.environ.setdefault('AUTH_USER_SHARD_DIR', str(_database_dir/'shards'))
+    DATABASES={
+        'default':get_sqlite_database_config(_database_dir/'db.sqlite3', pooled=True, profile='read_heavy'),
+        'analytics':get_sqlite_database_config(_database_dir/'analytics.sqlite3', pooled=True, profile='write_heavy'),
+    }
+else:
+    os.environ.setdefault('AUTH_USER_SHARD_DIR', ':memory:')
+    DATABASES={
+        'default':get_sqlite_database_config(shared_memory_uri('bench_default'), pooled=True, profile='read_heavy'),
+        'analytics':get_sqlite_database_config(shared_memory_uri('bench_analytics'), pooled=True, profile='write_heavy'),
+    }
+
+DEBUG=False
+ALLOWED_HOSTS=['testserver', 'localhost', '127.0.0.1']
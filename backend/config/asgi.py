@@ -0,0 +1,20 @@
+"""
+ASGI entrypoint, e.g. `uvicorn config.asgi:application`.
+Set DJANGO_ASYNC_VIEWS=true to route the auth endpoints to their native async views.
+The auth endpoints' body caps are enforced here, before Django's handler reads the body.
+"""
+
+import os
+from django.core.asgi import get_asgi_application
+
+
+os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.deploy')
+
+django_application=get_asgi_application()
+
+from apps.authentication_module.payloads import BodyLimitMiddleware, LOGIN_PAYLOAD, REGISTRATION_PAYLOAD
+
+application=BodyLimitMiddleware(django_application, {
+    '/auth/register/':REGISTRATION_PAYLOAD.max_body_bytes,
+    '/auth/login/':LOGIN_PAYLOAD.max_body_bytes,
+})
@@ -0,0 +1,242 @@
+"""
+Asyncio facade over the sqlconfig SQLite pools.
+
+    pool=get_async_sqlite_pool('/path/db.sqlite3')
+    async with pool.connection() as conn:
+        rows=await conn.fetchall("SELECT id FROM users WHERE email = ?", (email,))
+    rows=await execute_sqlite_query_async("SELECT ...", params, db_path='/path/db.sqlite3')
+
+An `AsyncSQLitePool` wraps the same `SQLitePool` the blocking API uses (one set of connections
+per database, shared by sync and async callers). Checkout joins the pool's FIFO waiter queue
+without blocking the event loop: a returned connection wakes the task through the loop. Every
+sqlite3 call (opening, validating, statements, rollback on return) runs on an executor owned by
+the facade and sized to the pool's ceiling, so the loop never waits on SQLite.
+
+Timeouts raise ConnectionError like the threaded checkout. A task cancelled while queued, while
+its connection is being opened, or in the middle of a statement still returns the connection:
+it goes back to the pool once any statement running on its behalf has finished.
+"""
+
+import asyncio
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from typing import Callable, Dict, Optional
+from config.profiler import explain_sqlite, query_profiler
+from config.sqlconfig import (
+    DEFAULT_DB_PATH,
+    SQLitePool,
+    _pool_for,
+    submit_sqlite_command,
+)
+
+
+class _LoopWake:
+    """Waiter event for a task: set() is called by whichever thread grants the checkout."""
+    __slots__=('loop', 'future')
+
+    def __init__(self, loop:asyncio.AbstractEventLoop):
+        self.loop=loop
+        self.future=loop.create_future()
+
+    def _resolve(self)->None:
+        if not self.future.done():
+            self.future.set_result(None)
+
+    def set(self)->None:
+        try:
+            self.loop.call_soon_threadsafe(self._resolve)
+        except RuntimeError: # loop already closed; the waiter is withdrawn by its own timeout path
+            pass
+
+
+class AsyncSQLiteConnection:
+    """A checked-out connection whose calls run on the pool's executor, one at a time."""
+    __slots__=('raw', '_pool', '_pending')
+
+    def __init__(self, pool:'AsyncSQLitePool', raw):
+        self.raw=raw # the sqlite3 connection; only touch it from inside run()
+        self._pool=pool
+        self._pending:Optional[Future]=None
+
+    async def run(self, function:Callable, *args):
+        """Awaits function(raw connection, *args) on the executor."""
+        self._pending=self._pool.executor.submit(function, self.raw, *args)
+        return await asyncio.wrap_future(self._pending)
+
+    async def fetchall(self, sql:str, params=None)->list:
+        return await self.run(_fetchall, sql, params)
+
+    async def execute(self, sql:str, params=None)->int:
+        """Runs a statement. Returns the affected row count."""
+        return await self.run(_execute, sql, params)
+
+    async def executemany(self, sql:str, seq_of_params)->int:
+        return await self.run(lambda raw: raw.executemany(sql, seq_of_params).rowcount)
+
+    async def commit(self)->None:
+        await self.run(lambda raw: raw.commit())
+
+    async def rollback(self)->None:
+        await self.run(lambda raw: raw.rollback())
+
+    def release(self)->None:
+        """Returns the connection once nothing is running on it. Never blocks the loop."""
+        pending, self._pending=self._pending, None
+        if pending is not None and not pending.done():
+            # Cancelled mid-statement: the executor thread still owns the connection until it finishes
+            pending.add_done_callback(lambda _: self._pool.pool.checkin(self.raw))
+        elif self.raw.in_transaction:
+            self._pool.executor.submit(self._pool.pool.checkin, self.raw) # checkin rolls back
+        else:
+            self._pool.pool.checkin(self.raw)
+
+
+def _profiled(function:Callable, db_path)->Callable:
+    """Times a statement helper for the query profiler; slow plans are explained on the same connection and thread."""
+    def wrapper(raw, sql, params):
+        started=time.perf_counter()
+        result=function(raw, sql, params)
+        query_profiler.record(f"sqlconfig:{db_path}", sql, time.perf_counter()-started,
+                              lambda: explain_sqlite(raw.cursor(), sql, params))
+        return result
+    return wrapper
+
+
+def _fetchall(raw, sql:str, params)->list:
+    cursor=raw.cursor()
+    try:
+        return cursor.execute(sql, params or ()).fetchall()
+    finally:
+        cursor.close()
+
+
+def _execute(raw, sql:str, params)->int:
+    cursor=raw.cursor()
+    try:
+        return cursor.execute(sql, params or ()).rowcount
+    finally:
+        cursor.close()
+
+
+def _execute_and_commit(raw, sql:str, params)->int:
+    try:
+        affected_rows=_execute(raw, sql, params)
+        raw.commit()
+        return affected_rows
+    except Exception:
+        raw.rollback()
+        raise
+
+
+def _columns_and_rows(raw, sql:str, params)->Dict:
+    cursor=raw.cursor()
+    try:
+        cursor.execute(sql, params or ())
+        columns=[desc[0] for desc in cursor.description] if cursor.description else []
+        return {'columns':columns, 'data':cursor.fetchall()}
+    finally:
+        cursor.close()
+
+
+class AsyncSQLitePool:
+    """Awaitable, FIFO-fair checkout from a `SQLitePool`, with a bounded executor for its sqlite3 calls."""
+
+    def __init__(self, pool:SQLitePool):
+        self.pool=pool
+        self.executor=ThreadPoolExecutor(max_workers=pool.config['max_connections'],
+                                         thread_name_prefix=f"sqlite-async:{pool.db_path}")
+
+    async def checkout(self, timeout:Optional[float]=None):
+        """Awaits a raw connection (FIFO with threaded callers). Raises ConnectionError on timeout."""
+        pool=self.pool
+        timeout=pool.config['timeout'] if timeout is None else timeout
+        started=time.monotonic()
+        wake=_LoopWake(asyncio.get_running_loop())
+        conn, waiter=pool._enqueue(wake)
+        if waiter is not None:
+            try:
+                await asyncio.wait((wake.future,), timeout=timeout)
+            except asyncio.CancelledError:
+                pool._withdraw(waiter)
+                raise
+            conn=pool._settle(waiter, started)
+
+        if conn is not None and pool._is_warm(conn):
+            return pool._checked_out(conn, started) # the common case needs no sqlite3 call
+        connecting=self.executor.submit(pool._connect, conn, started)
+        try:
+            return await asyncio.wrap_future(connecting)
+        except asyncio.CancelledError:
+            if connecting.cancel() or connecting.cancelled():
+                pool._give_back(conn) # never ran: return the idle connection or the reserved slot
+            else:
+                connecting.add_done_callback(
+                    lambda done: done.exception() is None and pool.checkin(done.result()))
+            raise
+
+    @asynccontextmanager
+    async def connection(self, timeout:Optional[float]=None):
+        """`async with pool.connection() as conn:` yields an `AsyncSQLiteConnection`."""
+        conn=AsyncSQLiteConnection(self, await self.checkout(timeout))
+        try:
+            yield conn
+        finally:
+            conn.release()
+
+    async def execute_query(self, sql:str, params=None, timeout:Optional[float]=None)->Dict:
+        """Runs a SELECT. Returns {'columns': [...], 'data': rows} like execute_sqlite_query()."""
+        run=_profiled(_columns_and_rows, self.pool.db_path) if query_profiler.enabled else _columns_and_rows
+        async with self.connection(timeout) as conn:
+            return await conn.run(run, sql, params)
+
+    async def execute_command(self, sql:str, params=None, timeout:Optional[float]=None)->int:
+        """Runs INSERT/UPDATE/DELETE and commits. Returns the affected row count."""
+        run=_profiled(_execute_and_commit, self.pool.db_path) if query_profiler.enabled else _execute_and_commit
+        async with self.connection(timeout) as conn:
+            return await conn.run(run, sql, params)
+
+    def close(self)->None:
+        self.executor.shutdown(wait=False)
+
+
+# Facades by pool; a pool replaced after a fork or by clear_sqlite_pools() gets a new facade
+_async_pools:Dict[int, AsyncSQLitePool]={}
+_async_pools_lock=threading.Lock()
+
+
+def get_async_sqlite_pool(db_path=DEFAULT_DB_PATH, **kwargs)->AsyncSQLitePool:
+    """The async facade over the pool `sqlite_connection(db_path, **kwargs)` would use."""
+    pool=_pool_for(db_path, kwargs)
+    facade=_async_pools.get(id(pool))
+    if facade is not None and facade.pool is pool:
+        return facade
+    with _async_pools_lock:
+        facade=_async_pools.get(id(pool))
+        if facade is None or facade.pool is not pool:
+            for key, stale in list(_async_pools.items()):
+                if stale.pool._closed:
+                    stale.close()
+                    del _async_pools[key]
+            facade=_async_pools[id(pool)]=AsyncSQLitePool(pool)
+    return facade
+
+
+@asynccontextmanager
+async def sqlite_connection_async(db_path=DEFAULT_DB_PATH, timeout:Optional[float]=None, **kwargs):
+    """Async counterpart of sqlite_connection()."""
+    async with get_async_sqlite_pool(db_path, **kwargs).connection(timeout) as conn:
+        yield conn
+
+
+async def execute_sqlite_query_async(sql, params=None, db_path=DEFAULT_DB_PATH, **kwargs)->Dict:
+    """Async counterpart of execute_sqlite_query() (rows mode)."""
+    return await get_async_sqlite_pool(db_path, **kwargs).execute_query(sql, params)
+
+
+async def execute_sqlite_command_async(sql, params=None, db_path=DEFAULT_DB_PATH, **kwargs)->int:
+    """Async counterpart of execute_sqlite_command(); single_writer=True awaits the group-commit writer."""
+    if kwargs.get('single_writer'):
+        return (await asyncio.wrap_future(submit_sqlite_command(sql, params, db_path, **kwargs))).rowcount
+    return await get_async_sqlite_pool(db_path, **kwargs).execute_command(sql, params)
@@ -13,6 +13,9 @@ class BaseConfiguration:
         self._secret_key=os.environ.get('DJANGO_SECRET_KEY')
         self.base_dir=Path(__file__).resolve().parent.parent.parent
         self._root_urlconf='config.urls'
+        self._sqlite_pool_enabled=os.environ.get('DJANGO_SQLITE_POOL', 'false').lower()=='true'
+        self._async_views_enabled=os.environ.get('DJANGO_ASYNC_VIEWS', 'false').lower()=='true'
+        self._sqlite_in_memory=os.environ.get('DJANGO_SQLITE_MEMORY', 'false').lower()=='true'
 
         self._validate_environ()
 
@@ -37,7 +40,10 @@ class BaseConfiguration:
         third_party:list=[
             'corsheaders', # for cross-origin communication with frontend
         ]
-        project_built:list=[]
+        project_built:list=[
+            'apps.authentication_module',
+            'apps.frontend_module',
+        ]
 
         # if len(third_party)==0 or len(project_built)==0:
         #     return []
@@ -48,12 +54,16 @@ class BaseConfiguration:
     def middleware(self)->List[str]:
         """List of deployed middleware."""
         default:list=[
+            'config.snapshot.ConfigReloadMiddleware', # hot reload of DEV_CONFIG_FILE; first, so ALLOWED_HOSTS edits apply at once
             'django.middleware.security.SecurityMiddleware',
             'corsheaders.middleware.CorsMiddleware',
             'django.middleware.common.CommonMiddleware',
             'django.middleware.csrf.CsrfViewMiddleware',
         ]
-        custom:list=[]
+        custom:list=[
+            'config.instrumentation.InstrumentationMiddleware', # latency/query metrics, see /metrics
+            'apps.authentication_module.middleware.SessionTokenMiddleware', # stateless session tokens, no DB access
+        ]
         
         return default+custom
     
@@ -61,6 +71,21 @@ class BaseConfiguration:
     def root_url_configurations(self)->str:
         """URL path configurations."""
         return self._root_urlconf
+
+    @property
+    def sqlite_pool_enabled(self)->bool:
+        """Serve databases from local pooled SQLite files instead of the remote Postgres instance."""
+        return self._sqlite_pool_enabled
+
+    @property
+    def async_views_enabled(self)->bool:
+        """Route auth endpoints to their `async def` views (serve through config.asgi)."""
+        return self._async_views_enabled
+
+    @property
+    def sqlite_in_memory(self)->bool:
+        """Keep the pooled SQLite databases in shared process memory (tests and benchmarks)."""
+        return self._sqlite_in_memory
     
 
 @lru_cache(maxsize=1)
@@ -1,37 +1,46 @@
 from pathlib import Path
-from config.base import base_configurations
-from config.development import development_configurations
-# from config.sqlconfig import get_sqlite_database_config
+from config.snapshot import configuration
+from config.sqlconfig import get_sqlite_database_config, shared_memory_uri
 
-# Environment-specific configurations (to be configured later for dynamic loading)
-DEBUG:bool=development_configurations.debug
-ALLOWED_HOSTS:list=development_configurations.allowed_hosts
-CORS_ALLOW_ALL_ORIGINS:bool=development_configurations.cors_allow_all_origins
+# Environment-specific configurations, from the configuration snapshot (DEV_CONFIG_FILE edits hot-reload these three)
+DEBUG:bool=configuration.debug
+ALLOWED_HOSTS:list=list(configuration.allowed_hosts)
+CORS_ALLOW_ALL_ORIGINS:bool=configuration.cors_allow_all_origins
 # CORS_ALLOWED_ORIGINS:list=development_configurations.cors_allowed_origins
 
 # Base Django configurations
-INSTALLED_APPS:list=base_configurations.installed_apps
-MIDDLEWARE:list=base_configurations.middleware
-SECRET_KEY:str=base_configurations.secret_key
-BASE_DIR:Path=base_configurations.base_dir
-ROOT_URLCONF:str=base_configurations.root_url_configurations
+INSTALLED_APPS:list=list(configuration.installed_apps)
+MIDDLEWARE:list=list(configuration.middleware)
+SECRET_KEY:str=configuration.secret_key
+BASE_DIR:Path=configuration.base_dir
+ROOT_URLCONF:str=configuration.root_url_configurations
+ASYNC_AUTH_VIEWS:bool=configuration.async_views_enabled
 
 # Database configurations (to be reconfigured to accept dynamic loading of preferred configurations)
-# DATABASES={
-#     'default':get_sqlite_database_config('db.sqlite3'),
-#     'analytics':get_sqlite_database_config('analytics.sqlite3'),
-# }
-
-DATABASES = {
-    'default': {
-        'ENGINE': 'django.db.backends.postgresql',
-        'NAME': 'postgres',
-        'USER': 'postgres',
-        'PASSWORD': 'azubiPass@22',  # may escape this if needed
-        'HOST': 'db.sbqtkuxgbpadbemnbjyf.supabase.co',
-        'PORT': '5432',
+# Set DJANGO_SQLITE_POOL=true to serve from pooled SQLite files (pragmas applied once per pooled connection),
+# and DJANGO_SQLITE_MEMORY=true as well to keep them in shared process memory instead.
+# Pragma profiles follow the workload: users are mostly looked up, analytics mostly appended to
+if configuration.sqlite_pool_enabled and configuration.sqlite_in_memory:
+    DATABASES={
+        'default':get_sqlite_database_config(shared_memory_uri('default'), pooled=True, profile='read_heavy'),
+        'analytics':get_sqlite_database_config(shared_memory_uri('analytics'), pooled=True, profile='write_heavy'),
+    }
+elif configuration.sqlite_pool_enabled:
+    DATABASES={
+        'default':get_sqlite_database_config(BASE_DIR/'db.sqlite3', pooled=True, profile='read_heavy'),
+        'analytics':get_sqlite_database_config(BASE_DIR/'analytics.sqlite3', pooled=True, profile='write_heavy'),
+    }
+else:
+    DATABASES = {
+        'default': {
+            'ENGINE': 'django.db.backends.postgresql',
+            'NAME': 'postgres',
+            'USER': 'postgres',
+            'PASSWORD': 'azubiPass@22',  # may escape this if needed
+            'HOST': 'db.sbqtkuxgbpadbemnbjyf.supabase.co',
+            'PORT': '5432',
+        }
     }
-}
 
 
 # Other settings
@@ -0,0 +1,215 @@
+"""
+Request timing and query-count instrumentation, exposed at /metrics in Prometheus text format.
+
+`InstrumentationMiddleware` times every request per matched route. Database statements are
+timed by an execute wrapper installed on each connection as it is created, so queries run on
+sync_to_async worker threads are attributed to their request as well (the per-request tally
+lives in a ContextVar, which asgiref copies into those threads). The same wrapper feeds the
+opt-in slow-query profiler (config.profiler).
+
+/metrics answers only clients in DJANGO_METRICS_ALLOWED_IPS (addresses or networks; loopback by
+default) or presenting `Authorization: Bearer <DJANGO_METRICS_TOKEN>`, so route names, pool paths
+and traffic volumes are not published to everyone.
+"""
+
+import hmac
+import ipaddress
+import os
+import time
+from contextvars import ContextVar
+from typing import List, Optional
+from asgiref.sync import iscoroutinefunction, markcoroutinefunction
+from django.db import connections
+from django.db.backends.signals import connection_created
+from django.http import HttpResponse, HttpResponseForbidden
+from config import metrics
+from config.profiler import explain_postgres, explain_sqlite, query_profiler
+from config.sqlconfig import get_all_sqlite_pools, get_all_sqlite_writers, get_cached_pools
+
+
+REQUEST_DURATION=metrics.histogram(
+    'http_request_duration_seconds', 'Request latency by route.', ('view', 'method'))
+REQUEST_QUERIES=metrics.histogram(
+    'http_request_db_queries', 'Database statements executed per request.', ('view',), metrics.COUNT_BUCKETS)
+REQUEST_DB_TIME=metrics.histogram(
+    'http_request_db_seconds', 'Time spent in database statements per request.', ('view',))
+RESPONSES=metrics.counter(
+    'http_responses_total', 'Responses by route and status code.', ('view', 'status'))
+QUERY_DURATION=metrics.histogram(
+    'db_query_duration_seconds', 'Database statement latency by connection alias.', ('alias', 'vendor'))
+
+METRICS_CONFIG={
+    'token':os.environ.get('DJANGO_METRICS_TOKEN'), # bearer token for scrapers outside the allowlist; unset disables it
+    'allowed_networks':tuple(ipaddress.ip_network(network.strip(), strict=False) for network in
+                             os.environ.get('DJANGO_METRICS_ALLOWED_IPS', '127.0.0.1,::1').split(',') if network.strip()),
+}
+
+# [statement count, seconds] for the request being served in this context
+_request_queries:ContextVar[Optional[list]]=ContextVar('request_queries', default=None)
+
+
+class _QueryTimer:
+    """Execute wrapper timing every statement on one connection."""
+    __slots__=('histogram',)
+
+    def __init__(self, alias:str, vendor:str):
+        self.histogram=QUERY_DURATION.labels(alias, vendor)
+
+    def __call__(self, execute, sql, params, many, context):
+        started=time.perf_counter()
+        try:
+            return execute(sql, params, many, context)
+        finally:
+            elapsed=time.perf_counter()-started
+            self.histogram.observe(elapsed)
+            tally=_request_queries.get()
+            if tally is not None:
+                tally[0]+=1
+                tally[1]+=elapsed
+            if query_profiler.enabled:
+                connection=context['connection']
+                query_profiler.record(f"django:{connection.alias}", sql, elapsed,
+                                      lambda: _explain(connection, sql, params[0] if many and params else params))
+
+
+def _explain(connection, sql:str, params)->List[str]:
+    """Plan for a statement, on a cursor that bypasses the execute wrappers (so EXPLAIN is not itself counted)."""
+    cursor=connection.create_cursor()
+    try:
+        if connection.vendor=='sqlite':
+            return explain_sqlite(cursor, sql, params)
+        return explain_postgres(cursor, sql, params)
+    finally:
+        cursor.close()
+
+
+def install_query_timer(sender, connection, **kwargs)->None:
+    """Adds the query timer to a connection once (connection_created fires on every reconnect)."""
+    if not any(isinstance(wrapper, _QueryTimer) for wrapper in connection.execute_wrappers):
+        connection.execute_wrappers.append(_QueryTimer(connection.alias, connection.vendor))
+
+
+connection_created.connect(install_query_timer, dispatch_uid='config.instrumentation.install_query_timer')
+
+
+def _instrument_open_connections()->None:
+    """Covers connections opened before this module was imported (e.g. by management commands)."""
+    for connection in connections.all(initialized_only=True):
+        install_query_timer(None, connection)
+
+
+_instrument_open_connections() # every later connection gets the timer through connection_created
+
+
+class InstrumentationMiddleware:
+    """Records per-route latency, status codes and database usage. Works under WSGI and ASGI."""
+    sync_capable=True
+    async_capable=True
+
+    def __init__(self, get_response):
+        self.get_response=get_response
+        if iscoroutinefunction(get_response):
+            markcoroutinefunction(self)
+
+    def __call__(self, request):
+        if iscoroutinefunction(self):
+            return self.__acall__(request)
+        tally=[0, 0.0]
+        token=_request_queries.set(tally)
+        started=time.perf_counter()
+        try:
+            response=self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._record(request, response, started, tally)
+        return response
+
+    async def __acall__(self, request):
+        tally=[0, 0.0]
+        token=_request_queries.set(tally)
+        started=time.perf_counter()
+        try:
+            response=await self.get_response(request)
+        finally:
+            _request_queries.reset(token)
+        self._record(request, response, started, tally)
+        return response
+
+    @staticmethod
+    def _record(request, response, started:float, tally:list)->None:
+        elapsed=time.perf_counter()-started
+        match=getattr(request, 'resolver_match', None)
+        view=match.route if match else 'unmatched'
+        REQUEST_DURATION.labels(view, request.method).observe(elapsed)
+        REQUEST_QUERIES.labels(view).observe(tally[0])
+        REQUEST_DB_TIME.labels(view).observe(tally[1])
+        RESPONSES.inc(view, str(response.status_code))
+
+
+def _pool_lines()->List[str]:
+    pools=get_all_sqlite_pools()
+    stats=[pool.stats() for pool in pools]
+    lines=[]
+    for key, documentation in (('total_connections', 'Open pooled SQLite connections.'),
+                               ('available_connections', 'Idle pooled SQLite connections.'),
+                               ('active_connections', 'Checked-out pooled SQLite connections.'),
+                               ('max_connections', 'Configured pool ceiling.'),
+                               ('effective_max_connections', 'Pool ceiling currently applied (autosized).'),
+                               ('high_water_active_connections', 'Most connections checked out at once.')):
+        lines+=metrics.render_gauge(f"sqlite_pool_{key}", documentation,
+                                    (({'database':str(pool_stats['database_path'])}, pool_stats[key]) for pool_stats in stats))
+    for key, documentation in (('exhaustion_events', 'Checkouts that timed out on an exhausted pool.'),
+                               ('checkouts', 'Successful checkouts.')):
+        lines+=metrics.render_counter(f"sqlite_pool_{key}_total", documentation,
+                                      (({'database':str(pool_stats['database_path'])}, pool_stats[key]) for pool_stats in stats))
+
+    for kind, documentation in (('wait', 'Time callers waited to check out a pooled connection.'),
+                                ('hold', 'Time pooled connections were held before being returned.')):
+        lines+=metrics.render_histograms(f"sqlite_pool_{kind}_seconds", documentation,
+                                         (({'database':str(pool.db_path)}, pool.histograms()[kind]) for pool in pools))
+
+    writers=get_all_sqlite_writers()
+    writer_stats=[writer.stats() for writer in writers]
+    lines+=metrics.render_gauge('sqlite_writer_queued', 'Writes waiting for the group-commit writer.',
+                                (({'database':str(stats['database_path'])}, stats['queued']) for stats in writer_stats))
+    for key, documentation in (('batches', 'Group commits made.'),
+                               ('statements', 'Statements applied by the group-commit writer.'),
+                               ('failed_statements', 'Statements the group-commit writer rejected.')):
+        lines+=metrics.render_counter(f"sqlite_writer_{key}_total", documentation,
+                                      (({'database':str(stats['database_path'])}, stats[key]) for stats in writer_stats))
+    lines+=metrics.render_histograms('sqlite_writer_batch_size', 'Statements per group commit.',
+                                     (({'database':str(writer.db_path)}, writer.histograms()['batch_size']) for writer in writers))
+    lines+=metrics.render_histograms('sqlite_writer_commit_seconds', 'Time to apply and commit one group.',
+                                     (({'database':str(writer.db_path)}, writer.histograms()['commit']) for writer in writers))
+
+    cache_info=get_cached_pools()
+    lines+=metrics.render_counter('sqlite_pool_cache_lookups_total', 'SQLite pool cache lookups.', [
+        ({'result':'hit'}, cache_info.hits),
+        ({'result':'miss'}, cache_info.misses),
+    ])
+    lines+=metrics.render_gauge('sqlite_pool_cache_size', 'Pools held by the SQLite pool cache.', [({}, cache_info.currsize)])
+    return lines
+
+
+def metrics_allowed(request)->bool:
+    """Whether a request may scrape: from an allowed address, or with the metrics bearer token."""
+    try:
+        address=ipaddress.ip_address(request.META.get('REMOTE_ADDR', ''))
+    except ValueError:
+        address=None
+    if address is not None and address.version==6 and address.ipv4_mapped: # dual-stack listeners
+        address=address.ipv4_mapped
+    if address is not None and any(address in network for network in METRICS_CONFIG['allowed_networks']):
+        return True
+    expected_token=METRICS_CONFIG['token']
+    scheme, _, supplied_token=request.headers.get('Authorization', '').partition(' ')
+    return bool(expected_token) and scheme.lower()=='bearer' and \
+        hmac.compare_digest(supplied_token.encode(), expected_token.encode())
+
+
+def metrics_view(request):
+    """Prometheus scrape endpoint."""
+    if not metrics_allowed(request):
+        return HttpResponseForbidden('Metrics are not available to this client.')
+    lines=metrics.render_registry()+_pool_lines()
+    return HttpResponse('\n'.join(lines)+'\n', content_type='text/plain; version=0.0.4; charset=utf-8')
@@ -0,0 +1,170 @@
+"""
+Lightweight in-process metrics with Prometheus text exposition.
+
+Only the standard library is used, so any module (including config.sqlconfig) can record
+metrics without importing Django. Observations take one short lock per histogram.
+"""
+
+import threading
+from bisect import bisect_left
+from typing import Dict, Iterable, List, Optional, Tuple
+
+
+# Latency buckets in seconds, from sub-millisecond SQLite reads up to multi-second remote round trips
+DEFAULT_BUCKETS:Tuple[float, ...]=(0.0005, 0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0)
+COUNT_BUCKETS:Tuple[float, ...]=(0, 1, 2, 3, 5, 10, 25, 50, 100)
+
+
+def _format_labels(labels:Dict[str, str], extra:Optional[Tuple[str, str]]=None)->str:
+    pairs=list(labels.items())+([extra] if extra else [])
+    if not pairs:
+        return ''
+    escaped=(str(value).replace('\\', '\\\\').replace('"', '\\"').replace('\n', '\\n') for _, value in pairs)
+    return '{'+','.join(f'{name}="{value}"' for (name, _), value in zip(pairs, escaped))+'}'
+
+
+def _format_value(value:float)->str:
+    if value==float('inf'):
+        return '+Inf'
+    return repr(float(value)) if isinstance(value, float) else str(value)
+
+
+class Histogram:
+    """Cumulative-bucket histogram."""
+    __slots__=('buckets', 'counts', 'sum', 'count', 'max', '_lock')
+
+    def __init__(self, buckets:Iterable[float]=DEFAULT_BUCKETS):
+        self.buckets=tuple(sorted(buckets))
+        self.counts=[0]*(len(self.buckets)+1) # last slot is +Inf
+        self.sum=0.0
+        self.count=0
+        self.max=0.0
+        self._lock=threading.Lock()
+
+    def observe(self, value:float)->None:
+        index=bisect_left(self.buckets, value)
+        with self._lock:
+            self.counts[index]+=1
+            self.sum+=value
+            self.count+=1
+            if value>self.max:
+                self.max=value
+
+    def quantile(self, q:float)->float:
+        """Approximate quantile (upper bound of the bucket holding it)."""
+        with self._lock:
+            counts, total=list(self.counts), self.count
+        if not total:
+            return 0.0
+        rank=q*total
+        running=0
+        for index, bucket_count in enumerate(counts):
+            running+=bucket_count
+            if running>=rank:
+                return self.buckets[index] if index<len(self.buckets) else self.max
+        return self.max
+
+    def snapshot(self)->Tuple[List[int], float, int]:
+        """Returns (cumulative bucket counts, sum, count)."""
+        with self._lock:
+            counts, total_sum, total=list(self.counts), self.sum, self.count
+        cumulative, running=[], 0
+        for bucket_count in counts:
+            running+=bucket_count
+            cumulative.append(running)
+        return cumulative, total_sum, total
+
+
+class HistogramFamily:
+    """A named histogram split by label values."""
+
+    def __init__(self, name:str, documentation:str, labelnames:Tuple[str, ...]=(), buckets:Iterable[float]=DEFAULT_BUCKETS):
+        self.name=name
+        self.documentation=documentation
+        self.labelnames=labelnames
+        self.buckets=tuple(buckets)
+        self._children:Dict[Tuple[str, ...], Histogram]={}
+        self._lock=threading.Lock()
+
+    def labels(self, *values:str)->Histogram:
+        child=self._children.get(values)
+        if child is None:
+            with self._lock:
+                child=self._children.setdefault(values, Histogram(self.buckets))
+        return child
+
+    def render(self)->List[str]:
+        return render_histograms(self.name, self.documentation,
+                                 ((dict(zip(self.labelnames, values)), child) for values, child in list(self._children.items())))
+
+
+class CounterFamily:
+    """A named monotonic counter split by label values."""
+
+    def __init__(self, name:str, documentation:str, labelnames:Tuple[str, ...]=()):
+        self.name=name
+        self.documentation=documentation
+        self.labelnames=labelnames
+        self._values:Dict[Tuple[str, ...], float]={}
+        self._lock=threading.Lock()
+
+    def inc(self, *values:str, amount:float=1)->None:
+        with self._lock:
+            self._values[values]=self._values.get(values, 0)+amount
+
+    def render(self)->List[str]:
+        return render_counter(self.name, self.documentation,
+                              ((dict(zip(self.labelnames, values)), total) for values, total in list(self._values.items())))
+
+
+def render_histograms(name:str, documentation:str, samples:Iterable[Tuple[Dict[str, str], Histogram]])->List[str]:
+    """Renders labelled histograms in Prometheus text format."""
+    lines=[f"# HELP {name} {documentation}", f"# TYPE {name} histogram"]
+    for labels, child in samples:
+        cumulative, total_sum, total=child.snapshot()
+        for bound, bucket_count in zip(child.buckets+(float('inf'),), cumulative):
+            lines.append(f"{name}_bucket{_format_labels(labels, ('le', _format_value(bound)))} {bucket_count}")
+        lines.append(f"{name}_sum{_format_labels(labels)} {_format_value(total_sum)}")
+        lines.append(f"{name}_count{_format_labels(labels)} {total}")
+    return lines
+
+
+def render_gauge(name:str, documentation:str, samples:Iterable[Tuple[Dict[str, str], float]])->List[str]:
+    """Renders point-in-time values collected at scrape time."""
+    lines=[f"# HELP {name} {documentation}", f"# TYPE {name} gauge"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+def render_counter(name:str, documentation:str, samples:Iterable[Tuple[Dict[str, str], float]])->List[str]:
+    """Renders running totals (e.g. collected at scrape time from a pool's stats); `name` should end in _total."""
+    lines=[f"# HELP {name} {documentation}", f"# TYPE {name} counter"]
+    for labels, value in samples:
+        lines.append(f"{name}{_format_labels(labels)} {_format_value(value)}")
+    return lines
+
+
+# Process-wide registry of families, rendered in registration order
+_registry:Dict[str, object]={}
+_registry_lock=threading.Lock()
+
+
+def histogram(name:str, documentation:str, labelnames:Tuple[str, ...]=(), buckets:Iterable[float]=DEFAULT_BUCKETS)->HistogramFamily:
+    """Fetches or registers a histogram family."""
+    with _registry_lock:
+        return _registry.setdefault(name, HistogramFamily(name, documentation, labelnames, buckets))
+
+
+def counter(name:str, documentation:str, labelnames:Tuple[str, ...]=())->CounterFamily:
+    """Fetches or registers a counter family."""
+    with _registry_lock:
+        return _registry.setdefault(name, CounterFamily(name, documentation, labelnames))
+
+
+def render_registry()->List[str]:
+    """Renders every registered family."""
+    lines:List[str]=[]
+    for family in list(_registry.values()):
+        lines.extend(family.render())
+    return lines
@@ -0,0 +1,108 @@
+"""
+Pooled SQLite database backend.
+
+Select it with `get_sqlite_database_config(db_path, pooled=True)`, which sets
+ENGINE to 'config.pooled_sqlite'. Physical connections are checked out of, and
+back into, the sqlconfig pool instead of being opened and closed per request.
+
+OPTIONS: `timeout`, `transaction_mode` and `init_command` behave as with Django's SQLite backend
+(init commands run once per physical connection); anything else raises ImproperlyConfigured
+rather than being dropped on the way into the pool.
+"""
+
+import os
+from functools import lru_cache, partial
+from typing import Callable, Tuple
+from django.core.exceptions import ImproperlyConfigured
+from django.db.backends.base.base import BaseDatabaseWrapper
+from django.db.backends.sqlite3 import base as sqlite3_base
+from django.db.backends.sqlite3._functions import register as register_functions
+from django.utils.asyncio import async_unsafe
+from config.sqlconfig import (
+    SQLite_CONFIG,
+    DEFAULT_MIN_CONNECTIONS,
+    DEFAULT_MAX_CONNECTIONS,
+    DEFAULT_TIMEOUT,
+    create_sqlite_pool,
+    get_connection_from_sqlite_pool,
+    return_connection_to_sqlite_pool,
+)
+
+
+# check_same_thread is accepted because Django forces it off anyway, as the pool does
+SUPPORTED_OPTIONS:frozenset=frozenset({'timeout', 'transaction_mode', 'init_command', 'check_same_thread'})
+
+
+def prepare_django_connection(conn, init_commands:Tuple[str, ...]=())->None:
+    """Applies Django's per-connection SQLite setup. Runs once per physical connection."""
+    register_functions(conn)
+    # Regardless of the pool's pragmas: Django relies on it for ForeignKey constraints
+    conn.execute('PRAGMA foreign_keys = ON')
+    # The macOS bundled SQLite defaults legacy_alter_table ON, which prevents atomic table renames
+    conn.execute('PRAGMA legacy_alter_table = OFF')
+    for init_command in init_commands:
+        conn.execute(init_command)
+
+
+@lru_cache(maxsize=None)
+def connection_setup(init_commands:Tuple[str, ...])->Callable:
+    """The pool's on_connect hook for these init commands; one object per value, so equal settings share a pool."""
+    if not init_commands:
+        return prepare_django_connection
+    return partial(prepare_django_connection, init_commands=init_commands)
+
+
+class DatabaseWrapper(sqlite3_base.DatabaseWrapper):
+    """SQLite database wrapper backed by the sqlconfig connection pool."""
+    display_name='SQLite (pooled)'
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self._pool=None
+
+    def get_connection_params(self)->dict:
+        """Django's parameters (setting transaction_mode and init_commands), after refusing OPTIONS the pool cannot apply."""
+        unsupported=sorted(set(self.settings_dict['OPTIONS'])-SUPPORTED_OPTIONS)
+        if unsupported:
+            raise ImproperlyConfigured(
+                f"settings.DATABASES[{self.alias!r}]['OPTIONS'] sets {', '.join(map(repr, unsupported))}, "
+                f"which the pooled SQLite backend does not support. Use one of "
+                f"{', '.join(map(repr, sorted(SUPPORTED_OPTIONS)))}, or POOL_CONFIG.")
+        return super().get_connection_params()
+
+    def get_pool(self, conn_params:dict):
+        """Fetches the cached sqlconfig pool for this database alias (refetched in a forked child)."""
+        if self._pool is None or self._pool.pid!=os.getpid():
+            pool_config=self.settings_dict.get('POOL_CONFIG') or {}
+            pragmas=pool_config.get('pragmas', SQLite_CONFIG['pragmas'])
+            self._pool=create_sqlite_pool(
+                str(conn_params['database']),
+                pool_config.get('min_connections', DEFAULT_MIN_CONNECTIONS),
+                pool_config.get('max_connections', DEFAULT_MAX_CONNECTIONS),
+                timeout=conn_params.get('timeout', pool_config.get('timeout', DEFAULT_TIMEOUT)),
+                pragmas=tuple(pragmas.items()), # hashable for the pool cache key
+                detect_types=conn_params['detect_types'],
+                uri=conn_params['uri'],
+                on_connect=connection_setup(tuple(command.strip() for command in self.init_commands if command.strip())),
+            )
+        return self._pool
+
+    @async_unsafe
+    def get_new_connection(self, conn_params):
+        """Checks a warm connection out of the pool; pragmas were applied when it was opened."""
+        return get_connection_from_sqlite_pool(self.get_pool(conn_params))
+
+    @async_unsafe
+    def close(self):
+        """
+        Returns the connection to the pool. Django's SQLite backend ignores close() on in-memory
+        databases to avoid destroying them; the pool's keeper connection already keeps them alive.
+        """
+        self.validate_thread_sharing()
+        BaseDatabaseWrapper.close(self)
+
+    def _close(self):
+        """Returns the connection to the pool instead of closing it."""
+        if self.connection is not None:
+            with self.wrap_database_errors:
+                return_connection_to_sqlite_pool(self._pool, self.connection)
@@ -0,0 +1,235 @@
+"""
+Opt-in slow-query profiler (DB_PROFILER_ENABLED=true).
+
+Statements run through Django connections (see config.instrumentation) and through the sqlconfig
+execute helpers are fingerprinted (literals and placeholders replaced by `?`, IN lists and VALUES
+tuples collapsed, whitespace squeezed) and aggregated per fingerprint: count, total and max time.
+The first time a fingerprint runs slower than `slow_threshold`, its plan is captured with
+EXPLAIN QUERY PLAN (SQLite) or EXPLAIN (Postgres) and full table scans are flagged.
+
+Each process keeps its own profile and writes it to `directory` every `dump_interval` seconds and
+at exit; `manage.py query_profile` merges and prints them. Only the standard library is used.
+"""
+
+import atexit
+import json
+import os
+import re
+import tempfile
+import threading
+import time
+from typing import Callable, Dict, List, Optional, Sequence
+
+
+PROFILER_CONFIG={
+    'enabled':os.environ.get('DB_PROFILER_ENABLED', 'false').lower()=='true',
+    'slow_threshold':float(os.environ.get('DB_PROFILER_SLOW_SECONDS', 0.01)),
+    'directory':os.environ.get('DB_PROFILER_DIR', os.path.join(tempfile.gettempdir(), 'azubi-query-profiles')),
+    'dump_interval':float(os.environ.get('DB_PROFILER_DUMP_INTERVAL', 10.0)),
+    'max_fingerprints':1_000, # further statements are folded into OTHER_FINGERPRINT
+    'max_cached_statements':4_096, # raw SQL -> fingerprint memo
+}
+
+OTHER_FINGERPRINT:str='<other statements>'
+
+_STRING_LITERAL=re.compile(r"'(?:[^']|'')*'")
+_NUMBER_LITERAL=re.compile(r'(?<![\w.])-?\d+(?:\.\d+)?(?:e[+-]?\d+)?\b', re.IGNORECASE)
+_PLACEHOLDER=re.compile(r'%s|%\(\w+\)s|\$\d+|(?<!:):\w+|\?')
+_IN_LIST=re.compile(r'\bIN\s*\(\s*\?(?:\s*,\s*\?)*\s*\)', re.IGNORECASE)
+_VALUES_LIST=re.compile(r'\bVALUES\s*(\([?,\s]*\))(?:\s*,\s*\([?,\s]*\))+', re.IGNORECASE)
+_WHITESPACE=re.compile(r'\s+')
+_EXPLAINABLE=re.compile(r'^\s*(?:SELECT|INSERT|UPDATE|DELETE|REPLACE|WITH)\b', re.IGNORECASE)
+
+# Plan lines reading a whole table: SQLite "SCAN users" (but not "SCAN users USING [COVERING] INDEX ..."), Postgres "Seq Scan on users"
+_SQLITE_FULL_SCAN=re.compile(r'^SCAN (?!.*\bUSING\b.*\bINDEX\b)(?!CONSTANT ROW)(?!SUBQUERY)', re.IGNORECASE)
+_POSTGRES_FULL_SCAN=re.compile(r'\bSeq Scan on\b')
+
+
+def fingerprint(sql:str)->str:
+    """Normalizes a statement so that executions differing only in literals share one key."""
+    normalized=_STRING_LITERAL.sub('?', sql)
+    normalized=_PLACEHOLDER.sub('?', normalized)
+    normalized=_NUMBER_LITERAL.sub('?', normalized)
+    normalized=_WHITESPACE.sub(' ', normalized).strip()
+    normalized=_IN_LIST.sub('IN (...)', normalized)
+    return _VALUES_LIST.sub(r'VALUES \1, ...', normalized)
+
+
+def full_scans(plan:Sequence[str])->List[str]:
+    """Plan lines that read a whole table."""
+    return [line.strip() for line in plan
+            if _SQLITE_FULL_SCAN.match(line.strip()) or _POSTGRES_FULL_SCAN.search(line)]
+
+
+def explain_sqlite(cursor, sql:str, params)->List[str]:
+    """EXPLAIN QUERY PLAN on a DB-API SQLite cursor: one 'detail' line per plan node, indented by depth."""
+    depth:Dict[int, int]={0:-1}
+    lines=[]
+    for node_id, parent_id, _unused, detail in cursor.execute('EXPLAIN QUERY PLAN '+sql, params or ()).fetchall():
+        depth[node_id]=depth.get(parent_id, -1)+1
+        lines.append('  '*depth[node_id]+detail)
+    return lines
+
+
+def explain_postgres(cursor, sql:str, params)->List[str]:
+    cursor.execute('EXPLAIN '+sql, params or ())
+    return [row[0] for row in cursor.fetchall()]
+
+
+class QueryStats:
+    """Aggregates for one fingerprint."""
+    __slots__=('count', 'total', 'max', 'slow', 'sources', 'example', 'plan', 'full_scans')
+
+    def __init__(self, example:str):
+        self.count=0
+        self.total=0.0
+        self.max=0.0
+        self.slow=0
+        self.sources=set()
+        self.example=example
+        self.plan:Optional[List[str]]=None
+        self.full_scans:List[str]=[]
+
+    def as_dict(self)->dict:
+        return {'count':self.count, 'total':self.total, 'max':self.max, 'slow':self.slow,
+                'sources':sorted(self.sources), 'example':self.example, 'plan':self.plan,
+                'full_scans':self.full_scans}
+
+
+class QueryProfiler:
+    """Per-process statement profile."""
+
+    def __init__(self, config:dict):
+        self.config=config
+        self._stats:Dict[str, QueryStats]={}
+        self._fingerprints:Dict[str, str]={}
+        self._lock=threading.Lock()
+        self._last_dump=time.monotonic()
+
+    @property
+    def enabled(self)->bool:
+        return self.config['enabled']
+
+    def _fingerprint(self, sql:str)->str:
+        key=self._fingerprints.get(sql)
+        if key is None:
+            key=fingerprint(sql)
+            if len(self._fingerprints)<self.config['max_cached_statements']:
+                self._fingerprints[sql]=key
+        return key
+
+    def record(self, source:str, sql:str, elapsed:float,
+               explain:Optional[Callable[[], List[str]]]=None)->None:
+        """
+        Adds one execution.
+        Args:
+            source: Where it ran, e.g. 'django:default' or 'sqlconfig:/path/db.sqlite3'
+            elapsed: Seconds the statement took
+            explain: Returns the statement's plan lines; called once per fingerprint, when it first runs slow
+        """
+        key=self._fingerprint(sql)
+        slow=elapsed>=self.config['slow_threshold']
+        with self._lock:
+            stats=self._stats.get(key)
+            if stats is None:
+                if len(self._stats)>=self.config['max_fingerprints']:
+                    key=OTHER_FINGERPRINT
+                    stats=self._stats.get(key)
+                if stats is None:
+                    stats=self._stats[key]=QueryStats(sql)
+            stats.count+=1
+            stats.total+=elapsed
+            if elapsed>stats.max:
+                stats.max=elapsed
+            stats.sources.add(source)
+            capture=(slow and stats.plan is None and explain is not None and key!=OTHER_FINGERPRINT
+                     and _EXPLAINABLE.match(sql) is not None)
+            if slow:
+                stats.slow+=1
+            if capture:
+                stats.plan=[] # claimed; concurrent slow runs do not explain again
+        if capture:
+            try:
+                plan=explain()
+            except Exception as exc: # e.g. a statement that cannot be explained, or an aborted transaction
+                plan=[f"EXPLAIN failed: {exc}"]
+            stats.plan=plan
+            stats.full_scans=full_scans(plan)
+        if time.monotonic()-self._last_dump>=self.config['dump_interval']:
+            self.dump()
+
+    def snapshot(self)->Dict[str, dict]:
+        with self._lock:
+            return {key:stats.as_dict() for key, stats in self._stats.items()}
+
+    def reset(self)->None:
+        with self._lock:
+            self._stats.clear()
+
+    def _reset_after_fork(self)->None:
+        """A forked child starts an empty profile of its own (its parent's is dumped by the parent)."""
+        self._lock=threading.Lock()
+        self._stats={}
+        self._last_dump=time.monotonic()
+
+    def dump_path(self, pid:Optional[int]=None)->str:
+        return os.path.join(self.config['directory'], f"profile-{pid or os.getpid()}.json")
+
+    def dump(self)->Optional[str]:
+        """Writes this process's profile for `query_profile` to read. Returns the file path."""
+        self._last_dump=time.monotonic()
+        if not self._stats:
+            return None
+        os.makedirs(self.config['directory'], exist_ok=True)
+        path=self.dump_path()
+        temporary=f"{path}.{threading.get_ident()}.tmp"
+        with open(temporary, 'w', encoding='utf-8') as profile:
+            json.dump({'pid':os.getpid(), 'written_at':time.time(), 'statements':self.snapshot()}, profile)
+        os.replace(temporary, path)
+        return path
+
+
+def load_profiles(directory:str=PROFILER_CONFIG['directory'])->Dict[str, dict]:
+    """Merges every dumped process profile: counts and totals add up, max is the largest, plans are kept."""
+    merged:Dict[str, dict]={}
+    if not os.path.isdir(directory):
+        return merged
+    for name in sorted(os.listdir(directory)):
+        if not (name.startswith('profile-') and name.endswith('.json')):
+            continue
+        try:
+            with open(os.path.join(directory, name), encoding='utf-8') as profile:
+                statements=json.load(profile)['statements']
+        except (OSError, ValueError, KeyError):
+            continue
+        for key, stats in statements.items():
+            current=merged.get(key)
+            if current is None:
+                merged[key]=dict(stats)
+                continue
+            current['count']+=stats['count']
+            current['total']+=stats['total']
+            current['max']=max(current['max'], stats['max'])
+            current['slow']+=stats['slow']
+            current['sources']=sorted(set(current['sources'])|set(stats['sources']))
+            if not current['plan'] and stats['plan']:
+                current['plan'], current['full_scans']=stats['plan'], stats['full_scans']
+    return merged
+
+
+def clear_profiles(directory:str=PROFILER_CONFIG['directory'])->int:
+    """Deletes dumped profiles. Returns how many were removed."""
+    removed=0
+    if os.path.isdir(directory):
+        for name in os.listdir(directory):
+            if name.startswith('profile-') and name.endswith('.json'):
+                os.remove(os.path.join(directory, name))
+                removed+=1
+    return removed
+
+
+query_profiler:QueryProfiler=QueryProfiler(PROFILER_CONFIG)
+if query_profiler.enabled:
+    atexit.register(query_profiler.dump)
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=query_profiler._reset_after_fork)
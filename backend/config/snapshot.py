@@ -0,0 +1,267 @@
+"""
+Snapshotted configuration for config.deploy and the modules that need a setting at import time.
+
+    from config.snapshot import configuration
+    configuration.base_dir, configuration.debug, configuration.secret_key
+
+Values are resolved on first access, into an immutable `ConfigSnapshot`:
+    1. from the snapshot cache file, when its key still matches: the mtimes of config/base.py,
+       config/development.py, this module and the JSON config file (DEV_CONFIG_FILE), plus a hash
+       of the DJANGO_* and DEV_* environment once .env is applied
+    2. otherwise through BaseConfiguration/DevelopmentConfiguration (environment validation, JSON
+       parsing), after which the cache file is rewritten for the next process
+SECRET_KEY is never written to the cache; it is read from the environment when first used. The
+cache lives in a per-user 0700 directory (azubi-config-<uid> in the temp dir by default), is
+written through mkstemp (O_EXCL, 0600) and only trusted when it and its directory belong to this
+user and nobody else can write them; otherwise the values are resolved as if there were no cache.
+
+With DEV_CONFIG_FILE set, ConfigReloadMiddleware checks the file at most every
+DJANGO_CONFIG_RELOAD_INTERVAL seconds and, when it changed, swaps in a new snapshot and updates
+RELOADABLE_SETTINGS on django.conf.settings in that process, so workers pick edits up without a restart.
+"""
+
+import hashlib
+import json
+import os
+import stat
+import tempfile
+import threading
+import time
+from pathlib import Path
+from typing import Dict, Optional, Tuple
+from warnings import warn
+from django.core.exceptions import MiddlewareNotUsed
+from django.utils.deprecation import MiddlewareMixin
+from dotenv import load_dotenv
+
+
+load_dotenv()
+
+CONFIG_DIR:Path=Path(__file__).resolve().parent
+SOURCE_FILES:Tuple[Path, ...]=(CONFIG_DIR/'base.py', CONFIG_DIR/'development.py', Path(__file__).resolve())
+
+SNAPSHOT_CONFIG={
+    'config_file':os.environ.get('DEV_CONFIG_FILE'), # JSON read by DevelopmentConfiguration; enables hot reload
+    'cache_file':os.environ.get('DJANGO_CONFIG_CACHE', os.path.join(
+        tempfile.gettempdir(), f"azubi-config-{os.getuid() if hasattr(os, 'getuid') else 'user'}",
+        f"{hashlib.blake2b(str(CONFIG_DIR).encode(), digest_size=6).hexdigest()}.json")),
+    'cache_enabled':os.environ.get('DJANGO_CONFIG_CACHE_ENABLED', 'true').lower()=='true',
+    'reload_interval':float(os.environ.get('DJANGO_CONFIG_RELOAD_INTERVAL', 2.0)),
+    'env_prefixes':('DJANGO_', 'DEV_'),
+}
+
+# Settings name -> snapshot field, re-applied to django.conf.settings on hot reload
+RELOADABLE_SETTINGS:Dict[str, str]={
+    'DEBUG':'debug',
+    'ALLOWED_HOSTS':'allowed_hosts',
+    'CORS_ALLOW_ALL_ORIGINS':'cors_allow_all_origins',
+}
+
+
+class ConfigSnapshot:
+    """Immutable, fully resolved configuration values."""
+    __slots__=('debug', 'allowed_hosts', 'cors_allow_all_origins', 'installed_apps', 'middleware',
+               'base_dir', 'root_url_configurations', 'sqlite_pool_enabled', 'async_views_enabled', 'sqlite_in_memory')
+
+    def __init__(self, **values):
+        for field in self.__slots__:
+            object.__setattr__(self, field, values[field])
+
+    def __setattr__(self, name:str, value)->None:
+        raise AttributeError('Configuration snapshots are immutable.')
+
+    def __delattr__(self, name:str)->None:
+        raise AttributeError('Configuration snapshots are immutable.')
+
+    @property
+    def secret_key(self)->str:
+        """Read from the environment, never from the cache file."""
+        secret_key=os.environ.get('DJANGO_SECRET_KEY')
+        if not secret_key:
+            raise ValueError("'DJANGO_SECRET_KEY' variable expected, but not set.")
+        return secret_key
+
+    def as_dict(self)->dict:
+        values={field:getattr(self, field) for field in self.__slots__}
+        values['base_dir']=str(self.base_dir)
+        return values
+
+    @classmethod
+    def from_dict(cls, values:dict)->'ConfigSnapshot':
+        values=dict(values)
+        values['base_dir']=Path(values['base_dir'])
+        for field in ('allowed_hosts', 'installed_apps', 'middleware'):
+            values[field]=tuple(values[field])
+        return cls(**values)
+
+
+def resolve_snapshot(config_file:Optional[str]=None)->ConfigSnapshot:
+    """Resolves every value through the configuration classes (the slow path)."""
+    from config.base import base_config
+    from config.development import DevelopmentConfiguration
+    base=base_config()
+    development=DevelopmentConfiguration(config_file) # not the cached singleton: reloads must re-read the file
+    return ConfigSnapshot(
+        debug=development.debug,
+        allowed_hosts=tuple(development.allowed_hosts),
+        cors_allow_all_origins=development.cors_allow_all_origins,
+        installed_apps=tuple(base.installed_apps),
+        middleware=tuple(base.middleware),
+        base_dir=base.base_dir,
+        root_url_configurations=base.root_url_configurations,
+        sqlite_pool_enabled=base.sqlite_pool_enabled,
+        async_views_enabled=base.async_views_enabled,
+        sqlite_in_memory=base.sqlite_in_memory,
+    )
+
+
+def snapshot_key(config_file:Optional[str]=None)->str:
+    """Cache key over the source files' mtimes and sizes and the configuration environment."""
+    sources=[]
+    for path in (*SOURCE_FILES, *([config_file] if config_file else [])):
+        try:
+            stat=os.stat(path)
+            sources.append((str(path), stat.st_mtime_ns, stat.st_size))
+        except OSError:
+            sources.append((str(path), None, None))
+    environ=sorted((name, value) for name, value in os.environ.items()
+                   if name.startswith(SNAPSHOT_CONFIG['env_prefixes']))
+    return hashlib.blake2b(json.dumps([sources, environ]).encode(), digest_size=16).hexdigest()
+
+
+def _private(status:os.stat_result)->bool:
+    """Whether a cache file or directory is this user's alone: owned by them, writable by nobody else, no symlink."""
+    if stat.S_ISLNK(status.st_mode):
+        return False
+    if not hasattr(os, 'getuid'): # no POSIX ownership to check
+        return True
+    return status.st_uid==os.getuid() and not status.st_mode&(stat.S_IWGRP|stat.S_IWOTH)
+
+
+def _read_cache(path:str, key:str)->Optional[ConfigSnapshot]:
+    try:
+        if not _private(os.lstat(os.path.dirname(path))):
+            return None
+        # O_NOFOLLOW and fstat: the file checked is the file read
+        with open(os.open(path, os.O_RDONLY|getattr(os, 'O_NOFOLLOW', 0)), encoding='utf-8') as cache:
+            if not _private(os.fstat(cache.fileno())):
+                return None
+            cached=json.load(cache)
+        if cached.get('key')!=key:
+            return None
+        return ConfigSnapshot.from_dict(cached['values'])
+    except (OSError, ValueError, KeyError, TypeError):
+        return None
+
+
+def _write_cache(path:str, key:str, snapshot:ConfigSnapshot)->None:
+    directory=os.path.dirname(path)
+    try:
+        os.makedirs(directory, mode=0o700, exist_ok=True)
+        if not _private(os.lstat(directory)): # e.g. created beforehand by another user
+            return
+        descriptor, temporary=tempfile.mkstemp(suffix='.tmp', dir=directory) # O_EXCL, mode 0600
+        try:
+            with open(descriptor, 'w', encoding='utf-8') as cache:
+                json.dump({'key':key, 'values':snapshot.as_dict()}, cache)
+            os.replace(temporary, path)
+        except BaseException:
+            os.unlink(temporary)
+            raise
+    except OSError: # read-only directory: next process resolves again
+        pass
+
+
+class Configuration:
+    """The process's current snapshot, loaded on first attribute access and swapped on hot reload."""
+
+    def __init__(self, config:dict):
+        self.config=config
+        self.source:Optional[str]=None # 'cache' or 'resolved', once loaded
+        self._snapshot:Optional[ConfigSnapshot]=None
+        self._lock=threading.Lock()
+        self._config_file_mtime:Optional[int]=None
+        self._next_check=0.0
+
+    def _config_file_stat(self)->Optional[int]:
+        try:
+            return os.stat(self.config['config_file']).st_mtime_ns
+        except (OSError, TypeError):
+            return None
+
+    def _load(self)->ConfigSnapshot:
+        config_file=self.config['config_file']
+        self._config_file_mtime=self._config_file_stat()
+        if not self.config['cache_enabled']:
+            self.source='resolved'
+            return resolve_snapshot(config_file)
+
+        key=snapshot_key(config_file)
+        snapshot=_read_cache(self.config['cache_file'], key)
+        if snapshot is not None:
+            self.source='cache'
+            return snapshot
+        snapshot=resolve_snapshot(config_file)
+        self.source='resolved'
+        _write_cache(self.config['cache_file'], key, snapshot)
+        return snapshot
+
+    def snapshot(self)->ConfigSnapshot:
+        snapshot=self._snapshot
+        if snapshot is None:
+            with self._lock:
+                if self._snapshot is None:
+                    self._snapshot=self._load()
+                snapshot=self._snapshot
+        return snapshot
+
+    def __getattr__(self, name:str):
+        # Only reached for names Configuration itself lacks, i.e. snapshot fields
+        return getattr(self.snapshot(), name)
+
+    def reload_if_changed(self)->bool:
+        """
+        Swaps in a new snapshot when the JSON config file changed since it was read; checks at most
+        once per reload_interval. An invalid file keeps the current snapshot (with a warning).
+        Returns:
+            True when the snapshot was replaced
+        """
+        now=time.monotonic()
+        if now<self._next_check:
+            return False
+        self._next_check=now+self.config['reload_interval']
+        if self._snapshot is None or self._config_file_stat()==self._config_file_mtime:
+            return False
+
+        with self._lock:
+            try:
+                self._snapshot=self._load()
+            except Exception as exc:
+                self._config_file_mtime=self._config_file_stat() # do not retry until the file changes again
+                warn(f"Configuration reload failed, keeping the current configuration: {exc}")
+                return False
+        return True
+
+
+configuration:Configuration=Configuration(SNAPSHOT_CONFIG)
+
+
+def apply_reloadable_settings(snapshot:ConfigSnapshot)->None:
+    """Updates the hot-reloadable Django settings of this process from a snapshot."""
+    from django.conf import settings
+    for setting, field in RELOADABLE_SETTINGS.items():
+        value=getattr(snapshot, field)
+        setattr(settings, setting, list(value) if isinstance(value, tuple) else value)
+
+
+class ConfigReloadMiddleware(MiddlewareMixin):
+    """Applies JSON config edits (DEV_CONFIG_FILE) between requests. Not loaded without a config file."""
+
+    def __init__(self, get_response):
+        if not configuration.config['config_file']:
+            raise MiddlewareNotUsed
+        super().__init__(get_response)
+
+    def process_request(self, request)->None:
+        if configuration.reload_if_changed():
+            apply_reloadable_settings(configuration.snapshot())
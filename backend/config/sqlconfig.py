@@ -1,18 +1,37 @@
+import os
+import queue
 import sqlite3
+from array import array
 import threading
-import queue
-from functools import lru_cache
+import time
+import weakref
+from collections import deque
+from concurrent.futures import Future
 from contextlib import contextmanager
 from pathlib import Path
+from typing import NamedTuple, Optional
+from config.metrics import Histogram, COUNT_BUCKETS, DEFAULT_BUCKETS
+from config.profiler import explain_sqlite, query_profiler
 
 
 # SQLite-specific configuration constants
-DEFAULT_DB_PATH:str=':memory:'
+DEFAULT_DB_PATH:str=':memory:' # pools and Django configs map this to the shared in-memory database below
+DEFAULT_SHARED_MEMORY_NAME:str='sqlconfig'
 DEFAULT_MIN_CONNECTIONS:int=3 # SQLite typically needs fewer connections
 DEFAULT_MAX_CONNECTIONS:int=10
 DEFAULT_TIMEOUT:float=30.0
 DEFAULT_CHECK_SAME_THREAD:bool=False # Allows cross-thread usage
 DEFAULT_ISOLATION_LEVEL=None # Autocommit mode off
+DEFAULT_VALIDATION_INTERVAL:float=30.0 # Idle seconds after which a connection is re-validated on checkout
+DEFAULT_MAX_LIFETIME:float=3600.0 # Connections are retired after this many seconds
+DEFAULT_IDLE_TIMEOUT:float=300.0 # Idle connections above min_connections are closed after this many seconds
+DEFAULT_REAP_INTERVAL:float=30.0 # Reaper wake-up period (0 disables the reaper thread)
+DEFAULT_AUTOSIZE_TARGET_WAIT:float=0.005 # p95 checkout wait the autosizer steers towards, in seconds
+DEFAULT_AUTOSIZE_INTERVAL:float=10.0 # Seconds of observations per autosizer decision
+DEFAULT_ARRAYSIZE:int=1_000 # Rows per fetchmany() for streamed and columnar results
+DEFAULT_GROUP_COMMIT_WINDOW:float=0.0 # Extra seconds the writer waits for more writes before committing
+DEFAULT_GROUP_COMMIT_MAX_BATCH:int=512 # Most statements per group commit
+DEFAULT_GROUP_COMMIT_MAX_QUEUE:int=10_000 # Queued writes before submitters block (up to `timeout`)
 
 # SQLite connection configuration
 SQLite_CONFIG={
@@ -22,6 +41,20 @@ SQLite_CONFIG={
     'timeout':DEFAULT_TIMEOUT,
     'check_same_thread':DEFAULT_CHECK_SAME_THREAD,
     'isolation_level':DEFAULT_ISOLATION_LEVEL,
+    'validation_interval':DEFAULT_VALIDATION_INTERVAL,
+    'max_lifetime':DEFAULT_MAX_LIFETIME,
+    'idle_timeout':DEFAULT_IDLE_TIMEOUT,
+    'reap_interval':DEFAULT_REAP_INTERVAL,
+    # Adaptive sizing: the effective ceiling moves between autosize_floor and max_connections (needs the reaper)
+    'autosize':False,
+    'autosize_floor':None, # defaults to min_connections
+    'autosize_target_wait':DEFAULT_AUTOSIZE_TARGET_WAIT,
+    'autosize_interval':DEFAULT_AUTOSIZE_INTERVAL,
+    # Single writer: execute_sqlite_command() queues to one group-commit writer; pooled connections become read-only
+    'single_writer':False,
+    'group_commit_window':DEFAULT_GROUP_COMMIT_WINDOW,
+    'group_commit_max_batch':DEFAULT_GROUP_COMMIT_MAX_BATCH,
+    'group_commit_max_queue':DEFAULT_GROUP_COMMIT_MAX_QUEUE,
     # SQlite-specific pragmas
     'pragmas':{
         'journal_mode':'WAL',
@@ -32,22 +65,91 @@ SQLite_CONFIG={
     }
 }
 
+# Named pragma sets for different workloads; select one with profile=... when creating a pool, writer or
+# Django database config (explicit `pragmas` entries still win). page_size only applies to new database
+# files (or after VACUUM, outside WAL mode), so it comes first, before journal_mode switches to WAL.
+PRAGMA_PROFILES={
+    'default':SQLite_CONFIG['pragmas'],
+    # Point lookups (e.g. login): reads served from the memory-mapped file skip a copy into SQLite's page cache
+    'read_heavy':{
+        'page_size':4096,
+        'journal_mode':'WAL',
+        'synchronous':'NORMAL',
+        'cache_size':-131072, # 128MB
+        'mmap_size':268435456, # 256MB
+        'temp_store':'MEMORY',
+        'wal_autocheckpoint':1000, # pages; keeps the WAL (which readers also search) short
+        'foreign_keys':'ON',
+        'busy_timeout':30000,
+    },
+    # Many small commits (e.g. auth events): rarer checkpoints, smaller page cache
+    'write_heavy':{
+        'page_size':4096,
+        'journal_mode':'WAL',
+        'synchronous':'NORMAL',
+        'cache_size':-32000, # 32MB
+        'mmap_size':67108864, # 64MB
+        'temp_store':'MEMORY',
+        'wal_autocheckpoint':10000,
+        'foreign_keys':'ON',
+        'busy_timeout':30000,
+    },
+    # Imports and rebuilds: no fsync at commit (a crash can lose the latest commits, not corrupt the file)
+    'bulk_load':{
+        'page_size':8192,
+        'journal_mode':'WAL',
+        'synchronous':'OFF',
+        'cache_size':-262144, # 256MB
+        'mmap_size':0,
+        'temp_store':'MEMORY',
+        'wal_autocheckpoint':50000,
+        'foreign_keys':'ON',
+        'busy_timeout':30000,
+    },
+}
+
+
+def resolve_pragmas(profile=None, pragmas=None)->dict:
+    """A profile's pragmas with `pragmas` (a mapping or (name, value) pairs) on top; without a profile, `pragmas` or the defaults."""
+    if profile is None:
+        return dict(pragmas if pragmas is not None else SQLite_CONFIG['pragmas'])
+    if profile not in PRAGMA_PROFILES:
+        raise ValueError(f"Unknown SQLite pragma profile {profile!r}; expected one of {', '.join(PRAGMA_PROFILES)}")
+    return {**PRAGMA_PROFILES[profile], **dict(pragmas or ())}
+
+
+def _apply_profile(kwargs:dict)->dict:
+    """Replaces a `profile` keyword with the resolved, hashable pragmas, so pools are cached per effective settings."""
+    profile=kwargs.pop('profile', None)
+    if profile is not None:
+        kwargs['pragmas']=tuple(resolve_pragmas(profile, kwargs.get('pragmas')).items())
+    return kwargs
+
 def create_sqlite_connection(db_path, **kwargs):
     """Create a raw SQLite connection with optimizations."""
     conn=sqlite3.connect(
         database=db_path,
         timeout=kwargs.get('timeout', DEFAULT_TIMEOUT),
+        detect_types=kwargs.get('detect_types', 0),
         check_same_thread=kwargs.get('check_same_thread', DEFAULT_CHECK_SAME_THREAD),
-        isolation_level=kwargs.get('isolation_level', DEFAULT_ISOLATION_LEVEL)
+        isolation_level=kwargs.get('isolation_level', DEFAULT_ISOLATION_LEVEL),
+        uri=kwargs.get('uri', False) or is_shared_memory_path(db_path)
     )
 
-    # Apply SQLite pragmas for performance
-    pragmas=kwargs.get('pragmas', SQLite_CONFIG['pragmas'])
+    # Apply SQLite pragmas for performance (a mapping, or hashable (name, value) pairs for cached pools)
+    pragmas=resolve_pragmas(kwargs.get('profile'), kwargs.get('pragmas'))
     cursor=conn.cursor()
     for pragma, value in pragmas.items():
         cursor.execute(f"PRAGMA {pragma} = {value}")
+    if kwargs.get('single_writer'):
+        cursor.execute("PRAGMA query_only = ON") # writes go through the SQLiteWriter
     cursor.close()
 
+    # Per-connection setup hook, run once per physical connection
+    on_connect=kwargs.get('on_connect')
+    if on_connect is not None:
+        on_connect(conn)
+
     return conn
 
 def validate_sqlite_connection(conn):
@@ -61,171 +163,980 @@ def validate_sqlite_connection(conn):
     except (sqlite3.Error, sqlite3.OperationalError):
         return False
 
+def shared_memory_uri(name=DEFAULT_SHARED_MEMORY_NAME)->str:
+    """URI of a named in-memory database shared by every connection in this process."""
+    return f"file:{name}?mode=memory&cache=shared"
+
+
+def is_shared_memory_path(db_path)->bool:
+    db_path=str(db_path)
+    return db_path.startswith('file:') and 'mode=memory' in db_path
+
+
+def resolve_sqlite_path(db_path):
+    """Maps ':memory:' (private to one connection) to the default shared in-memory database."""
+    return shared_memory_uri() if str(db_path)==':memory:' else db_path
+
+
+# Keeper connections holding shared in-memory databases alive: SQLite frees one as soon as its
+# last connection closes, which an idle pool shrinking to zero (or Django closing its connection
+# after a request) would otherwise do
+_memory_keepers:dict={}
+_memory_keepers_lock=threading.Lock()
+
+
+def keep_shared_memory_alive(db_path)->None:
+    """Opens the keeper connection for a shared in-memory database, once."""
+    if not is_shared_memory_path(db_path):
+        return
+    with _memory_keepers_lock:
+        if db_path not in _memory_keepers:
+            _memory_keepers[db_path]=sqlite3.connect(db_path, uri=True, check_same_thread=False)
+
+
+def release_shared_memory(db_path=None)->None:
+    """Closes keeper connections (all by default); the database is freed once no pool holds it either."""
+    with _memory_keepers_lock:
+        paths=[db_path] if db_path is not None else list(_memory_keepers)
+        for path in paths:
+            keeper=_memory_keepers.pop(str(path), None)
+            if keeper is not None:
+                keeper.close()
+
+
 def get_sqlite_pool(db_path, min_conn, max_conn):
     """Generate unique key for connection pool caching."""
-    db_path_str= str(Path(db_path).resolve()) if db_path!=':memory:' else ':memory:'
+    db_path=resolve_sqlite_path(db_path)
+    db_path_str=db_path if is_shared_memory_path(db_path) else str(Path(db_path).resolve())
     return f"sqlite_{db_path_str}_{min_conn}_{max_conn}"
 
 
-@lru_cache(maxsize=32)
-def create_sqlite_pool(db_path=DEFAULT_DB_PATH, min_connections=DEFAULT_MIN_CONNECTIONS, max_connections=DEFAULT_MAX_CONNECTIONS, **kwargs):
-    """Create and cache SQLite connection pool instance."""
-    pool_state={
-        'available_connections':queue.Queue(maxsize=max_connections),
-        'all_connections':set(),
-        'connection_count':0,
-        'lock':threading.RLock(),
-        'db_path':db_path,
-        'config':{**SQLite_CONFIG, **kwargs,
-                  'min_connections':min_connections,
-                  'max_connections':max_connections,
-                  }
-    }
+class _Waiter:
+    """
+    A queued checkout. `grant` is set to a connection, `_OPEN_SLOT` or `_POOL_CLOSED` before `event`
+    is set; `event` is a threading.Event, or anything else with a set() method (see async_sqlconfig).
+    """
+    __slots__=('event', 'grant')
 
-    # Initialize minimum connections
-    with pool_state['lock']:
-        for _ in range(min_connections):
-            if pool_state['connection_count']<max_connections:
-                conn=create_sqlite_connection(db_path, **pool_state['config'])
-                pool_state['available_connections'].put(conn)
-                pool_state['all_connections'].add(conn)
-                pool_state['connection_count']+=1
+    def __init__(self, event=None):
+        self.event=event if event is not None else threading.Event()
+        self.grant=None
 
-    return pool_state
 
+_OPEN_SLOT=object() # grant: the waiter may open a new connection in a reserved slot
+_POOL_CLOSED=object() # grant: the pool closed while waiting
 
-def get_connection_from_sqlite_pool(pool_state):
-    """Acquire connection from SQLite pool."""
-    try:
-        conn=pool_state['available_connections'].get(timeout=pool_state['config']['timeout'])
 
-        if not validate_sqlite_connection(conn):
-            remove_sqlite_connection(pool_state, conn)
-            return get_connection_from_sqlite_pool(pool_state)
+class SQLitePool:
+    """
+    Thread-safe SQLite connection pool.
+
+    Idle connections are kept LIFO, so the warmest connection is reused first and the coldest
+    ones age out. Checkout only validates a connection (`SELECT 1`) when it has sat idle longer
+    than `validation_interval`; the happy path never touches the database. A background reaper
+    retires connections past `max_lifetime` or idle past `idle_timeout`, shrinking the pool
+    back towards `min_connections`, and tops it up to `min_connections` again.
+
+    When the pool is at its ceiling, callers queue FIFO and returned connections are handed to
+    the oldest waiter directly, so a thread that returns and immediately re-checks out cannot
+    starve the queue.
+
+    Checkout wait and hold times are recorded as histograms, along with exhaustion events and the
+    high-water mark of checked-out connections. With `autosize` on, the effective ceiling is
+    raised while the windowed p95 wait exceeds `autosize_target_wait` and lowered when the pool
+    sits mostly idle, always within [`autosize_floor`, `max_connections`].
+    """
+    __slots__=('db_path', 'config', 'pid', '_idle', '_meta', '_total', '_closed', '_lock', '_waiters', '_reaper',
+               '_limit', '_wait_times', '_hold_times', '_window_waits', '_window_high_water',
+               '_high_water', '_checkouts', '_exhaustions', '_next_autosize', '__weakref__')
+
+    def __init__(self, db_path, config):
+        self.db_path=db_path
+        self.config=config
+        self.pid=os.getpid() # owning process; a forked child must not use this pool
+        self._idle=deque() # idle connections, most recently returned last
+        self._meta={} # connection -> [created_at, last_returned_at, checked_out_at]
+        self._total=0 # open connections, including ones being opened
+        self._closed=False
+        self._lock=threading.Lock()
+        self._waiters=deque() # queued checkouts, oldest first
+        self._reaper=None
+
+        # Telemetry
+        self._wait_times=Histogram((0.0,)+DEFAULT_BUCKETS+(30.0,))
+        self._hold_times=Histogram(DEFAULT_BUCKETS)
+        self._window_waits=Histogram(self._wait_times.buckets) # reset after each autosizer decision
+        self._window_high_water=0
+        self._high_water=0
+        self._checkouts=0
+        self._exhaustions=0
 
+        # Effective ceiling; fixed at max_connections unless autosizing
+        self._limit=self._autosize_floor() if config['autosize'] else config['max_connections']
+        self._next_autosize=time.monotonic()+config['autosize_interval']
+
+        for _ in range(min(config['min_connections'], config['max_connections'])):
+            self._idle.append(self._open())
+            self._total+=1
+
+        if config['reap_interval']:
+            self._reaper=threading.Thread(target=_reap_sqlite_pool, args=(weakref.ref(self),),
+                                          name=f"sqlite-pool-reaper:{db_path}", daemon=True)
+            self._reaper.start()
+
+    def _autosize_floor(self)->int:
+        floor=self.config['autosize_floor'] or self.config['min_connections']
+        return max(1, min(floor, self.config['max_connections']))
+
+    def _open(self):
+        conn=create_sqlite_connection(self.db_path, **self.config)
+        now=time.monotonic()
+        with self._lock:
+            self._meta[conn]=[now, now, None]
         return conn
 
-    except queue.Empty:
-        with pool_state['lock']:
-            if pool_state['connection_count']<pool_state['config']['max_connections']:
-                conn=create_sqlite_connection(pool_state['db_path'], **pool_state['config'])
-                pool_state['all_connections'].add(conn)
-                pool_state['connection_count']+=1
-                return conn
-            else:
+    def _close_quietly(self, conn)->None:
+        try:
+            conn.close()
+        except sqlite3.Error:
+            pass
+
+    def _grant_slots(self)->None:
+        """Lets queued callers open connections while below the ceiling. Caller holds the lock."""
+        while self._waiters and self._total<self._limit and not self._closed:
+            waiter=self._waiters.popleft()
+            self._total+=1
+            waiter.grant=_OPEN_SLOT
+            waiter.event.set()
+
+    def _release_slot(self)->None:
+        with self._lock:
+            self._total-=1
+            self._grant_slots()
+
+    def checkout(self, timeout=None):
+        """Acquire a connection, opening one if below the ceiling, else queueing up to `timeout`."""
+        timeout=self.config['timeout'] if timeout is None else timeout
+        started=time.monotonic()
+        conn, waiter=self._enqueue()
+        if waiter is not None:
+            waiter.event.wait(timeout)
+            conn=self._settle(waiter, started)
+        return self._connect(conn, started)
+
+    # checkout() in steps, shared with the async facade: _enqueue, wait on the waiter, _settle, _connect
+
+    def _enqueue(self, event=None):
+        """Takes an idle connection (conn, None), reserves a slot (None, None) or queues a waiter (None, waiter)."""
+        with self._lock:
+            if self._closed:
+                raise ConnectionError('SQLite pool closed')
+            if self._idle and not self._waiters:
+                return self._idle.pop(), None
+            if self._total<self._limit and not self._waiters:
+                self._total+=1 # reserve a slot; the connection is opened outside the lock
+                return None, None
+            waiter=_Waiter(event)
+            self._waiters.append(waiter)
+            return None, waiter
+
+    def _settle(self, waiter:_Waiter, started:float):
+        """After a wait: the granted connection, or None for a reserved slot. Raises when none was granted."""
+        with self._lock:
+            if waiter.grant is None:
+                self._waiters.remove(waiter)
+                self._exhaustions+=1
+                self._record_wait(time.monotonic()-started)
                 raise ConnectionError('SQLite pool exhausted')
+        if waiter.grant is _POOL_CLOSED:
+            raise ConnectionError('SQLite pool closed')
+        return None if waiter.grant is _OPEN_SLOT else waiter.grant
+
+    def _withdraw(self, waiter:_Waiter)->None:
+        """Takes back a waiter that stopped waiting (e.g. a cancelled task), passing on anything granted meanwhile."""
+        with self._lock:
+            if waiter.grant is None:
+                self._waiters.remove(waiter)
+                return
+        if waiter.grant is not _POOL_CLOSED:
+            self._give_back(None if waiter.grant is _OPEN_SLOT else waiter.grant)
+
+    def _give_back(self, conn)->None:
+        """Returns what _enqueue/_settle handed out when it will not be used: the connection, or its reserved slot."""
+        if conn is None:
+            self._release_slot()
+        else:
+            self.checkin(conn)
+
+    def _is_warm(self, conn)->bool:
+        """Whether a connection can be handed out without validating or replacing it."""
+        created_at, returned_at, _=self._meta[conn]
+        now=time.monotonic()
+        return now-created_at<=self.config['max_lifetime'] and now-returned_at<=self.config['validation_interval']
+
+    def _connect(self, conn, started:float):
+        """Hands out a connection, validating (or replacing) an idle one or opening one in a reserved slot."""
+        if conn is not None:
+            created_at, returned_at, _=self._meta[conn]
+            fresh=time.monotonic()-created_at<=self.config['max_lifetime']
+            if fresh and (self._is_warm(conn) or validate_sqlite_connection(conn)):
+                return self._checked_out(conn, started)
+            # Expired or dead: replace it within the same slot rather than queueing again
+            with self._lock:
+                self._meta.pop(conn, None)
+            self._close_quietly(conn)
+
+        try:
+            conn=self._open()
+        except Exception:
+            self._release_slot()
+            raise
+        return self._checked_out(conn, started)
+
+    def _record_wait(self, seconds:float)->None:
+        self._wait_times.observe(seconds)
+        self._window_waits.observe(seconds)
+
+    def _checked_out(self, conn, started:float):
+        """Records checkout telemetry for a connection about to be handed out."""
+        now=time.monotonic()
+        self._record_wait(now-started)
+        with self._lock:
+            self._meta[conn][2]=now
+            self._checkouts+=1
+            active=self._total-len(self._idle)
+            self._high_water=max(self._high_water, active)
+            self._window_high_water=max(self._window_high_water, active)
+        return conn
+
+    def checkin(self, conn)->None:
+        """Return a connection. Only rolls back when a transaction was left open."""
+        meta=self._meta.get(conn)
+        if meta is None:
+            return
+        if meta[2] is not None:
+            self._hold_times.observe(time.monotonic()-meta[2])
+            meta[2]=None
+        try:
+            if conn.in_transaction:
+                conn.rollback() # Reset transaction state
+        except sqlite3.Error:
+            self.discard(conn)
+            return
+
+        with self._lock:
+            if self._closed or self._total>self._limit:
+                self._forget(conn)
+                retire=True
+            else:
+                retire=False
+                meta[1]=time.monotonic()
+                if self._waiters:
+                    waiter=self._waiters.popleft()
+                    waiter.grant=conn
+                    waiter.event.set()
+                else:
+                    self._idle.append(conn)
+        if retire:
+            self._close_quietly(conn)
+
+    def _forget(self, conn)->None:
+        """Drops a connection's bookkeeping and frees its slot. Caller holds the lock."""
+        if self._meta.pop(conn, None) is not None:
+            self._total-=1
+            self._grant_slots()
+
+    def discard(self, conn)->None:
+        """Remove a dead or unwanted connection from the pool and close it."""
+        with self._lock:
+            self._forget(conn)
+        self._close_quietly(conn)
+
+    def reap(self)->None:
+        """Retires expired and surplus idle connections, then tops the pool up to `min_connections`."""
+        now=time.monotonic()
+        retired=[]
+        with self._lock:
+            keep=deque()
+            # Oldest-returned first, so surplus idle connections are shed from the cold end
+            while self._idle:
+                conn=self._idle.popleft()
+                created_at, returned_at, _=self._meta[conn]
+                expired=now-created_at>self.config['max_lifetime']
+                surplus=(now-returned_at>self.config['idle_timeout'] and self._total>self.config['min_connections']) \
+                    or self._total>self._limit
+                if expired or surplus:
+                    self._forget(conn)
+                    retired.append(conn)
+                else:
+                    keep.append(conn)
+            self._idle=keep
+            missing=0 if self._closed else max(0, min(self.config['min_connections'], self._limit)-self._total)
+            self._total+=missing
+
+        for conn in retired:
+            self._close_quietly(conn)
+        for _ in range(missing):
+            try:
+                conn=self._open()
+            except Exception:
+                self._release_slot()
+                continue
+            with self._lock:
+                if self._waiters:
+                    waiter=self._waiters.popleft()
+                    waiter.grant=conn
+                    waiter.event.set()
+                else:
+                    self._idle.appendleft(conn)
+
+    def autosize(self)->None:
+        """Moves the effective ceiling based on the wait times observed since the last decision."""
+        now=time.monotonic()
+        if not self.config['autosize'] or now<self._next_autosize:
+            return
+        target=self.config['autosize_target_wait']
+        p95=self._window_waits.quantile(0.95)
+        with self._lock:
+            if p95>target and self._window_high_water>=self._limit:
+                # Callers queued at the ceiling: grow by a quarter (at least one)
+                self._limit=min(self.config['max_connections'], self._limit+max(1, self._limit//4))
+                self._grant_slots()
+            elif p95<=target/10 and self._window_high_water<self._limit//2:
+                self._limit=max(self._autosize_floor(), self._limit-1) # surplus idle connections are shed by reap()
+            self._window_high_water=self._total-len(self._idle)
+            self._next_autosize=now+self.config['autosize_interval']
+            self._window_waits=Histogram(self._wait_times.buckets)
+
+    def close(self)->None:
+        """Closes idle connections; checked-out ones are closed when returned."""
+        with self._lock:
+            self._closed=True
+            idle, self._idle=list(self._idle), deque()
+            for conn in idle:
+                self._forget(conn)
+            while self._waiters:
+                waiter=self._waiters.popleft()
+                waiter.grant=_POOL_CLOSED
+                waiter.event.set()
+        for conn in idle:
+            self._close_quietly(conn)
+
+    def abandon(self)->list:
+        """
+        Detaches a pool inherited across fork() without closing anything: closing an inherited
+        connection could checkpoint or unlink the parent's WAL. Returns every connection it held.
+        """
+        self._lock=threading.Lock() # the parent's lock may have been held at fork time
+        self._closed=True
+        inherited=list(self._meta)
+        self._meta.clear()
+        self._idle.clear()
+        self._waiters.clear()
+        self._total=0
+        return inherited
+
+    def stats(self):
+        """Pool statistics."""
+        with self._lock:
+            total, available=self._total, len(self._idle)
+        return {
+            'database_path':self.db_path,
+            'total_connections':total,
+            'available_connections':available,
+            'active_connections':total-available,
+            'max_connections':self.config['max_connections'],
+            'min_connections':self.config['min_connections'],
+            'effective_max_connections':self._limit,
+            'high_water_active_connections':self._high_water,
+            'checkouts':self._checkouts,
+            'exhaustion_events':self._exhaustions,
+            'wait_p50_seconds':self._wait_times.quantile(0.50),
+            'wait_p95_seconds':self._wait_times.quantile(0.95),
+            'wait_p99_seconds':self._wait_times.quantile(0.99),
+            'hold_p50_seconds':self._hold_times.quantile(0.50),
+            'hold_p95_seconds':self._hold_times.quantile(0.95),
+            'hold_p99_seconds':self._hold_times.quantile(0.99),
+        }
+
+    def histograms(self):
+        """Checkout wait and hold time histograms."""
+        return {'wait':self._wait_times, 'hold':self._hold_times}
+
+
+def _reap_sqlite_pool(pool_ref)->None:
+    """Reaper thread body. Holds the pool weakly so an unreferenced pool can be collected."""
+    config=pool_ref().config
+    interval=min(config['reap_interval'], config['autosize_interval']) if config['autosize'] else config['reap_interval']
+    while True:
+        time.sleep(interval)
+        pool=pool_ref()
+        if pool is None or pool._closed:
+            return
+        pool.reap()
+        pool.autosize()
+        del pool
+
+
+class PoolCacheInfo(NamedTuple):
+    """Registry counters, shaped like `functools.lru_cache` cache_info()."""
+    hits:int
+    misses:int
+    maxsize:Optional[int]
+    currsize:int
+
+
+# Process-local registry of pools and group-commit writers, keyed by their creation arguments.
+# A pre-fork server's children inherit it; see _reset_registry_after_fork()
+_pools:dict={}
+_writers:dict={}
+_registry_lock=threading.Lock()
+_registry_pid:int=os.getpid()
+_registry_counters={'hits':0, 'misses':0, 'forks':0}
+_inherited_connections:list=[] # quarantined: never used, and never closed, in this process
+
+
+def _registry_key(*args, **kwargs)->tuple:
+    return args+tuple(sorted(kwargs.items()))
+
+
+def _reset_registry_after_fork()->None:
+    """
+    Runs in a forked child. Inherited pools and writers are abandoned (their connections parked
+    in `_inherited_connections`, so they are neither reused nor closed here), and pools are rebuilt
+    warm from the parent's configuration. Writers are recreated on first use.
+    """
+    global _registry_lock, _registry_pid, _memory_keepers_lock
+    _registry_lock=threading.Lock()
+    _memory_keepers_lock=threading.Lock() # may have been held by another parent thread at fork
+    _registry_pid=os.getpid()
+    _registry_counters['forks']+=1
+
+    inherited_pools=dict(_pools)
+    _pools.clear()
+    for pool in inherited_pools.values():
+        _inherited_connections.extend(pool.abandon())
+    for writer in _writers.values():
+        _inherited_connections.extend(writer.abandon())
+    _writers.clear()
+
+    for key, pool in inherited_pools.items():
+        try:
+            _pools[key]=SQLitePool(pool.db_path, pool.config)
+        except Exception:
+            pass # rebuilt on first use instead
+
 
+if hasattr(os, 'register_at_fork'):
+    os.register_at_fork(after_in_child=_reset_registry_after_fork)
 
-def return_connection_to_sqlite_pool(pool_state, conn):
+
+def _check_registry_pid()->None:
+    """Catches forks the at-fork hook did not see (e.g. a raw fork() from a C extension)."""
+    if os.getpid()!=_registry_pid:
+        _reset_registry_after_fork()
+
+
+def create_sqlite_pool(db_path=DEFAULT_DB_PATH, min_connections=DEFAULT_MIN_CONNECTIONS, max_connections=DEFAULT_MAX_CONNECTIONS, **kwargs):
+    """
+    Create and cache SQLite connection pool instance (one per process and configuration).
+    `profile` names a PRAGMA_PROFILES entry to apply instead of the default pragmas.
+    """
+    _check_registry_pid()
+    kwargs=_apply_profile(kwargs)
+    key=_registry_key(db_path, min_connections, max_connections, **kwargs)
+    pool=_pools.get(key)
+    if pool is not None:
+        _registry_counters['hits']+=1
+        return pool
+
+    with _registry_lock:
+        pool=_pools.get(key)
+        if pool is None:
+            _registry_counters['misses']+=1
+            db_path=resolve_sqlite_path(db_path)
+            keep_shared_memory_alive(db_path)
+            pool=_pools[key]=SQLitePool(db_path, {
+                **SQLite_CONFIG, **kwargs,
+                'min_connections':min_connections,
+                'max_connections':max_connections,
+            })
+    return pool
+
+
+def get_connection_from_sqlite_pool(pool):
+    """Acquire connection from SQLite pool."""
+    return pool.checkout()
+
+
+def return_connection_to_sqlite_pool(pool, conn):
     """Returns connection to SQLite pool."""
-    if conn in pool_state['all_connections']:
-        if validate_sqlite_connection(conn):
+    pool.checkin(conn)
+
+
+def remove_sqlite_connection(pool, conn):
+    """Remove dead connection from SQLite pool"""
+    pool.discard(conn)
+
+
+class WriteResult(NamedTuple):
+    """Outcome of one statement applied by a `SQLiteWriter`."""
+    rowcount:int
+    lastrowid:Optional[int]
+    rows:list # rows produced by RETURNING, else empty
+
+
+_WRITER_STOP=object() # queue sentinel: drain and exit
+
+
+class SQLiteWriter:
+    """
+    Single-writer group commit for one SQLite database.
+
+    SQLite serializes writers anyway, so rather than letting pooled connections contend for the
+    write lock (and pay a commit per statement), every write is queued to one dedicated
+    connection. A background thread takes whatever has queued up (waiting up to
+    `group_commit_window` for more, capped at `group_commit_max_batch`) and applies it in a single
+    `BEGIN IMMEDIATE ... COMMIT`. Each statement runs under its own savepoint, so a failing
+    statement (e.g. a UNIQUE violation) only fails its own future. Futures resolve after COMMIT.
+    """
+    __slots__=('db_path', 'config', 'pid', '_conn', '_queue', '_thread', '_closed', '_lock',
+               '_batches', '_statements', '_failures', '_batch_sizes', '_commit_times', '__weakref__')
+
+    def __init__(self, db_path, config):
+        self.db_path=db_path
+        self.config=config
+        self.pid=os.getpid()
+        self._queue=queue.Queue(maxsize=config['group_commit_max_queue'])
+        self._closed=False
+        self._lock=threading.Lock()
+
+        # Telemetry
+        self._batches=0
+        self._statements=0
+        self._failures=0
+        self._batch_sizes=Histogram(COUNT_BUCKETS+(250, 500, 1000))
+        self._commit_times=Histogram(DEFAULT_BUCKETS)
+
+        # Opened here so a bad path or pragma fails the caller, not the thread
+        self._conn=create_sqlite_connection(db_path, **{**config, 'single_writer':False, 'isolation_level':None})
+        self._thread=threading.Thread(target=self._run, args=(self._conn,), name=f"sqlite-writer:{db_path}", daemon=True)
+        self._thread.start()
+
+    def submit(self, sql, params=None, many=False)->Future:
+        """Queues a write. The future resolves to a `WriteResult` once its batch has committed."""
+        future=Future()
+        # Enqueued under the lock, so nothing lands behind the stop sentinel close() queues
+        with self._lock:
+            if self._closed:
+                raise ConnectionError('SQLite writer closed')
             try:
-                conn.rollback() # Reset transaction state
-                pool_state['available_connections'].put(conn, block=False)
+                self._queue.put((future, sql, params or (), many), timeout=self.config['timeout'])
             except queue.Full:
-                remove_sqlite_connection(pool_state, conn)
-        else:
-            remove_sqlite_connection(pool_state, conn)
+                raise ConnectionError('SQLite writer queue full')
+        return future
 
+    def execute(self, sql, params=None, many=False)->WriteResult:
+        """Queues a write and blocks until its batch has committed (or the configured timeout)."""
+        return self.submit(sql, params, many).result(timeout=self.config['timeout'])
 
-def remove_sqlite_connection(pool_state, conn):
-    """Remove dead connection from SQLite pool"""
-    with pool_state['lock']:
-        if conn in pool_state['all_connections']:
-            pool_state['all_connections'].remove(conn)
-            pool_state['connection_count'] -= 1
+    def _run(self, conn)->None:
+        """Writer thread body."""
+        window=self.config['group_commit_window']
+        max_batch=self.config['group_commit_max_batch']
+        try:
+            while True:
+                item=self._queue.get()
+                if item is _WRITER_STOP:
+                    return
+                batch=[item]
+                stopping=False
+                deadline=time.monotonic()+window
+                while len(batch)<max_batch:
+                    try:
+                        remaining=deadline-time.monotonic()
+                        item=self._queue.get(timeout=remaining) if remaining>0 else self._queue.get_nowait()
+                    except queue.Empty:
+                        break
+                    if item is _WRITER_STOP:
+                        stopping=True
+                        break
+                    batch.append(item)
+                self._commit(conn, batch)
+                if stopping:
+                    return
+        finally:
+            # Whether stopped or killed by an error, no queued write is left waiting forever
+            self._fail_queued()
+            with self._lock:
+                self._closed=True
+            self._fail_queued()
+            conn.close()
+
+    def _fail_queued(self)->None:
+        """Fails every write still queued."""
+        while True:
             try:
-                conn.close()
-            except:
-                pass
+                item=self._queue.get_nowait()
+            except queue.Empty:
+                return
+            if item is not _WRITER_STOP and item[0].set_running_or_notify_cancel():
+                item[0].set_exception(ConnectionError('SQLite writer closed'))
+                self._failures+=1
+
+    def _commit(self, conn, batch)->None:
+        """Applies a batch in one transaction, isolating each statement under a savepoint."""
+        started=time.perf_counter()
+        applied=[]
+        failures=0
+        cursor=conn.cursor()
+        try:
+            cursor.execute('BEGIN IMMEDIATE')
+            for future, sql, params, many in batch:
+                if not future.set_running_or_notify_cancel():
+                    continue
+                cursor.execute('SAVEPOINT group_commit')
+                try:
+                    if many:
+                        cursor.executemany(sql, params)
+                    else:
+                        cursor.execute(sql, params)
+                    rows=cursor.fetchall() if cursor.description else []
+                    applied.append((future, WriteResult(cursor.rowcount, cursor.lastrowid, rows)))
+                except Exception as exc:
+                    cursor.execute('ROLLBACK TO group_commit')
+                    future.set_exception(exc)
+                    failures+=1
+                finally:
+                    cursor.execute('RELEASE group_commit')
+            cursor.execute('COMMIT')
+        except Exception as exc:
+            # The transaction as a whole failed (e.g. SQLITE_BUSY from an outside writer or disk I/O)
+            if conn.in_transaction:
+                conn.rollback()
+            for future, *_ in batch:
+                if not future.done():
+                    future.set_exception(exc)
+                    failures+=1
+            applied=[]
+        finally:
+            cursor.close()
+
+        self._batches+=1
+        self._statements+=len(batch)
+        self._failures+=failures
+        self._batch_sizes.observe(len(batch))
+        self._commit_times.observe(time.perf_counter()-started)
+        for future, result in applied:
+            future.set_result(result)
+
+    def close(self, timeout=None)->None:
+        """Stops accepting writes, lets queued ones commit and closes the connection."""
+        with self._lock:
+            if self._closed:
+                return
+            self._closed=True
+        if self._thread.is_alive(): # a thread that died on an error has already failed the queue
+            self._queue.put(_WRITER_STOP)
+        self._thread.join(timeout)
+
+    def abandon(self)->list:
+        """Detaches a writer inherited across fork(); its thread did not survive. Returns its connection."""
+        self._lock=threading.Lock()
+        self._closed=True
+        return [self._conn]
+
+    def stats(self):
+        """Writer statistics."""
+        return {
+            'database_path':self.db_path,
+            'queued':self._queue.qsize(),
+            'batches':self._batches,
+            'statements':self._statements,
+            'failed_statements':self._failures,
+            'mean_batch_size':self._statements/self._batches if self._batches else 0.0,
+            'batch_size_p95':self._batch_sizes.quantile(0.95),
+            'commit_p95_seconds':self._commit_times.quantile(0.95),
+        }
+
+    def histograms(self):
+        """Batch size and commit time histograms."""
+        return {'batch_size':self._batch_sizes, 'commit':self._commit_times}
+
+
+def create_sqlite_writer(db_path=DEFAULT_DB_PATH, **kwargs):
+    """Create and cache the group-commit writer for a database (one per process and configuration)."""
+    _check_registry_pid()
+    kwargs=_apply_profile(kwargs)
+    key=_registry_key(db_path, **kwargs)
+    writer=_writers.get(key)
+    if writer is not None:
+        return writer
+
+    with _registry_lock:
+        writer=_writers.get(key)
+        if writer is None:
+            db_path=resolve_sqlite_path(db_path)
+            keep_shared_memory_alive(db_path)
+            writer=_writers[key]=SQLiteWriter(db_path, {**SQLite_CONFIG, **kwargs})
+    return writer
+
+
+def _pool_for(db_path, kwargs):
+    """Fetches the cached pool for `sqlite_connection()`-style keyword arguments."""
+    pool_kwargs=dict(kwargs)
+    pool_key_params=(db_path, pool_kwargs.pop('min_connections', DEFAULT_MIN_CONNECTIONS),
+                     pool_kwargs.pop('max_connections', DEFAULT_MAX_CONNECTIONS))
+    return create_sqlite_pool(*pool_key_params, **pool_kwargs)
 
 
 @contextmanager
 def sqlite_connection(db_path=DEFAULT_DB_PATH, **kwargs):
     """Context manager for SQLite connections."""
-    pool_key_params=(db_path, kwargs.get('min_connections', DEFAULT_MIN_CONNECTIONS),
-                     kwargs.get('max_connections', DEFAULT_MAX_CONNECTIONS))
-
-    pool_state=create_sqlite_pool(*pool_key_params, **kwargs)
-    conn=get_connection_from_sqlite_pool(pool_state)
+    pool=_pool_for(db_path, kwargs)
+    conn=get_connection_from_sqlite_pool(pool)
 
     try:
         yield conn
     finally:
-        return_connection_to_sqlite_pool(pool_state, conn)
+        return_connection_to_sqlite_pool(pool, conn)
 
 
-def execute_sqlite_query(sql, params=None, db_path=DEFAULT_DB_PATH, **kwargs):
-    """Execute SELECT query on SQLite."""
-    with sqlite_connection(db_path, **kwargs) as conn:
-        cursor=conn.cursor()
+class SQLiteRowStream:
+    """
+    Chunked iterator over a query result. Yields lists of up to `arraysize` rows and holds its
+    pooled connection (and SQLite read snapshot) until exhausted or closed; use it as a context
+    manager when the caller may stop early.
+    """
+    __slots__=('columns', 'arraysize', '_pool', '_conn', '_cursor')
+
+    def __init__(self, pool, sql, params=None, arraysize=DEFAULT_ARRAYSIZE):
+        self.arraysize=arraysize
+        self._pool=pool
+        self._conn, self._cursor=None, None
+        self._conn=get_connection_from_sqlite_pool(pool)
         try:
-            cursor.execute(sql, params or ())
-            columns=[desc[0] for desc in cursor.description] if cursor.description else []
-            rows=cursor.fetchall()
-            return {'columns':columns, 'data':rows}
+            self._cursor=self._conn.cursor()
+            self._cursor.execute(sql, params or ())
+        except Exception:
+            self.close()
+            raise
+        self.columns=[desc[0] for desc in self._cursor.description] if self._cursor.description else []
+
+    def __iter__(self):
+        if self._conn is None:
+            raise ValueError('SQLite row stream is closed')
+        try:
+            while True:
+                rows=self._cursor.fetchmany(self.arraysize)
+                if not rows:
+                    return
+                yield rows
         finally:
-            cursor.close()
+            self.close()
+
+    def close(self)->None:
+        """Returns the connection to its pool. Safe to call more than once."""
+        conn, self._conn=self._conn, None
+        if conn is None:
+            return
+        if self._cursor is not None:
+            self._cursor.close()
+        return_connection_to_sqlite_pool(self._pool, conn)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+    def __del__(self):
+        self.close()
+
+
+# Typecodes for columns whose values are all of one numeric type
+_COLUMN_TYPECODES={int:'q', float:'d'}
+
+
+def _append_column_values(column, values):
+    """Appends a chunk of values to a column, widening an array to a list when they no longer fit."""
+    if isinstance(column, array):
+        try:
+            column.extend(array(column.typecode, values)) # converted first, so a failure appends nothing
+            return column
+        except (TypeError, OverflowError):
+            if column.typecode=='q' and all(isinstance(value, (int, float)) for value in values):
+                column=array('d', column) # ints mixed with floats: promote
+                column.extend(array('d', values))
+                return column
+            column=column.tolist() # NULLs, text or out-of-range integers
+    column.extend(values)
+    return column
+
+
+def execute_sqlite_query(sql, params=None, db_path=DEFAULT_DB_PATH, mode='rows', arraysize=DEFAULT_ARRAYSIZE, **kwargs):
+    """
+    Execute SELECT query on SQLite.
+    Args:
+        mode: 'rows' returns a list of tuples; 'stream' a `SQLiteRowStream` of row chunks; 'columnar'
+              one sequence per column, `array`-backed where every value is an int (or float)
+        arraysize: Rows fetched at a time in 'stream' and 'columnar' modes
+    Returns:
+        {'columns': [...], 'data': rows, stream or column sequences}
+    """
+    started=time.perf_counter()
+    if mode=='stream': # consumed lazily, so not timed by the query profiler
+        stream=SQLiteRowStream(_pool_for(db_path, kwargs), sql, params, arraysize)
+        return {'columns':stream.columns, 'data':stream}
+
+    if mode=='columnar':
+        with SQLiteRowStream(_pool_for(db_path, kwargs), sql, params, arraysize) as stream:
+            data=None
+            for rows in stream:
+                chunk_columns=list(zip(*rows))
+                if data is None:
+                    data=[array(_COLUMN_TYPECODES[type(values[0])]) if type(values[0]) in _COLUMN_TYPECODES else []
+                          for values in chunk_columns]
+                data=[_append_column_values(column, values) for column, values in zip(data, chunk_columns)]
+            result={'columns':stream.columns, 'data':data if data is not None else [[] for _ in stream.columns]}
+    else:
+        with sqlite_connection(db_path, **kwargs) as conn:
+            cursor=conn.cursor()
+            try:
+                cursor.execute(sql, params or ())
+                columns=[desc[0] for desc in cursor.description] if cursor.description else []
+                result={'columns':columns, 'data':cursor.fetchall()}
+            finally:
+                cursor.close()
+
+    if query_profiler.enabled:
+        _profile_sqlite_statement(sql, params, db_path, kwargs, started)
+    return result
 
 def execute_sqlite_command(sql, params=None, db_path=DEFAULT_DB_PATH, **kwargs):
     """Execute INSERT/UPDATE/DELETE on SQLite."""
-    with sqlite_connection(db_path, **kwargs) as conn:
-        cursor=conn.cursor()
-        try:
-            cursor.execute(sql, params or ())
-            affected_rows=cursor.rowcount
-            conn.commit()
-            return affected_rows
-        except Exception as exc:
-            conn.rollback()
-            raise exc
-        finally:
-            cursor.close()
+    started=time.perf_counter()
+    if kwargs.get('single_writer'):
+        affected_rows=submit_sqlite_command(sql, params, db_path, **kwargs).result( # includes queueing
+            timeout=kwargs.get('timeout', DEFAULT_TIMEOUT)).rowcount
+    else:
+        with sqlite_connection(db_path, **kwargs) as conn:
+            cursor=conn.cursor()
+            try:
+                cursor.execute(sql, params or ())
+                affected_rows=cursor.rowcount
+                conn.commit()
+            except Exception as exc:
+                conn.rollback()
+                raise exc
+            finally:
+                cursor.close()
+
+    if query_profiler.enabled:
+        _profile_sqlite_statement(sql, params, db_path, kwargs, started)
+    return affected_rows
+
+
+def _profile_sqlite_statement(sql, params, db_path, kwargs, started:float)->None:
+    """Hands a helper's statement timing to the query profiler; slow plans are explained on a pooled connection."""
+    def explain():
+        with sqlite_connection(db_path, **kwargs) as conn:
+            return explain_sqlite(conn.cursor(), sql, params)
+    query_profiler.record(f"sqlconfig:{db_path}", sql, time.perf_counter()-started, explain)
+
+
+def submit_sqlite_command(sql, params=None, db_path=DEFAULT_DB_PATH, many=False, **kwargs)->Future:
+    """Queue INSERT/UPDATE/DELETE on the database's group-commit writer. Resolves to a `WriteResult`."""
+    writer_kwargs=dict(kwargs)
+    writer_kwargs.pop('min_connections', None)
+    writer_kwargs.pop('max_connections', None)
+    writer_kwargs['single_writer']=True
+    return create_sqlite_writer(db_path, **writer_kwargs).submit(sql, params, many)
 
 
 def get_sqlite_pool_stats(db_path=DEFAULT_DB_PATH, **kwargs):
     """Get SQLite pool statistics."""
-    pool_key_params=(db_path, kwargs.get('min_connections', DEFAULT_MIN_CONNECTIONS),
-                     kwargs.get('max_connections', DEFAULT_MAX_CONNECTIONS))
-
     try:
-        pool_state=create_sqlite_pool(*pool_key_params, **kwargs)
-        return {
-            'database_path':pool_state['db_path'],
-            'total_connections':pool_state['connection_count'],
-            'available_connections':pool_state['available_connections'].qsize(),
-            'active_connections':pool_state['connection_count']-pool_state['available_connections'].qsize(),
-            'max_connections':pool_state['config']['max_connections'],
-            'min_connections':pool_state['config']['min_connections']
-        }
+        return _pool_for(db_path, kwargs).stats()
     except:
         return {'error': 'Pool not initialized'}
 
 
+def get_all_sqlite_pools():
+    """Every cached SQLite pool in this process, for monitoring."""
+    _check_registry_pid()
+    return list(_pools.values())
+
+
+def get_all_sqlite_writers():
+    """Every cached group-commit writer in this process, for monitoring."""
+    _check_registry_pid()
+    return list(_writers.values())
+
+
+def get_all_sqlite_pool_stats():
+    """Get statistics for every cached SQLite pool, without creating any."""
+    return [pool.stats() for pool in get_all_sqlite_pools()]
+
+
 # Export cached pool access
 def get_cached_pools():
-    """Return `lru_cache` info for monitoring."""
-    return create_sqlite_pool.cache_info()
+    """Return pool registry counters for monitoring."""
+    _check_registry_pid()
+    return PoolCacheInfo(_registry_counters['hits'], _registry_counters['misses'], None, len(_pools))
 
 def clear_sqlite_pools():
-    """Clear all cached pools."""
-    create_sqlite_pool.cache_clear()
+    """Clear all cached pools and writers, closing their idle connections and freeing shared in-memory databases."""
+    _check_registry_pid()
+    with _registry_lock:
+        pools, writers=list(_pools.values()), list(_writers.values())
+        _pools.clear()
+        _writers.clear()
+    for pool in pools:
+        pool.close()
+    for writer in writers:
+        writer.close() # queued writes still commit
+    release_shared_memory()
 
 
 # Django DATABASES configuration helper
-def get_sqlite_database_config(db_path, **pool_kwargs):
-    """Generate Django DATABASES configuration for SQLite with pooling."""
+def get_sqlite_database_config(db_path, pooled=False, profile=None, **pool_kwargs):
+    """
+    Generate Django DATABASES configuration for SQLite with pooling.
+    Args:
+        db_path: Path to the SQLite database file; ':memory:' or a `shared_memory_uri()` for an in-memory database
+        pooled: Serve connections from the sqlconfig pool through the `config.pooled_sqlite` backend
+        profile: PRAGMA_PROFILES entry to use instead of the default pragmas ('read_heavy', 'write_heavy'...)
+        pool_kwargs: Overrides for `SQLite_CONFIG` (min_connections, max_connections, timeout, pragmas...)
+    Returns:
+        Django database settings dictionary
+    """
+    db_path=resolve_sqlite_path(db_path)
+    keep_shared_memory_alive(db_path)
+    if profile is not None:
+        pool_kwargs['pragmas']=resolve_pragmas(profile, pool_kwargs.get('pragmas'))
+    pool_config={
+        'db_path':db_path,
+        **SQLite_CONFIG,
+        **pool_kwargs,
+        'profile':profile,
+    }
+
+    if pooled:
+        # Pragmas are applied by the pool once per physical connection, not per checkout
+        return {
+            'ENGINE':'config.pooled_sqlite',
+            'NAME':db_path,
+            'OPTIONS':{},
+            'POOL_CONFIG':pool_config,
+        }
+
     return {
         'ENGINE':'django.db.backends.sqlite3',
         'NAME':db_path,
         'OPTIONS':{
-            'init_command': ';'.join([f"PRAGMA {k} = {v}" for k, v in SQLite_CONFIG['pragmas'].items()]),
+            'init_command': ';'.join([f"PRAGMA {k} = {v}" for k, v in pool_config['pragmas'].items()]),
         },
         # Custom pool configuration
-        'POOL_CONFIG':{
-            'db_path':db_path,
-            **SQLite_CONFIG,
-            **pool_kwargs,
-        }
+        'POOL_CONFIG':pool_config,
     }
\ No newline at end of file
@@ -0,0 +1,8 @@
+"""
+Tests for the SQLite pool, its async facade and the group-commit writer.
+
+    DJANGO_SECRET_KEY=test DJANGO_SQLITE_POOL=true python manage.py test -t . config/tests
+
+`config` is a namespace package, so pass the directory and the top-level directory: discovery does not
+descend into it on its own.
+"""
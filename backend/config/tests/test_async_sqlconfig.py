@@ -0,0 +1,49 @@
+import asyncio
+from django.test import SimpleTestCase
+from config.async_sqlconfig import AsyncSQLitePool
+from config.sqlconfig import SQLite_CONFIG, SQLitePool
+from config.tests.test_sqlconfig import TemporaryDatabaseMixin
+
+
+class AsyncCheckoutCancellationTests(TemporaryDatabaseMixin, SimpleTestCase):
+    def setUp(self):
+        super().setUp()
+        self.pool=SQLitePool(self.db_path, {**SQLite_CONFIG, 'min_connections':0, 'max_connections':1,
+                                            'reap_interval':0})
+        self.async_pool=AsyncSQLitePool(self.pool)
+        self.addCleanup(self.pool.close)
+        self.addCleanup(self.async_pool.close)
+
+    async def queued_checkout(self)->asyncio.Task:
+        task=asyncio.create_task(self.async_pool.checkout(timeout=5))
+        while not self.pool._waiters:
+            await asyncio.sleep(0.001)
+        return task
+
+    def assert_connection_available(self)->None:
+        self.assertEqual(len(self.pool._waiters), 0)
+        self.pool.checkin(self.pool.checkout(timeout=0.1))
+
+    def test_cancelled_while_queued(self):
+        async def scenario():
+            held=self.pool.checkout()
+            task=await self.queued_checkout()
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+            self.pool.checkin(held)
+
+        asyncio.run(scenario())
+        self.assert_connection_available()
+
+    def test_cancelled_after_the_connection_was_handed_over(self):
+        async def scenario():
+            held=self.pool.checkout()
+            task=await self.queued_checkout()
+            self.pool.checkin(held) # granted to the task, which has not resumed yet
+            task.cancel()
+            with self.assertRaises(asyncio.CancelledError):
+                await task
+
+        asyncio.run(scenario())
+        self.assert_connection_available()
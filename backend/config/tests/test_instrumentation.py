@@ -0,0 +1,43 @@
+import ipaddress
+from unittest import mock
+from django.test import SimpleTestCase, TestCase
+from config import metrics
+from config.instrumentation import METRICS_CONFIG
+
+
+class RenderTests(SimpleTestCase):
+    def test_counters_and_gauges(self):
+        self.assertEqual(metrics.render_counter('pool_checkouts_total', 'Checkouts.', [({'database':'a'}, 3)]),
+                         ['# HELP pool_checkouts_total Checkouts.', '# TYPE pool_checkouts_total counter',
+                          'pool_checkouts_total{database="a"} 3'])
+        self.assertEqual(metrics.render_gauge('pool_size', 'Size.', [({}, 2)])[1:], ['# TYPE pool_size gauge', 'pool_size 2'])
+
+
+class MetricsViewTests(TestCase):
+    databases={'default'}
+
+    def scrape(self, remote_addr:str='127.0.0.1', **headers):
+        return self.client.get('/metrics', REMOTE_ADDR=remote_addr, headers=headers)
+
+    def test_loopback_may_scrape_by_default(self):
+        response=self.scrape()
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.scrape('::ffff:127.0.0.1').status_code, 200)
+
+    def test_other_clients_need_the_token(self):
+        self.assertEqual(self.scrape('203.0.113.7').status_code, 403)
+        with mock.patch.dict(METRICS_CONFIG, token='scrape-token'):
+            self.assertEqual(self.scrape('203.0.113.7', Authorization='Bearer wrong').status_code, 403)
+            self.assertEqual(self.scrape('203.0.113.7', Authorization='Bearer scrape-token').status_code, 200)
+
+    def test_allowed_networks(self):
+        with mock.patch.dict(METRICS_CONFIG, allowed_networks=(ipaddress.ip_network('10.0.0.0/8'),)):
+            self.assertEqual(self.scrape('10.1.2.3').status_code, 200)
+            self.assertEqual(self.scrape('127.0.0.1').status_code, 403)
+
+    def test_pool_totals_are_counters(self):
+        body=self.scrape().content.decode()
+        self.assertIn('# TYPE sqlite_pool_checkouts_total counter', body)
+        self.assertIn('# TYPE sqlite_pool_exhaustion_events_total counter', body)
+        self.assertNotIn('# TYPE sqlite_pool_checkouts gauge', body)
+        self.assertIn('# TYPE sqlite_pool_active_connections gauge', body)
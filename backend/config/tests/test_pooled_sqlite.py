@@ -0,0 +1,54 @@
+import sqlite3
+from contextlib import closing
+from django.core.exceptions import ImproperlyConfigured
+from django.db import connections
+from django.test import SimpleTestCase
+from config.pooled_sqlite.base import DatabaseWrapper
+from config.tests.test_sqlconfig import TemporaryDatabaseMixin
+
+
+class PooledBackendTests(TemporaryDatabaseMixin, SimpleTestCase):
+    def make_wrapper(self, options:dict, pragmas:dict=None)->DatabaseWrapper:
+        settings_dict={
+            **connections['default'].settings_dict,
+            'NAME':self.db_path,
+            'OPTIONS':options,
+            'POOL_CONFIG':{'min_connections':0, 'max_connections':2, **({'pragmas':pragmas} if pragmas else {})},
+        }
+        wrapper=DatabaseWrapper(settings_dict, alias='pooled-test')
+
+        def close():
+            wrapper.close()
+            if wrapper._pool is not None:
+                wrapper._pool.close()
+        self.addCleanup(close)
+        return wrapper
+
+    def pragma(self, wrapper:DatabaseWrapper, name:str):
+        with wrapper.cursor() as cursor:
+            cursor.execute(f"PRAGMA {name}")
+            return cursor.fetchone()[0]
+
+    def test_foreign_keys_are_on_whatever_the_pool_pragmas(self):
+        wrapper=self.make_wrapper({}, pragmas={'journal_mode':'WAL', 'foreign_keys':'OFF'})
+        self.assertEqual(self.pragma(wrapper, 'foreign_keys'), 1)
+
+    def test_init_command_runs_on_pooled_connections(self):
+        wrapper=self.make_wrapper({'init_command':'PRAGMA cache_size = -4321; PRAGMA recursive_triggers = ON'})
+        self.assertEqual((self.pragma(wrapper, 'cache_size'), self.pragma(wrapper, 'recursive_triggers')), (-4321, 1))
+
+    def test_transaction_mode_is_applied(self):
+        wrapper=self.make_wrapper({'transaction_mode':'IMMEDIATE'})
+        wrapper.ensure_connection()
+        wrapper._start_transaction_under_autocommit() # how atomic() opens a transaction on SQLite
+        try:
+            with closing(sqlite3.connect(self.db_path, timeout=0)) as other:
+                with self.assertRaisesMessage(sqlite3.OperationalError, 'locked'):
+                    other.execute('BEGIN IMMEDIATE')
+        finally:
+            wrapper.connection.execute('ROLLBACK')
+
+    def test_unsupported_options_are_refused(self):
+        wrapper=self.make_wrapper({'cached_statements':256, 'timeout':5})
+        with self.assertRaisesMessage(ImproperlyConfigured, "'cached_statements'"):
+            wrapper.ensure_connection()
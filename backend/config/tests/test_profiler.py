@@ -0,0 +1,103 @@
+import os
+import sqlite3
+import tempfile
+from contextlib import closing
+from unittest import mock
+from django.db import connection
+from django.test import SimpleTestCase, TestCase
+from config.profiler import (
+    OTHER_FINGERPRINT, PROFILER_CONFIG, QueryProfiler, clear_profiles, explain_sqlite, fingerprint, full_scans,
+    load_profiles, query_profiler,
+)
+
+
+class FingerprintTests(SimpleTestCase):
+    def test_literals_placeholders_and_lists_collapse(self):
+        self.assertEqual(fingerprint("SELECT id FROM users WHERE email = 'a@b.c' AND id > 42"),
+                         fingerprint("SELECT id FROM users\n  WHERE email = %s AND id > ?"))
+        self.assertEqual(fingerprint("SELECT * FROM users WHERE id IN (1, 2, 3)"), "SELECT * FROM users WHERE id IN (...)")
+        self.assertEqual(fingerprint("INSERT INTO t (a, b) VALUES (%s, %s), (%s, %s)"), "INSERT INTO t (a, b) VALUES (?, ?), ...")
+        self.assertEqual(fingerprint("SELECT * FROM users_2 WHERE name = 'it''s'"), "SELECT * FROM users_2 WHERE name = ?")
+
+    def test_full_scans(self):
+        plan=['SCAN users', 'SCAN users USING COVERING INDEX users_email_login', 'SEARCH users USING INDEX x (id=?)',
+              '  ->  Seq Scan on users  (cost=0.00..1.00 rows=1 width=4)', 'SCAN CONSTANT ROW']
+        self.assertEqual(full_scans(plan), ['SCAN users', '->  Seq Scan on users  (cost=0.00..1.00 rows=1 width=4)'])
+
+    def test_explain_sqlite_flags_unindexed_lookups(self):
+        with closing(sqlite3.connect(':memory:')) as conn:
+            conn.execute("CREATE TABLE users (id INTEGER PRIMARY KEY, email TEXT)")
+            cursor=conn.cursor()
+            self.assertTrue(full_scans(explain_sqlite(cursor, "SELECT id FROM users WHERE email = ?", ('a',))))
+            conn.execute("CREATE INDEX users_email ON users (email)")
+            self.assertFalse(full_scans(explain_sqlite(cursor, "SELECT id FROM users WHERE email = ?", ('a',))))
+
+
+class QueryProfilerTests(SimpleTestCase):
+    def setUp(self):
+        directory=tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory=directory.name
+
+    def make_profiler(self, **config)->QueryProfiler:
+        return QueryProfiler({**PROFILER_CONFIG, 'enabled':True, 'slow_threshold':0.01, 'directory':self.directory,
+                              'dump_interval':3600, **config})
+
+    def test_aggregates_per_fingerprint_and_explains_once(self):
+        profiler=self.make_profiler()
+        explain=mock.Mock(return_value=['SCAN users'])
+        for elapsed in (0.001, 0.02, 0.05):
+            profiler.record('django:default', f"SELECT * FROM users WHERE id = {elapsed*1000:.0f}", elapsed, explain)
+        stats=profiler.snapshot()['SELECT * FROM users WHERE id = ?']
+        self.assertEqual((stats['count'], stats['slow'], stats['max']), (3, 2, 0.05))
+        self.assertAlmostEqual(stats['total'], 0.071)
+        self.assertEqual((stats['plan'], stats['full_scans'], stats['sources']), (['SCAN users'], ['SCAN users'], ['django:default']))
+        explain.assert_called_once_with()
+
+    def test_unexplainable_and_failing_plans(self):
+        profiler=self.make_profiler()
+        explain=mock.Mock(side_effect=sqlite3.OperationalError('no such table'))
+        profiler.record('django:default', 'PRAGMA optimize', 1.0, explain)
+        profiler.record('django:default', 'SELECT 1 FROM missing', 1.0, explain)
+        snapshot=profiler.snapshot()
+        self.assertIsNone(snapshot['PRAGMA optimize']['plan'])
+        self.assertEqual(snapshot['SELECT ? FROM missing']['plan'], ['EXPLAIN failed: no such table'])
+        explain.assert_called_once_with()
+
+    def test_fingerprints_beyond_the_limit_are_folded(self):
+        profiler=self.make_profiler(max_fingerprints=2)
+        for table in ('a', 'b', 'c', 'd'):
+            profiler.record('django:default', f"SELECT * FROM {table}", 0.001)
+        snapshot=profiler.snapshot()
+        self.assertEqual(len(snapshot), 3)
+        self.assertEqual(snapshot[OTHER_FINGERPRINT]['count'], 2)
+
+    def test_dumped_profiles_merge(self):
+        first, second=self.make_profiler(), self.make_profiler()
+        first.record('django:default', 'SELECT * FROM users WHERE id = 1', 0.002)
+        second.record('django:analytics', 'SELECT * FROM users WHERE id = 2', 0.05, lambda: ['SCAN users'])
+        os.replace(first.dump(), first.dump_path(1)) # as if written by another process
+        second.dump()
+
+        merged=load_profiles(self.directory)['SELECT * FROM users WHERE id = ?']
+        self.assertEqual((merged['count'], merged['slow'], merged['max']), (2, 1, 0.05))
+        self.assertEqual(merged['sources'], ['django:analytics', 'django:default'])
+        self.assertEqual(merged['full_scans'], ['SCAN users'])
+        self.assertEqual(clear_profiles(self.directory), 2)
+        self.assertEqual(load_profiles(self.directory), {})
+
+
+class DjangoQueryProfilingTests(TestCase):
+    databases={'default'}
+
+    def test_statements_on_django_connections_are_recorded(self):
+        directory=tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.addCleanup(query_profiler.reset)
+        with mock.patch.dict(PROFILER_CONFIG, enabled=True, slow_threshold=0, directory=directory.name, dump_interval=3600):
+            query_profiler.reset()
+            with connection.cursor() as cursor:
+                cursor.execute("SELECT id FROM users WHERE email = %s", ['ada@example.com'])
+        stats=query_profiler.snapshot()['SELECT id FROM users WHERE email = ?']
+        self.assertEqual(stats['sources'], ['django:default'])
+        self.assertTrue(stats['plan'])
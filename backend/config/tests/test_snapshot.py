@@ -0,0 +1,55 @@
+import os
+import stat
+import tempfile
+from unittest import mock
+from django.test import SimpleTestCase
+from config.snapshot import SNAPSHOT_CONFIG, _read_cache, _write_cache, configuration
+
+
+class SnapshotCacheTests(SimpleTestCase):
+    def setUp(self):
+        directory=tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.directory=os.path.join(directory.name, 'cache')
+        self.path=os.path.join(self.directory, 'config.json')
+        self.snapshot=configuration.snapshot()
+
+    def mode(self, path:str)->int:
+        return stat.S_IMODE(os.lstat(path).st_mode)
+
+    def test_default_cache_is_in_a_per_user_directory(self):
+        directory=os.path.dirname(SNAPSHOT_CONFIG['cache_file'])
+        self.assertNotEqual(directory, tempfile.gettempdir())
+        self.assertIn(str(os.getuid()), os.path.basename(directory))
+
+    def test_round_trip_through_private_files(self):
+        _write_cache(self.path, 'key', self.snapshot)
+        self.assertEqual((self.mode(self.directory), self.mode(self.path)), (0o700, 0o600))
+        self.assertEqual(os.listdir(self.directory), ['config.json']) # no temporary file left behind
+        self.assertEqual(_read_cache(self.path, 'key').as_dict(), self.snapshot.as_dict())
+        self.assertIsNone(_read_cache(self.path, 'other key'))
+
+    def test_files_others_can_write_are_not_trusted(self):
+        _write_cache(self.path, 'key', self.snapshot)
+        os.chmod(self.path, 0o666)
+        self.assertIsNone(_read_cache(self.path, 'key'))
+        os.chmod(self.path, 0o600)
+        os.chmod(self.directory, 0o777)
+        self.assertIsNone(_read_cache(self.path, 'key'))
+
+    def test_symlinks_are_not_followed(self):
+        _write_cache(self.path, 'key', self.snapshot)
+        link=os.path.join(self.directory, 'link.json')
+        os.symlink(self.path, link)
+        self.assertIsNone(_read_cache(link, 'key'))
+
+    def test_files_of_another_user_are_not_trusted(self):
+        _write_cache(self.path, 'key', self.snapshot)
+        with mock.patch('os.getuid', return_value=os.getuid()+1):
+            self.assertIsNone(_read_cache(self.path, 'key'))
+
+    def test_nothing_is_written_into_a_directory_others_can_write(self):
+        os.makedirs(self.directory)
+        os.chmod(self.directory, 0o777)
+        _write_cache(self.path, 'key', self.snapshot)
+        self.assertEqual(os.listdir(self.directory), [])
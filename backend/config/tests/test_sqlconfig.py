@@ -0,0 +1,134 @@
+import os
+import sqlite3
+import tempfile
+import threading
+import time
+from concurrent.futures import wait
+from contextlib import closing
+from typing import Optional
+from django.test import SimpleTestCase
+from config.sqlconfig import SQLite_CONFIG, SQLitePool, SQLiteWriter
+
+
+def wait_until(condition, timeout:float=5.0)->None:
+    deadline=time.monotonic()+timeout
+    while not condition():
+        if time.monotonic()>=deadline:
+            raise AssertionError('condition not reached')
+        time.sleep(0.001)
+
+
+class TemporaryDatabaseMixin:
+    def setUp(self):
+        super().setUp()
+        directory=tempfile.TemporaryDirectory()
+        self.addCleanup(directory.cleanup)
+        self.db_path=os.path.join(directory.name, 'test.sqlite3')
+
+
+class SQLitePoolTests(TemporaryDatabaseMixin, SimpleTestCase):
+    def make_pool(self, **config)->SQLitePool:
+        pool=SQLitePool(self.db_path, {**SQLite_CONFIG, 'min_connections':0, 'max_connections':1,
+                                       'reap_interval':0, **config})
+        self.addCleanup(pool.close)
+        return pool
+
+    def test_returned_connection_goes_to_the_oldest_waiter(self):
+        pool=self.make_pool()
+        held=pool.checkout()
+        order=[]
+
+        def checkout(name:str)->None:
+            conn=pool.checkout(timeout=5)
+            order.append(name)
+            pool.checkin(conn)
+
+        first=threading.Thread(target=checkout, args=('first',))
+        first.start()
+        wait_until(lambda: len(pool._waiters)==1)
+        second=threading.Thread(target=checkout, args=('second',))
+        second.start()
+        wait_until(lambda: len(pool._waiters)==2)
+
+        pool.checkin(held)
+        first.join(5)
+        second.join(5)
+        self.assertEqual(order, ['first', 'second'])
+
+    def test_checkin_hands_off_instead_of_reusing(self):
+        pool=self.make_pool()
+        held=pool.checkout()
+        waiter=threading.Thread(target=lambda: pool.checkin(pool.checkout(timeout=5)))
+        waiter.start()
+        wait_until(lambda: len(pool._waiters)==1)
+
+        pool.checkin(held)
+        # The returned connection belongs to the queued thread, not to whoever asks next
+        self.assertEqual(len(pool._idle), 0)
+        waiter.join(5)
+        self.assertEqual(len(pool._idle), 1)
+
+    def test_checkout_times_out_when_exhausted(self):
+        pool=self.make_pool()
+        held=pool.checkout()
+        started=time.monotonic()
+        with self.assertRaisesMessage(ConnectionError, 'SQLite pool exhausted'):
+            pool.checkout(timeout=0.05)
+        self.assertGreaterEqual(time.monotonic()-started, 0.05)
+        self.assertEqual(len(pool._waiters), 0)
+        self.assertEqual(pool.stats()['exhaustion_events'], 1)
+
+        pool.checkin(held)
+        pool.checkin(pool.checkout(timeout=0.05))
+
+
+class SQLiteWriterTests(TemporaryDatabaseMixin, SimpleTestCase):
+    def make_writer(self, db_path:Optional[str]=None)->SQLiteWriter:
+        writer=SQLiteWriter(db_path or self.db_path, {**SQLite_CONFIG, 'timeout':5})
+        self.addCleanup(writer.close)
+        writer.execute('CREATE TABLE items (value INTEGER)')
+        return writer
+
+    def test_close_racing_submit_leaves_no_write_pending(self):
+        for attempt in range(10):
+            db_path=f"{self.db_path}.{attempt}"
+            writer=self.make_writer(db_path)
+            futures=[]
+            refused=[]
+
+            def submit()->None:
+                for value in range(100):
+                    try:
+                        futures.append(writer.submit('INSERT INTO items VALUES (?)', (value,)))
+                    except ConnectionError:
+                        refused.append(value)
+
+            submitters=[threading.Thread(target=submit) for _ in range(4)]
+            for submitter in submitters:
+                submitter.start()
+            writer.close()
+            for submitter in submitters:
+                submitter.join()
+
+            _done, pending=wait(futures, timeout=5)
+            self.assertFalse(pending)
+            self.assertEqual(len(futures)+len(refused), 400)
+            committed=sum(1 for future in futures if future.exception() is None)
+            with closing(sqlite3.connect(db_path)) as conn:
+                self.assertEqual(conn.execute('SELECT COUNT(*) FROM items').fetchone()[0], committed)
+
+    def test_submit_after_close_is_refused(self):
+        writer=self.make_writer()
+        writer.close()
+        with self.assertRaisesMessage(ConnectionError, 'SQLite writer closed'):
+            writer.submit('INSERT INTO items VALUES (1)')
+
+    def test_failing_statement_only_fails_its_own_write(self):
+        writer=self.make_writer()
+        writer.execute('CREATE UNIQUE INDEX items_value ON items (value)')
+        first=writer.submit('INSERT INTO items VALUES (1)')
+        duplicate=writer.submit('INSERT INTO items VALUES (1)')
+        second=writer.submit('INSERT INTO items VALUES (2)')
+        self.assertEqual(first.result(5).rowcount, 1)
+        self.assertIsNotNone(duplicate.exception(5))
+        self.assertEqual(second.result(5).rowcount, 1)
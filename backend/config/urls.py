@@ -1,5 +1,10 @@
 from django.urls import path, include
+from apps.authentication_module.views import dashboard
+from config.instrumentation import metrics_view
 
 urlpatterns=[
     path('auth/', include('apps.authentication_module.urls')),
-]
\ No newline at end of file
+    path('dashboard/', dashboard),
+    path('metrics', metrics_view),
+    path('', include('apps.frontend_module.urls')), # built frontend assets; keep last, it matches any path
+]